@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the SDK against the local mock server.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --only upload,download --size-mb 256 --bandwidth 50
+
+Measures cold import time, upload and download throughput, peak Python
+memory of a transfer, connection reuse and metadata call rates, and writes them as
+JSON together with the SDK version, the git commit and the mock settings
+so runs from different revisions can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.unixfs import cid_v0
+from tests.mock_server import MockLighthouse
+
+
+MB = 1024*1024
+
+
+def _sdk_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("lighthouseweb3")
+    except Exception:
+        return "unknown"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _write_payload(path: str, size: int) -> None:
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            block = os.urandom(min(remaining, 4*MB))
+            f.write(block)
+            remaining -= len(block)
+
+
+def _best(runs: int, func):
+    """seconds of the fastest of `runs` calls, and the result of the last"""
+    best, result = None, None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def bench_upload(lh, mock, ctx):
+    seconds, result = _best(ctx["runs"], lambda: lh.upload(ctx["payload"]))
+    ctx["cid"] = result["data"]["Hash"]
+    return {"seconds": seconds, "bytes": ctx["size"], "mb_per_s": ctx["size"] / MB / seconds}
+
+
+def bench_download(lh, mock, ctx):
+    results = {}
+    target = os.path.join(ctx["workdir"], "download.bin")
+    for connections in (1, 4):
+        seconds, _ = _best(ctx["runs"], lambda: lh.downloadToPath(
+            ctx["cid"], target, chunk_size=MB, connections=connections))
+        results[f"connections_{connections}"] = {
+            "seconds": seconds, "bytes": ctx["size"], "mb_per_s": ctx["size"] / MB / seconds,
+        }
+    return results
+
+
+def bench_memory(lh, mock, ctx):
+    """peak of Python allocations while moving the payload, to catch whole-file buffering"""
+    target = os.path.join(ctx["workdir"], "memory.bin")
+    results = {}
+    for name, func in (
+        ("upload", lambda: lh.upload(ctx["payload"])),
+        ("download_to_path", lambda: lh.downloadToPath(ctx["cid"], target, chunk_size=MB)),
+    ):
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        results[name] = {"peak_bytes": peak, "peak_ratio": peak / ctx["size"]}
+    return results
+
+
+def bench_connections(lh, mock, ctx):
+    """connections the mock saw for a run of sequential calls; 1 means full keep-alive reuse"""
+    calls = ctx["calls"]
+    mock.reset_stats()
+    for _ in range(calls):
+        lh.getFileInfo(ctx["cid"])
+    stats = mock.stats()
+    return {"calls": calls, "connections": stats["connections"], "reuse_ratio": 1 - stats["connections"] / calls}
+
+
+def bench_metadata(lh, mock, ctx):
+    calls = ctx["calls"]
+    # distinct CIDs, since getFileInfoMany looks duplicates up once
+    cids = [cid_v0(str(i).encode()) for i in range(calls)]
+    start = time.perf_counter()
+    for cid in cids:
+        lh.getFileInfo(cid)
+    sequential = time.perf_counter() - start
+    start = time.perf_counter()
+    list(lh.getFileInfoMany(cids))
+    concurrent = time.perf_counter() - start
+    return {
+        "calls": calls,
+        "sequential_per_s": calls / sequential,
+        "concurrent_per_s": calls / concurrent,
+    }
+
+
+_IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import src.lighthouseweb3
+imported = time.perf_counter() - start
+src.lighthouseweb3.Lighthouse("benchmark-token")
+constructed = time.perf_counter() - start
+heavy = [name for name in ("eth_account", "asyncio", "aiohttp") if name in sys.modules]
+print(imported, constructed, ",".join(heavy))
+"""
+
+
+def bench_import(lh, mock, ctx):
+    """cold `import lighthouseweb3` in fresh interpreters, the cost every CLI run and serverless start pays"""
+    imported, constructed = [], []
+    for _ in range(max(ctx["runs"], 5)):
+        out = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE], capture_output=True, text=True, check=True,
+        ).stdout.split(" ")
+        imported.append(float(out[0]))
+        constructed.append(float(out[1]))
+    imported.sort()
+    constructed.sort()
+    return {
+        "import_seconds": imported[len(imported) // 2],
+        "import_and_client_seconds": constructed[len(constructed) // 2],
+        "heavy_modules_loaded": [name for name in out[2].strip().split(",") if name],
+    }
+
+
+BENCHMARKS = {
+    "import": bench_import,
+    "upload": bench_upload,
+    "download": bench_download,
+    "memory": bench_memory,
+    "connections": bench_connections,
+    "metadata": bench_metadata,
+}
+
+
+def run(args) -> dict:
+    only = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    options = {
+        "latency": args.latency,
+        "bandwidth": args.bandwidth * MB if args.bandwidth else None,
+        "error_rate": args.error_rate,
+        "seed": 0,
+    }
+    report = {
+        "sdk_version": _sdk_version(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": dict(options, size_mb=args.size_mb, runs=args.runs, calls=args.calls),
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir, MockLighthouse(**options).start(process=True) as mock:
+        ctx = {
+            "workdir": workdir,
+            "payload": os.path.join(workdir, "payload.bin"),
+            "size": int(args.size_mb * MB),
+            "runs": args.runs,
+            "calls": args.calls,
+        }
+        _write_payload(ctx["payload"], ctx["size"])
+        lh = Lighthouse("benchmark-token")
+        # the other benchmarks need a stored CID
+        if "upload" not in only:
+            ctx["cid"] = lh.upload(ctx["payload"])["data"]["Hash"]
+        for name in [name for name in BENCHMARKS if name in only]:
+            print(f"running {name}...", file=sys.stderr)
+            report["results"][name] = BENCHMARKS[name](lh, mock, ctx)
+        report["mock"] = mock.stats()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Lighthouse SDK against a local mock server")
+    parser.add_argument("--output", help="write the JSON report to this file (default: stdout)")
+    parser.add_argument("--only", help=f"comma separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--size-mb", type=float, default=64, help="size of the transferred payload")
+    parser.add_argument("--runs", type=int, default=3, help="repetitions of each transfer, the fastest is kept")
+    parser.add_argument("--calls", type=int, default=200, help="metadata calls per measurement")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock waits before answering")
+    parser.add_argument("--bandwidth", type=float, default=None, help="MB/s the mock reads and writes bodies at")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of mock answers that fail with 503")
+    args = parser.parse_args(argv)
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
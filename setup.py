@@ -20,14 +20,15 @@ setup(
         "urllib3>=2.0.2",
         "eth-account>=0.13.7",
     ],
-    python_requires=">=3.6",
+    extras_require={
+        "async": ["aiohttp>=3.8.0"],
+    },
+    python_requires=">=3.8",
     classifiers=[
         "License :: OSI Approved :: GNU General Public License v3 (GPLv3)",
         "Operating System :: OS Independent",
         "Intended Audience :: Developers",
         "Topic :: Software Development :: Build Tools",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 
+import functools
 import os
 import io
 from .functions import (
     upload as d,
+    batch_upload,
+    resumable_upload,
+    sync as _sync,
+    local_cid as localCid,
     deal_status, 
     get_uploads as getUploads, 
     download as _download,
@@ -16,42 +21,296 @@ from .functions import (
     remove_ipns_record as removeIpnsRecord,
     create_wallet as createWallet
 )
+from .functions.cid_cache import CidCache
+from .functions.download_manager import DownloadManager
+from .functions.gateways import GatewayPool
+from .functions.ipns_keys import KeyIndex, generate_keys, publish_record, publish_records, remove_keys
+from .functions.ttl_cache import TTLCache
+from .functions.metrics import Metrics
+from .functions.bandwidth import BandwidthLimiter, get_bandwidth_limiter, set_bandwidth_limit
+from .functions.progress import CancelToken, ProgressTracker, TransferCancelled, tracker_for
+from .functions.rate_limit import HostRateLimiter, TokenBucket
+from .functions.retry import RetryPolicy, RetryBudget
+from .functions.transport import Transport, get_default_transport, DEFAULT_MAX_CONCURRENCY, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+from .functions.utils import LazyModule, hybridmethod, remaining_size
+
+# asyncio and aiohttp are only imported once an AsyncLighthouse is used
+async_api = LazyModule(".functions.async_api", __name__)
+async_transport = LazyModule(".functions.async_transport", __name__)
+
+
+def _transport(client) -> Transport:
+    return client.transport if client is not None else get_default_transport()
+
+
+def _cache(client) -> CidCache:
+    return client.cache if client is not None else None
+
+
+def _cached(client, endpoint: str, key, loader):
+    """loader() through the client's metadata cache, if it has one"""
+    if client is None or client.metadata_cache is None:
+        return loader()
+    return client.metadata_cache.get_or_load(endpoint, key, loader)
+
+
+def _file_info(client, cid: str):
+    return _cached(client, "file_info", cid, lambda: getFileInfo.get_file_info(cid, _transport(client)))
+
+
+def _deal_status(client, cid: str):
+    return _cached(client, "deal_status", cid, lambda: deal_status.get_deal_status(cid, _transport(client)))
+
+
+def _invalidate(client, endpoint: str, key=None) -> None:
+    if client is not None and client.metadata_cache is not None:
+        client.metadata_cache.invalidate(endpoint, key)
+
+
+def _timed(method):
+    """record the duration of a client call in its metrics registry"""
+    @functools.wraps(method)
+    def timed(client, *args, **kwargs):
+        metrics = getattr(client, "metrics", None)
+        if metrics is None:
+            return method(client, *args, **kwargs)
+        with metrics.timer(method.__name__):
+            return method(client, *args, **kwargs)
+    return timed
+
+
+def _changed_keys(client, results):
+    """pass batch IPNS results through, dropping the cached listing as items succeed"""
+    for result in results:
+        if "data" in result and not result.get("skipped"):
+            _invalidate(client, "ipns_records", client.token)
+        yield result
+
+
+def _gateway_pool(gateways) -> GatewayPool:
+    if gateways is None or isinstance(gateways, GatewayPool):
+        return gateways
+    return GatewayPool(gateways)
+
+
+def _source_size(source) -> int:
+    if not isinstance(source, str):
+        return remaining_size(source)
+    if os.path.isdir(source):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(source) for name in files
+        )
+    return os.path.getsize(source)
+
+
+def _finished(tracker: ProgressTracker, result):
+    if tracker is not None:
+        tracker.finish()
+    return result
+
+
+def _uploaded(client, tag: str, result):
+    # an upload changes the balance and may move a tag
+    _invalidate(client, "balance")
+    if tag:
+        _invalidate(client, "tagged", (client.token, tag))
+    return result
 
 
 class Lighthouse:
-    def __init__(self, token: str = ""):
+    def __init__(
+        self,
+        token: str = "",
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        transport: Transport = None,
+        cache: CidCache = None,
+        metadata_cache: TTLCache = None,
+        retry: RetryPolicy = None,
+        rate_limit: HostRateLimiter = None,
+        metrics: Metrics = None,
+        key_index: KeyIndex = None,
+        gateways=None,
+    ):
+        """
+        :param token: str, lighthouse api token (default: LIGHTHOUSE_TOKEN env variable)
+        :param pool_size: int, keep-alive connections kept per host
+        :param timeout: float or (connect, read) tuple applied to every request
+        :param transport: Transport, share an existing transport instead of creating one
+        :param cache: CidCache, serve repeat downloads from a local CID cache (default: disabled)
+        :param metadata_cache: TTLCache, cache and coalesce metadata lookups (default: disabled)
+        :param retry: RetryPolicy, backoff and retry budget of the transport (default: 3 retries, False to disable)
+        :param rate_limit: HostRateLimiter, requests per second allowed per host (default: unlimited)
+        :param metrics: Metrics, registry of call latencies, bytes and retries (default: a new one)
+        :param key_index: KeyIndex, local index of the account's IPNS keys (default: in memory)
+        :param gateways: list of gateway urls or GatewayPool, downloads are hedged across them (default: Config.lighthouse_gateway)
+        """
         self.token = token or os.environ.get("LIGHTHOUSE_TOKEN", "")
         if not self.token:
             raise Exception(
                 "No token provided: Please provide a token or set the LIGHTHOUSE_TOKEN environment variable"
             )
-
-    def upload(self, source: str, tag: str = ''):
+        if metrics is None:
+            metrics = transport.metrics if transport is not None and transport.metrics is not None else Metrics()
+        self.metrics = metrics
+        self.key_index = key_index if key_index is not None else KeyIndex()
+        self.transport = transport or Transport(
+            pool_connections=pool_size, pool_maxsize=pool_size, timeout=timeout,
+            retry=retry, rate_limit=rate_limit, metrics=metrics, gateways=_gateway_pool(gateways),
+        )
+        self.gateways = self.transport.gateways
+        self.cache = cache
+        self.metadata_cache = metadata_cache
+        if cache is not None:
+            metrics.add_collector("cid", cache.stats)
+        if metadata_cache is not None and hasattr(metadata_cache, "stats"):
+            metrics.add_collector("metadata", metadata_cache.stats)
+
+    def close(self):
+        """Close the pooled connections held by this client"""
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @_timed
+    def upload(
+        self,
+        source: str,
+        tag: str = '',
+        resumable: bool = False,
+        chunk_size: int = resumable_upload.DEFAULT_UPLOAD_CHUNK_SIZE,
+        journal_path: str = None,
+        skip_existing: bool = False,
+        on_progress=None,
+        cancel: CancelToken = None,
+    ):
         """
         Upload a file or directory to the Lighthouse.
 
         :param source: str, path to file or directory
+        :param skip_existing: bool, compute the CID locally and skip the transfer if it is already among this account's uploads (default: False)
+        :param resumable: bool, upload a file in chunks that survive a restart (default: False)
+        :param chunk_size: int, size of each resumable chunk (default: 64MB)
+        :param journal_path: str, resumable checkpoint file (default: under ~/.lighthouse/uploads)
+        :param on_progress: callable, called with a dict of done/total bytes, speed, average and eta
+        :param cancel: CancelToken, abort the upload from another thread
         :return: t.Upload, the upload result
         """
         try:
-            return d.upload(source, self.token, tag)
+            tracker = tracker_for(None, on_progress, cancel)
+            if tracker is not None and not resumable:
+                tracker.total = _source_size(source)
+            if resumable:
+                return _uploaded(self, tag, _finished(tracker, resumable_upload.upload_resumable(
+                    source, self.token, tag, chunk_size=chunk_size,
+                    journal_path=journal_path, transport=self.transport, tracker=tracker,
+                )))
+            return _uploaded(self, tag, _finished(tracker, d.upload(
+                source, self.token, tag, self.transport, skip_existing, tracker
+            )))
         except Exception as e:
             raise e
 
-    def uploadBlob(self, source: io.BufferedReader, filename: str, tag: str = ''):
+    @_timed
+    def uploadBlob(
+        self,
+        source: io.BufferedReader,
+        filename: str,
+        tag: str = '',
+        resumable: bool = False,
+        chunk_size: int = resumable_upload.DEFAULT_UPLOAD_CHUNK_SIZE,
+        journal_path: str = None,
+        on_progress=None,
+        cancel: CancelToken = None,
+    ):
         """
         Upload Blob a file or directory to the Lighthouse.
 
         :param source: str, path to file or directory
+        :param resumable: bool, upload in chunks that survive a restart, source must be seekable (default: False)
+        :param chunk_size: int, size of each resumable chunk (default: 64MB)
+        :param journal_path: str, resumable checkpoint file (default: under ~/.lighthouse/uploads)
+        :param on_progress: callable, called with a dict of done/total bytes, speed, average and eta
+        :param cancel: CancelToken, abort the upload from another thread
         :return: t.Upload, the upload result
         """
         if not (hasattr(source, 'read') and hasattr(source, 'close')):
             raise TypeError("source must have 'read' and 'close' methods")
         try:
-            return d.uploadBlob(source, filename, self.token, tag)
+            tracker = tracker_for(None, on_progress, cancel)
+            if tracker is not None and not resumable:
+                tracker.total = remaining_size(source)
+            if resumable:
+                return _uploaded(self, tag, _finished(tracker, resumable_upload.upload_resumable(
+                    source, self.token, tag, filename=filename, chunk_size=chunk_size,
+                    journal_path=journal_path, transport=self.transport, tracker=tracker,
+                )))
+            return _uploaded(self, tag, _finished(tracker, d.uploadBlob(
+                source, filename, self.token, tag, self.transport, tracker
+            )))
         except Exception as e:
             raise e
     
+    @_timed
+    def uploadBatch(
+        self,
+        source: str,
+        tag: str = '',
+        max_shard_bytes: int = batch_upload.DEFAULT_SHARD_BYTES,
+        max_shard_files: int = batch_upload.DEFAULT_SHARD_FILES,
+        max_workers: int = batch_upload.DEFAULT_WORKERS,
+        retries: int = 2,
+    ):
+        """
+        Upload a directory as concurrent size and count bounded shards, stitched into one directory CID.
+
+        :param source: str, path to directory
+        :param max_shard_bytes: int, maximum total file size per shard
+        :param max_shard_files: int, maximum number of files per shard
+        :param max_workers: int, shards uploaded at the same time
+        :param retries: int, extra attempts for a failing shard
+        :return: dict, the root directory upload result with per shard throughput in "shards"
+        """
+        try:
+            return _uploaded(self, tag, batch_upload.upload_batch(
+                source, self.token, tag, max_shard_bytes, max_shard_files,
+                max_workers, retries, self.transport,
+            ))
+        except Exception as e:
+            raise e
+
+    @_timed
+    def sync(
+        self,
+        source: str,
+        tag: str = '',
+        manifest_path: str = None,
+        max_workers: int = batch_upload.DEFAULT_WORKERS,
+        retries: int = 2,
+    ):
+        """
+        Upload only the files of a directory changed since its last sync, and return the updated directory CID.
+
+        :param source: str, path to directory
+        :param manifest_path: str, file recording the last sync (default: under ~/.lighthouse/sync)
+        :param max_workers: int, files hashed and shards uploaded at the same time
+        :param retries: int, extra attempts for a failing shard
+        :return: dict, the root directory upload result with uploaded/unchanged/reused/removed counts
+        """
+        try:
+            return _uploaded(self, tag, _sync.sync(
+                source, self.token, tag, manifest_path,
+                max_workers=max_workers, retries=retries, transport=self.transport,
+            ))
+        except Exception as e:
+            raise e
+
+    @_timed
     def getBalance(self):
         """
         Retrieve the balance information of a user from the Lighthouse.
@@ -60,10 +319,11 @@ class Lighthouse:
         :return: dict[str, any], A dictionary containing the data usage and data limit details.
         """
         try:
-            return getBalance.get_balance(self.token)
+            return _cached(self, "balance", self.token, lambda: getBalance.get_balance(self.token, self.transport))
         except Exception as e:
             raise e
     
+    @_timed
     def generateKey(self):
         """
         Generate a new IPNS key for the authenticated user.
@@ -71,23 +331,35 @@ class Lighthouse:
         :return: dict, The generated IPNS key information.
         """
         try:
-            return ipnsGenerateKey.ipns_generate_key(self.token)
+            key = ipnsGenerateKey.ipns_generate_key(self.token, self.transport)
+            _invalidate(self, "ipns_records", self.token)
+            if "data" in key:
+                self.key_index.added(key["data"]["ipnsName"], key["data"]["ipnsId"])
+                self.key_index.save()
+            return key
         except Exception as e:
             raise e
 
-    def publishRecord(self, cid: str, keyName: str):
+    @_timed
+    def publishRecord(self, cid: str, keyName: str, skip_unchanged: bool = False):
         """
         Publish an IPNS record for a given CID and key name.
 
         :param cid: str, Content Identifier to publish
         :param keyName: str, Name of the IPNS key to use
-        :return: dict, The published IPNS record information
+        :param skip_unchanged: bool, don't publish if the key index says the key already points at cid
+        :return: dict, The published IPNS record information, with "skipped": True if nothing was published
         """
         try:
-            return ipnsPublishRecord.ipns_publish_record(self.token, cid, keyName)
+            record = publish_record(self.token, cid, keyName, self.transport, self.key_index, skip_unchanged)
+            if not record.get("skipped"):
+                _invalidate(self, "ipns_records", self.token)
+            self.key_index.save()
+            return record
         except Exception as e:
             raise e
 
+    @_timed
     def getAllKeys(self):
         """
         Retrieves all IPNS records associated with the current token.
@@ -96,10 +368,15 @@ class Lighthouse:
         """
 
         try:
-            return getIpnsRecord.get_ipns_records(self.token)
+            records = _cached(self, "ipns_records", self.token, lambda: getIpnsRecord.get_ipns_records(self.token, self.transport))
+            if "data" in records:
+                self.key_index.refresh(records["data"])
+                self.key_index.save()
+            return records
         except Exception as e:
             raise e
 
+    @_timed
     def removeKey(self, keyName: str):
         """
         Remove IPNS record of the given keyName
@@ -109,12 +386,84 @@ class Lighthouse:
         """
 
         try:
-            return removeIpnsRecord.remove_ipns_record(self.token, keyName)
+            record = removeIpnsRecord.remove_ipns_record(self.token, keyName, self.transport)
+            _invalidate(self, "ipns_records", self.token)
+            if "data" in record:
+                self.key_index.removed(keyName)
+                self.key_index.save()
+            return record
+        except Exception as e:
+            raise e
+
+    def generateKeys(self, count: int, max_workers: int = None):
+        """
+        Generate many IPNS keys concurrently, adding them to the key index.
+
+        :param count: int, number of keys to create
+        :param max_workers: int, concurrent requests (default: the connection pool size)
+        :return: generator of {"index": ..., "data": ...} or {"index": ..., "error": ...} as they complete
+        """
+        try:
+            return _changed_keys(self, generate_keys(self.token, count, max_workers, self.transport, self.key_index))
+        except Exception as e:
+            raise e
+
+    def publishRecords(self, records: dict, max_workers: int = None, skip_unchanged: bool = False):
+        """
+        Publish many IPNS records concurrently, updating the key index.
+
+        :param records: dict, keyName -> CID to point it to
+        :param max_workers: int, concurrent requests (default: the connection pool size)
+        :param skip_unchanged: bool, don't publish keys the key index says already point at their CID
+        :return: generator of {"keyName": ..., "data": ...} or {"keyName": ..., "error": ...} as they complete,
+            skipped ones marked "skipped": True
+        """
+        try:
+            return _changed_keys(self, publish_records(
+                self.token, records, max_workers, self.transport, self.key_index, skip_unchanged
+            ))
+        except Exception as e:
+            raise e
+
+    def removeKeys(self, keyNames, max_workers: int = None):
+        """
+        Remove many IPNS keys concurrently, duplicates removed once.
+
+        :param keyNames: iterable of str, names of the keys to remove
+        :param max_workers: int, concurrent requests (default: the connection pool size)
+        :return: generator of {"keyName": ..., "data": ...} or {"keyName": ..., "error": ...} as they complete
+        """
+        try:
+            return _changed_keys(self, remove_keys(self.token, keyNames, max_workers, self.transport, self.key_index))
         except Exception as e:
             raise e
     
     @staticmethod
-    def createWallet(password: str):
+    def setBandwidthLimit(upload: float = None, download: float = None, burst: float = None):
+        """
+        Limit the bandwidth of every upload and download in the process, across all clients.
+
+        :param upload: float, bytes per second for all uploads together (None: unlimited)
+        :param download: float, bytes per second for all downloads together (None: unlimited)
+        :param burst: float, bytes allowed at once after an idle period (default: one second worth)
+        """
+        set_bandwidth_limit(upload, download, burst)
+
+    @staticmethod
+    def computeCid(source: str):
+        """
+        Compute the CID a file or directory would get once uploaded, without network access.
+
+        :param source: str, path to file or directory
+        :return: dict, Name, Hash and Size as returned by upload
+        """
+        try:
+            return localCid.compute_cid(source)
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    def createWallet(self, password: str):
         """
         Creates a new wallet using the provided password.
 
@@ -122,29 +471,115 @@ class Lighthouse:
         :return: dict, The wallet encrypted with the passowrd
         """
         try:
-            return createWallet.create_wallet(password)
+            return createWallet.create_wallet(password, _transport(self))
         except Exception as e:
             raise e
 
-    @staticmethod
-    def downloadBlob(dist: io.BufferedWriter, cid: str, chunk_size=1024*1024*10):
+    @hybridmethod
+    @_timed
+    def downloadBlob(self, dist: io.BufferedWriter, cid: str, chunk_size=1024*1024*10, connections: int = 1, resume: bool = False, on_progress=None, cancel: CancelToken = None):
         """
         Download a Blob (file or directory) from the Lighthouse.
 
         :param dist: BufferedWriter, destination to write the downloaded data
         :param cid: str, Content Identifier for the data to be downloaded
         :param chunk_size: int, size of chunks in which the file will be downloaded (default: 10MB)
+        :param connections: int, fetch byte ranges of chunk_size over this many connections, dist must be seekable (default: 1)
+        :param resume: bool, continue a partial download already in dist, opened with "r+b" (default: False)
+        :param on_progress: callable, called with a dict of done/total bytes, speed, average and eta
+        :param cancel: CancelToken, abort the download from another thread
         :return: t.Upload, the download result
         """
         if not (hasattr(dist, 'read') and hasattr(dist, 'close')):
             raise TypeError("source must have 'read' and 'close' methods")
         try:
-            return _download.download_file_into_writable(cid, dist, chunk_size)
+            tracker = tracker_for(None, on_progress, cancel)
+            return _finished(tracker, _download.download_file_into_writable(
+                cid, dist, chunk_size, _transport(self), connections, resume, _cache(self), tracker
+            ))
         except Exception as e:
             raise e
             
-    @staticmethod
-    def getDealStatus(cid: str):
+    @hybridmethod
+    @_timed
+    def downloadToPath(self, cid: str, path: str, chunk_size=1024*1024*10, connections: int = 1, on_progress=None, cancel: CancelToken = None):
+        """
+        Download content into a preallocated file, written atomically.
+
+        :param cid: str, Content Identifier for the data to be downloaded
+        :param path: str, destination file path
+        :param chunk_size: int, size of chunks in which the file will be downloaded (default: 10MB)
+        :param connections: int, fetch byte ranges over this many connections (default: 1)
+        :param on_progress: callable, called with a dict of done/total bytes, speed, average and eta
+        :param cancel: CancelToken, abort the download from another thread
+        :return: dict, the download result with the destination path
+        """
+        try:
+            tracker = tracker_for(None, on_progress, cancel)
+            return _finished(tracker, _download.download_to_path(
+                cid, path, chunk_size, _transport(self), connections, _cache(self), tracker
+            ))
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    def iterDownload(self, cid: str, chunk_size: int = 1024*1024, on_progress=None, cancel: CancelToken = None):
+        """
+        Stream content as memoryview chunks read into a reused buffer, without writing it anywhere.
+
+        :param cid: str, Content Identifier for the data to be downloaded
+        :param chunk_size: int, size of the chunks, the last one may be shorter (default: 1MB)
+        :param on_progress: callable, called with a dict of done/total bytes, speed, average and eta
+        :param cancel: CancelToken, abort the download from another thread
+        :return: generator of memoryview, each valid only until the next one is requested
+        """
+        try:
+            tracker = tracker_for(None, on_progress, cancel)
+            return _download.iter_download(cid, chunk_size, _transport(self), _cache(self), tracker)
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    def downloadMany(self, items, max_workers: int = None, per_host: int = None, retries: int = 2, chunk_size=1024*1024):
+        """
+        Download many CIDs to files concurrently.
+
+        :param items: iterable of (cid, path) or (cid, path, priority), higher priorities first
+        :param max_workers: int, downloads running at once (default: the connection pool size)
+        :param per_host: int, downloads running at once against one gateway host (default: max_workers)
+        :param retries: int, extra attempts of a failed download, made from a retry queue with backoff
+        :param chunk_size: int, size of the blocks streamed to disk (default: 1MB)
+        :return: DownloadManager, iterate it to run the downloads and get {"cid", "path", "data"} or
+            {"cid", "path", "error", "attempts"} as they complete; stats() gives the aggregate throughput
+        """
+        try:
+            return DownloadManager(
+                items, max_workers, per_host, retries, chunk_size=chunk_size,
+                transport=_transport(self), cache=_cache(self),
+            )
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    @_timed
+    def downloadMmap(self, cid: str, path: str = None, chunk_size=1024*1024*10, connections: int = 1):
+        """
+        Download content to disk and return it memory-mapped, without a copy in the Python heap.
+
+        :param cid: str, Content Identifier for the data to be downloaded
+        :param path: str, keep the content at this path (default: unlinked temporary file)
+        :param chunk_size: int, size of chunks in which the file will be downloaded (default: 10MB)
+        :param connections: int, fetch byte ranges over this many connections (default: 1)
+        :return: mmap.mmap, read-only mapping of the content, wrap it in memoryview to slice without copies
+        """
+        try:
+            return _download.download_mmap(cid, path, chunk_size, _transport(self), connections, _cache(self))
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    @_timed
+    def getDealStatus(self, cid: str):
         """
         Get deal status from the Lighthouse.
 
@@ -152,10 +587,27 @@ class Lighthouse:
         :return: List[t.DealData], list of deal data
         """
         try:
-            return deal_status.get_deal_status(cid)
+            return _deal_status(self, cid)
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    def getDealStatusMany(self, cids, max_workers: int = None):
+        """
+        Get the deal status of many CIDs concurrently, duplicates looked up once.
+
+        :param cids: iterable of str, content identifiers
+        :param max_workers: int, concurrent lookups (default: the connection pool size)
+        :return: generator of {"cid": ..., "data": ...} or {"cid": ..., "error": ...} as they complete
+        """
+        try:
+            return deal_status.get_deal_status_many(
+                cids, max_workers, _transport(self), lambda cid: _deal_status(self, cid)
+            )
         except Exception as e:
             raise e
     
+    @_timed
     def getUploads(self, lastKey: str = None):
         """
         Get uploads from the Lighthouse.
@@ -164,12 +616,22 @@ class Lighthouse:
         :return: List[t.DealData], list of deal data
         """
         try:
-            return getUploads.get_uploads(self.token, lastKey)
+            return getUploads.get_uploads(self.token, lastKey, self.transport)
         except Exception as e:
             raise e
 
-    @staticmethod
-    def download(cid: str):
+    def iterUploads(self, lastKey: str = None):
+        """
+        Iterate over every upload, fetching pages lazily with the next page prefetched.
+
+        :param lastKey: start after this upload id
+        :return: generator of upload records
+        """
+        return getUploads.iter_uploads(self.token, lastKey, self.transport)
+
+    @hybridmethod
+    @_timed
+    def download(self, cid: str):
         """
         Download content from the Lighthouse using its Content Identifier (CID).
 
@@ -178,12 +640,13 @@ class Lighthouse:
         :return: bytes, the downloaded content
         """
         try:
-            return _download.get_file(cid)
+            return _download.get_file(cid, _transport(self), _cache(self))
         except Exception as e:
             raise e
     
-    @staticmethod
-    def getFileInfo(cid: str):
+    @hybridmethod
+    @_timed
+    def getFileInfo(self, cid: str):
         """
         Retrieves information about a file using its CID (Content Identifier).
 
@@ -192,12 +655,29 @@ class Lighthouse:
         """
 
         try:
-            return getFileInfo.get_file_info(cid)
+            return _file_info(self, cid)
+        except Exception as e:
+            raise e
+
+    @hybridmethod
+    def getFileInfoMany(self, cids, max_workers: int = None):
+        """
+        Retrieve information about many files concurrently, duplicates looked up once.
+
+        :param cids: iterable of str, content identifiers
+        :param max_workers: int, concurrent lookups (default: the connection pool size)
+        :return: generator of {"cid": ..., "data": ...} or {"cid": ..., "error": ...} as they complete
+        """
+        try:
+            return getFileInfo.get_file_info_many(
+                cids, max_workers, _transport(self), lambda cid: _file_info(self, cid)
+            )
         except Exception as e:
             raise e
     
-    @staticmethod
-    def getApiKey(publicKey: str, signedMessage: str):
+    @hybridmethod
+    @_timed
+    def getApiKey(self, publicKey: str, signedMessage: str):
         """
         Generates and returns an API key for the given public key and signed message.
 
@@ -208,10 +688,11 @@ class Lighthouse:
 
 
         try:
-            return getApiKey.get_api_key(publicKey, signedMessage)
+            return getApiKey.get_api_key(publicKey, signedMessage, _transport(self))
         except Exception as e:
             raise e
 
+    @_timed
     def getTagged(self, tag: str):
         """
         Retrieve an upload from the Lighthouse using its tag.
@@ -220,7 +701,207 @@ class Lighthouse:
         :return: t.Upload, the upload result
         """
         try:
-            return _download.getTaggedCid(tag, self.token)
+            return _cached(self, "tagged", (self.token, tag), lambda: _download.getTaggedCid(tag, self.token, self.transport))
         except Exception as e:
             raise e
 
+
+class AsyncLighthouse:
+    """asyncio client mirroring Lighthouse; every method is a coroutine"""
+
+    def __init__(
+        self,
+        token: str = "",
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        transport: "async_transport.AsyncTransport" = None,
+        retry: RetryPolicy = None,
+        rate_limit: HostRateLimiter = None,
+        metrics: Metrics = None,
+        gateways=None,
+    ):
+        """
+        :param token: str, lighthouse api token (default: LIGHTHOUSE_TOKEN env variable)
+        :param max_concurrency: int, maximum requests in flight at once
+        :param pool_size: int, keep-alive connections kept per host
+        :param timeout: float or (connect, read) tuple applied to every request
+        :param transport: AsyncTransport, share an existing transport instead of creating one
+        :param retry: RetryPolicy, backoff and retry budget of the transport (default: 3 retries, False to disable)
+        :param rate_limit: HostRateLimiter, requests per second allowed per host (default: unlimited)
+        :param metrics: Metrics, registry of request latencies, bytes and retries (default: a new one)
+        :param gateways: list of gateway urls or GatewayPool, downloads use the best ranked (default: Config.lighthouse_gateway)
+        """
+        self.token = token or os.environ.get("LIGHTHOUSE_TOKEN", "")
+        if not self.token:
+            raise Exception(
+                "No token provided: Please provide a token or set the LIGHTHOUSE_TOKEN environment variable"
+            )
+        if metrics is None:
+            metrics = transport.metrics if transport is not None and transport.metrics is not None else Metrics()
+        self.metrics = metrics
+        self.transport = transport or async_transport.AsyncTransport(
+            max_concurrency=max_concurrency, pool_size=pool_size, timeout=timeout,
+            retry=retry, rate_limit=rate_limit, metrics=metrics, gateways=_gateway_pool(gateways),
+        )
+        self.gateways = self.transport.gateways
+
+    async def close(self):
+        """Close the pooled connections held by this client"""
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def upload(self, source: str, tag: str = ''):
+        """
+        Upload a file or directory to the Lighthouse.
+
+        :param source: str, path to file or directory
+        :return: t.Upload, the upload result
+        """
+        return await async_api.upload(source, self.token, tag, self.transport)
+
+    async def uploadBlob(self, source: io.BufferedReader, filename: str, tag: str = ''):
+        """
+        Upload Blob a file or directory to the Lighthouse.
+
+        :param source: BufferedReader, readable object to upload
+        :return: t.Upload, the upload result
+        """
+        if not (hasattr(source, 'read') and hasattr(source, 'close')):
+            raise TypeError("source must have 'read' and 'close' methods")
+        return await async_api.upload_blob(source, filename, self.token, tag, self.transport)
+
+    async def getBalance(self):
+        """
+        Retrieve the balance information of a user from the Lighthouse.
+
+        :return: dict[str, any], A dictionary containing the data usage and data limit details.
+        """
+        return await async_api.get_balance(self.token, self.transport)
+
+    async def generateKey(self):
+        """
+        Generate a new IPNS key for the authenticated user.
+
+        :return: dict, The generated IPNS key information.
+        """
+        return await async_api.ipns_generate_key(self.token, self.transport)
+
+    async def publishRecord(self, cid: str, keyName: str):
+        """
+        Publish an IPNS record for a given CID and key name.
+
+        :param cid: str, Content Identifier to publish
+        :param keyName: str, Name of the IPNS key to use
+        :return: dict, The published IPNS record information
+        """
+        return await async_api.ipns_publish_record(self.token, cid, keyName, self.transport)
+
+    async def getAllKeys(self):
+        """
+        Retrieves all IPNS records associated with the current token.
+
+        :return: list A list of IPNS records retrieved using the provided token.
+        """
+        return await async_api.get_ipns_records(self.token, self.transport)
+
+    async def removeKey(self, keyName: str):
+        """
+        Remove IPNS record of the given keyName
+
+        :param keyName: str, Name of the IPNS key to use
+        :return: dict, A dict of removed IPNS record.
+        """
+        return await async_api.remove_ipns_record(self.token, keyName, self.transport)
+
+    async def downloadBlob(self, dist: io.BufferedWriter, cid: str, chunk_size=1024*1024*10):
+        """
+        Download a Blob (file or directory) from the Lighthouse.
+
+        :param dist: BufferedWriter, destination to write the downloaded data
+        :param cid: str, Content Identifier for the data to be downloaded
+        :param chunk_size: int, size of chunks in which the file will be downloaded (default: 10MB)
+        :return: t.Upload, the download result
+        """
+        if not (hasattr(dist, 'read') and hasattr(dist, 'close')):
+            raise TypeError("source must have 'read' and 'close' methods")
+        return await async_api.download_file_into_writable(cid, dist, chunk_size, self.transport)
+
+    async def getDealStatus(self, cid: str):
+        """
+        Get deal status from the Lighthouse.
+
+        :param cid: str, content identifier
+        :return: List[t.DealData], list of deal data
+        """
+        return await async_api.get_deal_status(cid, self.transport)
+
+    async def getUploads(self, lastKey: str = None):
+        """
+        Get uploads from the Lighthouse.
+
+        :param lastKey: To navigate to different pages of results
+        :return: List[t.DealData], list of deal data
+        """
+        return await async_api.get_uploads(self.token, lastKey, self.transport)
+
+    def iterUploads(self, lastKey: str = None):
+        """
+        Iterate over every upload, fetching pages lazily with the next page prefetched.
+
+        :param lastKey: start after this upload id
+        :return: async generator of upload records
+        """
+        return async_api.iter_uploads(self.token, lastKey, self.transport)
+
+    def iterDownload(self, cid: str, chunk_size: int = 1024*1024):
+        """
+        Stream content as memoryview chunks packed into a reused buffer.
+
+        :param cid: str, Content Identifier for the data to be downloaded
+        :param chunk_size: int, size of the chunks, the last one may be shorter (default: 1MB)
+        :return: async generator of memoryview, each valid only until the next one is requested
+        """
+        return async_api.iter_download(cid, chunk_size, self.transport)
+
+    async def download(self, cid: str):
+        """
+        Download content from the Lighthouse using its Content Identifier (CID).
+
+        :param cid: str, Content Identifier for the data to be downloaded
+        :return: bytes, the downloaded content
+        """
+        return await async_api.get_file(cid, self.transport)
+
+    async def getFileInfo(self, cid: str):
+        """
+        Retrieves information about a file using its CID (Content Identifier).
+
+        :param cid: str, Content Identifier for the data to be downloaded
+        :return: dict, A dictionary containing file information.
+        """
+        return await async_api.get_file_info(cid, self.transport)
+
+    async def getApiKey(self, publicKey: str, signedMessage: str):
+        """
+        Generates and returns an API key for the given public key and signed message.
+
+        :param publicKey: str, The public key associated with the user.
+        :param signedMessage: str, The message signed by the user's private key.
+        :return: dict, A dict with generated API key.
+        """
+        return await async_api.get_api_key(publicKey, signedMessage, self.transport)
+
+    async def getTagged(self, tag: str):
+        """
+        Retrieve an upload from the Lighthouse using its tag.
+
+        :param tag: str, tag associated with the file or directory
+        :return: t.Upload, the upload result
+        """
+        return await async_api.get_tagged_cid(tag, self.token, self.transport)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+import asyncio
+import io
+import json
+import warnings
+from .async_transport import AsyncTransport
+from .bandwidth import get_bandwidth_limiter
+from .buffer_pool import BufferPool, get_buffer_pool
+from .config import Config
+from .multipart import MultipartEncoder
+from . import utils
+
+
+def _auth(token: str):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _upload_headers(token: str):
+    return {
+        "Authorization": f"Bearer {token}",
+        "Encryption": "false",
+        "Mime-Type": "application/octet-stream",
+    }
+
+
+def _parse_add_response(response):
+    try:
+        return response.json()
+    except Exception:
+        temp = response.text.split("\n")
+        return json.loads(temp[len(temp) - 2])
+
+
+async def _multipart_body(encoder: MultipartEncoder):
+    """stream a MultipartEncoder as an aiohttp request body, paced by the upload bandwidth limit"""
+    limiter = get_bandwidth_limiter()
+    for chunk in encoder:
+        wait = limiter.upload.reserve(len(chunk))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        yield chunk
+
+
+async def _post_multipart(transport: AsyncTransport, parts, headers):
+    """
+    POST parts to /api/v0/add as a streamed multipart body; path sources
+    are opened one at a time while the body is sent, like the sync upload
+    """
+    encoder = MultipartEncoder(parts, throttle=False)
+    headers = dict(headers, **{"Content-Type": encoder.content_type})
+    if encoder.len is not None:
+        headers["Content-Length"] = str(encoder.len)
+    try:
+        response = await transport.post(
+            Config.lighthouse_node + "/api/v0/add", data=_multipart_body(encoder), headers=headers
+        )
+    finally:
+        encoder.close()
+    response.raise_for_status()
+    return _parse_add_response(response)
+
+
+async def _create_tag(transport: AsyncTransport, token: str, tag: str, cid: str):
+    response = await transport.post(
+        Config.lighthouse_api + "/api/user/create_tag",
+        data={"tag": tag, "cid": cid},
+        headers=_auth(token),
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def upload(source, token: str, tag: str, transport: AsyncTransport):
+    if isinstance(source, str):
+        if utils.is_dir(source):
+            file_list, root = utils.walk_dir_tree(source)
+            file_dict = {"files": file_list, "is_dir": True, "path": root}
+        else:
+            file_dict = {"files": [source], "is_dir": False, "path": source}
+        hashData = await _post_multipart(transport, utils.parts_for_upload(file_dict), _upload_headers(token))
+    else:
+        hashData = await upload_blob_data(source, source.name, token, transport)
+    if len(tag):
+        await _create_tag(transport, token, tag, hashData.get("Hash"))
+    return {"data": hashData}
+
+
+async def upload_blob_data(source, filename: str, token: str, transport: AsyncTransport):
+    parts = [("file", utils.extract_file_name(filename), source, "application/octet-stream")]
+    try:
+        return await _post_multipart(transport, parts, _upload_headers(token))
+    finally:
+        source.close()
+
+
+async def upload_blob(source, filename: str, token: str, tag: str, transport: AsyncTransport):
+    hashData = await upload_blob_data(source, filename, token, transport)
+    if len(tag):
+        await _create_tag(transport, token, tag, hashData.get("Hash"))
+    return {"data": hashData}
+
+
+async def download_file_into_writable(
+    cid: str, writable_object: io.BufferedWriter, chunk_size: int, transport: AsyncTransport
+):
+    url = transport.gateways.url(cid)
+    async for chunk in transport.iter_content(url, chunk_size):
+        writable_object.write(chunk)
+    return {"data": {"Hash": cid, "Size": writable_object.tell()}}
+
+
+async def iter_download(cid: str, chunk_size: int, transport: AsyncTransport, pool: BufferPool = None):
+    """
+    Async counterpart of download.iter_download: memoryview chunks of
+    chunk_size bytes from a pooled buffer, each valid until the next one.
+    aiohttp hands the body over as bytes, which are packed into the buffer.
+    """
+    pool = pool or get_buffer_pool()
+    buffer = pool.acquire(chunk_size)
+    view = memoryview(buffer)
+    filled = 0
+    try:
+        async for data in transport.iter_content(transport.gateways.url(cid), chunk_size):
+            data = memoryview(data)
+            while data:
+                count = min(len(data), chunk_size - filled)
+                view[filled:filled + count] = data[:count]
+                filled += count
+                data = data[count:]
+                if filled == chunk_size:
+                    yield view
+                    filled = 0
+        if filled:
+            yield view[:filled]
+    finally:
+        pool.release(buffer)
+
+
+async def get_file(cid: str, transport: AsyncTransport):
+    response = await transport.get(transport.gateways.url(cid), stream=True)
+    response.raise_for_status()
+    if int(response.headers.get("Content-Length", len(response.content))) > 1024*1024*1024*2:
+        warnings.warn(
+            "This content of the file is grater then 2GB, use `downloadBlob` instead", UserWarning)
+    return (response.content, response.headers.get("Content-Type"))
+
+
+async def get_tagged_cid(tag: str, token: str, transport: AsyncTransport):
+    response = await transport.get(
+        f"{Config.lighthouse_api}/api/user/get_tag_details?tag={tag}", headers=_auth(token)
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def get_deal_status(cid: str, transport: AsyncTransport):
+    response = await transport.get(
+        f"{Config.lighthouse_api}/api/lighthouse/deal_status?cid={cid}"
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def get_uploads(token: str, lastKey: str, transport: AsyncTransport):
+    response = await transport.get(
+        f"{Config.lighthouse_api}/api/user/files_uploaded?lastKey={lastKey}",
+        headers=_auth(token),
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def iter_uploads(token: str, lastKey: str, transport: AsyncTransport):
+    """async generator of every upload record, prefetching the next page"""
+    task = asyncio.ensure_future(get_uploads(token, lastKey, transport))
+    seen = 0
+    try:
+        while task is not None:
+            page = await task
+            file_list = page.get("fileList") or []
+            seen += len(file_list)
+            total = page.get("totalFiles")
+            if not file_list or (isinstance(total, int) and seen >= total):
+                task = None
+            else:
+                task = asyncio.ensure_future(get_uploads(token, file_list[-1]["id"], transport))
+            for upload in file_list:
+                yield upload
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def get_file_info(cid: str, transport: AsyncTransport):
+    try:
+        response = await transport.get(
+            f"{Config.lighthouse_api}/api/lighthouse/file_info?cid={cid}"
+        )
+    except Exception:
+        raise Exception("Failed to get file metadata")
+    response.raise_for_status()
+    return response.json()
+
+
+async def get_balance(token: str, transport: AsyncTransport):
+    try:
+        response = await transport.get(
+            f"{Config.lighthouse_api}/api/user/user_data_usage", headers=_auth(token)
+        )
+    except Exception:
+        raise Exception("Failed to get account balance")
+    response.raise_for_status()
+    return response.json()
+
+
+async def _ipns_call(method: str, url: str, token: str, error: str, transport: AsyncTransport, **kwargs):
+    try:
+        response = await transport.request(method, url, headers=_auth(token), **kwargs)
+    except Exception:
+        raise Exception(error)
+    if response.status_code != 200:
+        return response.json()
+    return {"data": response.json()}
+
+
+async def ipns_generate_key(token: str, transport: AsyncTransport):
+    return await _ipns_call(
+        "GET", f"{Config.lighthouse_api}/api/ipns/generate_key",
+        token, "Failed to ipns generate key", transport,
+        # not retried: a key may have been created even when the answer failed
+        retry=False,
+    )
+
+
+async def ipns_publish_record(token: str, cid: str, keyName: str, transport: AsyncTransport):
+    return await _ipns_call(
+        "GET", f"{Config.lighthouse_api}/api/ipns/publish_record?cid={cid}&keyName={keyName}",
+        token, "Failed to ipns publish record", transport,
+    )
+
+
+async def get_ipns_records(token: str, transport: AsyncTransport):
+    return await _ipns_call(
+        "GET", f"{Config.lighthouse_api}/api/ipns/get_ipns_records",
+        token, "Failed to get ipns records", transport,
+    )
+
+
+async def remove_ipns_record(token: str, keyName: str, transport: AsyncTransport):
+    return await _ipns_call(
+        "DELETE", f"{Config.lighthouse_api}/api/ipns/remove_key?keyName={keyName}",
+        token, "Failed to remove ipns record", transport,
+    )
+
+
+async def get_api_key(publicKey: str, signedMessage: str, transport: AsyncTransport):
+    try:
+        response = await transport.post(
+            f"{Config.lighthouse_api}/api/auth/create_api_key",
+            data={"publicKey": publicKey, "signedMessage": signedMessage},
+        )
+    except Exception:
+        raise Exception("Failed to create api key")
+    if response.status_code != 200:
+        return response.json()
+    return {"data": {"apiKey": response.json()}}
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import time
+from .bandwidth import get_bandwidth_limiter
+from .gateways import GatewayPool
+from .metrics import Metrics, endpoint_of
+from .rate_limit import HostRateLimiter
+from .retry import RetryPolicy, parse_retry_after, replayable
+from .transport import DEFAULT_MAX_CONCURRENCY, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT, body_size
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+    except ImportError:
+        raise ImportError(
+            "AsyncLighthouse requires aiohttp: pip install lighthouseweb3[async]"
+        )
+    return aiohttp
+
+
+class AsyncResponse:
+    """Fully read response returned by AsyncTransport.request"""
+
+    def __init__(self, status_code: int, headers, content: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(self.text)
+
+
+class AsyncTransport:
+    """
+    asyncio counterpart of Transport, backed by a pooled aiohttp session.
+
+    At most max_concurrency requests are in flight at once; the others wait
+    on a semaphore instead of opening more connections. Retries and rate
+    limiting follow the same policies as Transport.
+
+    The session and semaphore belong to the event loop that first uses
+    them; when the transport is used from another loop (a later
+    asyncio.run) they are created again for it.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        retry: RetryPolicy = None,
+        rate_limit: HostRateLimiter = None,
+        metrics: Metrics = None,
+        gateways: GatewayPool = None,
+    ):
+        """
+        :param max_concurrency: int, maximum requests in flight at once
+        :param pool_size: int, maximum keep-alive connections per host
+        :param timeout: float or (connect, read) tuple applied to every request
+        :param retry: RetryPolicy, backoff and retry budget (default: 3 retries, False to disable)
+        :param rate_limit: HostRateLimiter, requests per second allowed per host (default: unlimited)
+        :param metrics: Metrics, registry recording latency and bytes of every request (default: disabled)
+        :param gateways: GatewayPool, gateways content is downloaded from, the best ranked is used (default: Config.lighthouse_gateway)
+        """
+        self.aiohttp = _import_aiohttp()
+        self.gateways = gateways or GatewayPool()
+        self.max_concurrency = max_concurrency
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retry = RetryPolicy() if retry is None else (retry or None)
+        self.rate_limit = rate_limit
+        self.metrics = metrics
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    def _client_timeout(self):
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            return self.aiohttp.ClientTimeout(connect=connect, sock_read=read)
+        return self.aiohttp.ClientTimeout(total=self.timeout)
+
+    def _ensure_session(self):
+        # created lazily so they bind to the running event loop
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            self._abandon_session()
+        if self._session is None:
+            self._loop = loop
+            connector = self.aiohttp.TCPConnector(
+                limit=0, limit_per_host=self.pool_size
+            )
+            self._session = self.aiohttp.ClientSession(
+                connector=connector, timeout=self._client_timeout()
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def _abandon_session(self) -> None:
+        # the session's loop has ended or runs in another thread, so its
+        # connections can't be awaited closed from here; drop them unused
+        connector = self._session.connector
+        self._session.detach()
+        self._session = None
+        if connector is not None and self._loop.is_closed():
+            connector._close()
+
+    async def _send(self, method: str, url: str, stream: bool = False, **kwargs) -> AsyncResponse:
+        """:param stream: bool, read the body in chunks paced by the download bandwidth limit"""
+        session = self._ensure_session()
+        if self.rate_limit is not None:
+            wait = self.rate_limit.reserve(url)
+            if wait > 0:
+                await asyncio.sleep(wait)
+        async with self._semaphore:
+            start = time.monotonic()
+            try:
+                async with session.request(method, url, **kwargs) as r:
+                    if stream and r.status < 400:
+                        # a streamed body is counted as it is read
+                        content = b"".join([chunk async for chunk in self._throttled(r, url, 1024*1024)])
+                    else:
+                        content = await r.read()
+            except Exception:
+                if self.metrics is not None:
+                    self.metrics.observe_request(method, url, None, time.monotonic() - start)
+                raise
+            if self.metrics is not None:
+                self.metrics.observe_request(
+                    method, url, r.status, time.monotonic() - start,
+                    body_size(kwargs.get("data")), 0 if stream and r.status < 400 else len(content),
+                )
+            return AsyncResponse(r.status, r.headers, content)
+
+    async def _throttled(self, r, url: str, chunk_size: int):
+        """body chunks of r, paced by the download bandwidth limit and counted"""
+        limiter = get_bandwidth_limiter()
+        async for chunk in r.content.iter_chunked(limiter.download_read_size(chunk_size)):
+            wait = limiter.download.reserve(len(chunk))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if self.metrics is not None:
+                self.metrics.received(url, len(chunk))
+            yield chunk
+
+    async def request(self, method: str, url: str, **kwargs) -> AsyncResponse:
+        # per-call override of the retry policy, False disables it
+        retry = kwargs.pop("retry", self.retry) or None
+        can_replay = replayable(kwargs)
+        if retry is not None:
+            retry.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                r = await self._send(method, url, **kwargs)
+            except (self.aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                connect_error = isinstance(e, self.aiohttp.ClientConnectorError)
+                if retry is None or not retry.retry_error(method, attempt, can_replay, connect_error):
+                    raise
+                self._retried(url)
+                await asyncio.sleep(retry.delay(attempt))
+                attempt += 1
+                continue
+            if retry is None or not retry.retry_status(method, r.status_code, attempt, can_replay):
+                return r
+            delay = retry.delay(attempt, parse_retry_after(r.headers.get("Retry-After")))
+            if r.status_code == 429 and self.rate_limit is not None:
+                self.rate_limit.pause(url, delay)
+            self._retried(url)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _retried(self, url: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc("retries", 1, endpoint=endpoint_of(url))
+
+    async def get(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("DELETE", url, **kwargs)
+
+    async def iter_content(self, url: str, chunk_size: int, **kwargs):
+        """
+        Stream a GET response body in chunks of at most chunk_size bytes.
+
+        The request is rate limited and retried like any other until the
+        response is accepted; once the body has started it is not retried.
+        """
+        session = self._ensure_session()
+        retry = self.retry
+        if retry is not None:
+            retry.budget.deposit()
+        attempt = 0
+        while True:
+            if self.rate_limit is not None:
+                wait = self.rate_limit.reserve(url)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            async with self._semaphore:
+                start = time.monotonic()
+                try:
+                    r = await session.get(url, **kwargs)
+                except (self.aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if self.metrics is not None:
+                        self.metrics.observe_request("GET", url, None, time.monotonic() - start)
+                    connect_error = isinstance(e, self.aiohttp.ClientConnectorError)
+                    if retry is None or not retry.retry_error("GET", attempt, True, connect_error):
+                        raise
+                    delay = retry.delay(attempt)
+                else:
+                    async with r:
+                        if self.metrics is not None:
+                            # time to the response headers, the body is counted as it streams
+                            self.metrics.observe_request("GET", url, r.status, time.monotonic() - start)
+                        if retry is None or not retry.retry_status("GET", r.status, attempt, True):
+                            if r.status >= 400:
+                                raise Exception(await r.text())
+                            async for chunk in self._throttled(r, url, chunk_size):
+                                yield chunk
+                            return
+                        delay = retry.delay(attempt, parse_retry_after(r.headers.get("Retry-After")))
+                        if r.status == 429 and self.rate_limit is not None:
+                            self.rate_limit.pause(url, delay)
+            self._retried(url)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def close(self) -> None:
+        if self._session is not None:
+            if self._loop is asyncio.get_running_loop():
+                await self._session.close()
+                self._session = None
+            else:
+                self._abandon_session()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
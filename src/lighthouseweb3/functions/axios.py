@@ -2,15 +2,17 @@
 
 from io import BufferedReader
 import json
-import requests as req
 from . import utils
+from .multipart import MultipartEncoder
+from .transport import Transport, get_default_transport
 
 
 class Axios:
     """It's not axios, it's just a custom extensible wrapper for requests"""
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, transport: Transport = None):
         self.url = url
+        self.transport = transport or get_default_transport()
 
     def parse_url_query(self, query):
         try:
@@ -23,7 +25,7 @@ class Axios:
     def get(self, headers = None, **kwargs) :
         try:
             self.parse_url_query(kwargs.get("query", None))
-            r = req.get(self.url, headers=headers)
+            r = self.transport.get(self.url, headers=headers)
             r.raise_for_status()
             return r.json()
         except Exception as e:
@@ -34,51 +36,57 @@ class Axios:
     ):
         try:
             self.parse_url_query(kwargs.get("query", None))
-            r = req.post(self.url, data=body, headers=headers)
+            r = self.transport.post(self.url, data=body, headers=headers)
             r.raise_for_status()
             return r.json()
         except Exception as e:
             raise e
 
     def post_files(
-        self, file, headers = None, **kwargs
+        self, file, headers = None, tracker = None, **kwargs
     ) :
+        encoder = MultipartEncoder(utils.parts_for_upload(file), tracker=tracker)
         try:
             self.parse_url_query(kwargs.get("query", None))
-            files = utils.read_files_for_upload(file)
-            r = req.post(self.url, headers=headers, files=files)
-            r.raise_for_status()
-            utils.close_files_after_upload(files)
-            try:
-                return r.json()
-            except Exception:
-                temp = r.text.split("\n")
-                return json.loads(temp[len(temp) - 2])
-        except Exception as e:
-            utils.close_files_after_upload(files)
-            raise e
+            r = self.post_multipart(encoder, headers)
+            return self.parse_add_response(r)
+        finally:
+            encoder.close()
 
     def post_blob(
-        self, file: BufferedReader, filename: str, headers = None, **kwargs
+        self, file: BufferedReader, filename: str, headers = None, tracker = None, **kwargs
     ) :
         try:
             self.parse_url_query(kwargs.get("query", None))
-            files = [(
+            encoder = MultipartEncoder([(
                 "file",
-                (
-                    utils.extract_file_name(filename),
-                    file.read(),
-                    "application/octet-stream",
-                ),
-            ),]
-            r = req.post(self.url, headers=headers, files=files)
-            r.raise_for_status()
-            file.close()
-            try:
-                return r.json()
-            except Exception:
-                temp = r.text.split("\n")
-                return json.loads(temp[len(temp) - 2])
-        except Exception as e:
+                utils.extract_file_name(filename),
+                file,
+                "application/octet-stream",
+            )], tracker=tracker)
+            r = self.post_multipart(encoder, headers)
+            return self.parse_add_response(r)
+        finally:
             file.close()
-            raise e
+
+    @staticmethod
+    def parse_add_response(r):
+        """/api/v0/add answers with one json line per entry, the root is last"""
+        try:
+            return r.json()
+        except Exception:
+            temp = r.text.split("\n")
+            return json.loads(temp[len(temp) - 2])
+
+    @staticmethod
+    def parse_add_entries(r):
+        """every json line of an /api/v0/add answer"""
+        return [json.loads(line) for line in r.text.split("\n") if line.strip()]
+
+    def post_multipart(self, encoder: MultipartEncoder, headers = None):
+        """stream a multipart body, sent chunked when its length is unknown"""
+        headers = dict(headers or {})
+        headers["Content-Type"] = encoder.content_type
+        r = self.transport.post(self.url, headers=headers, data=encoder)
+        r.raise_for_status()
+        return r
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import threading
+from .rate_limit import TokenBucket
+
+
+# read granularity of throttled downloads, so a large chunk_size doesn't arrive as one burst
+THROTTLED_READ_SIZE = 1024*64
+
+
+class BandwidthLimiter:
+    """
+    Upload and download byte budgets shared by every transfer of the process.
+
+    Each direction is a TokenBucket of bytes per second; transfers take
+    tokens for every chunk they stream and sleep when the bucket is empty,
+    so the limit holds however many transfers run at once. Limits can be
+    changed or lifted (None) at any time.
+    """
+
+    def __init__(self, upload: float = None, download: float = None, burst: float = None):
+        """
+        :param upload: float, bytes per second for all uploads together (None: unlimited)
+        :param download: float, bytes per second for all downloads together (None: unlimited)
+        :param burst: float, bytes allowed at once after an idle period (default: one second worth)
+        """
+        self.upload = TokenBucket(upload, burst)
+        self.download = TokenBucket(download, burst)
+
+    def set_limits(self, upload: float = None, download: float = None, burst: float = None) -> None:
+        self.upload.set_rate(upload, burst)
+        self.download.set_rate(download, burst)
+
+    @property
+    def limits(self) -> dict:
+        return {"upload": self.upload.rate, "download": self.download.rate}
+
+    def throttle_upload(self, count: int) -> None:
+        self.upload.acquire(count)
+
+    def throttle_download(self, count: int) -> None:
+        self.download.acquire(count)
+
+    def download_read_size(self, chunk_size: int) -> int:
+        if self.download.rate:
+            return min(chunk_size, THROTTLED_READ_SIZE)
+        return chunk_size
+
+
+_limiter = BandwidthLimiter()
+_limiter_lock = threading.Lock()
+
+
+def get_bandwidth_limiter() -> BandwidthLimiter:
+    return _limiter
+
+
+def set_bandwidth_limit(upload: float = None, download: float = None, burst: float = None) -> None:
+    """limit the bytes per second of every upload and download in the process; None lifts a limit"""
+    with _limiter_lock:
+        _limiter.set_limits(upload, download, burst)
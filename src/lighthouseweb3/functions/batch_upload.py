@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from .axios import Axios
+from .config import Config
+from .multipart import MultipartEncoder
+from .transport import Transport
+from .unixfs import Block, build_directory_tree, cid_multihash
+from .utils import walk_dir_tree, extract_file_name_with_source
+
+
+DEFAULT_SHARD_BYTES = 1024*1024*256
+DEFAULT_SHARD_FILES = 1000
+DEFAULT_WORKERS = 4
+
+
+class BatchUploadError(Exception):
+    """raised when some shards still fail after their retries"""
+
+    def __init__(self, message: str, shards: list):
+        super().__init__(message)
+        self.shards = shards
+
+
+def _headers(token: str):
+    return {
+        "Authorization": f"Bearer {token}",
+        "Encryption": "false",
+        "Mime-Type": "application/octet-stream",
+    }
+
+
+def plan_shards(files, max_shard_bytes: int = DEFAULT_SHARD_BYTES, max_shard_files: int = DEFAULT_SHARD_FILES):
+    """
+    Split files into shards bounded by total size and file count.
+
+    :param files: list of (name, path, size), in upload order
+    :return: list of shards, each a list of (name, path, size)
+    """
+    shards = []
+    current, current_bytes = [], 0
+    for name, path, size in files:
+        if current and (
+            current_bytes + size > max_shard_bytes or len(current) >= max_shard_files
+        ):
+            shards.append(current)
+            current, current_bytes = [], 0
+        current.append((name, path, size))
+        current_bytes += size
+    if current:
+        shards.append(current)
+    return shards
+
+
+def upload_shard(index: int, shard, token: str, retries: int = 2, transport: Transport = None):
+    """
+    Upload one shard, retrying it on its own so a failure doesn't cost the batch.
+
+    Only failed requests are retried; an answer that lacks an entry for one
+    of the shard's files fails the shard at once.
+
+    :return: dict, shard report with the CID and cumulative size of every file
+    """
+    shard_bytes = sum(size for _, _, size in shard)
+    report = {"index": index, "files": len(shard), "bytes": shard_bytes, "attempts": 0}
+    axios = Axios(Config.lighthouse_node + "/api/v0/add", transport)
+    for attempt in range(retries + 1):
+        report["attempts"] = attempt + 1
+        encoder = MultipartEncoder([
+            ("file", name, path, "application/octet-stream") for name, path, _ in shard
+        ])
+        start = time.monotonic()
+        try:
+            r = axios.post_multipart(encoder, _headers(token))
+        except requests.RequestException as e:
+            # only a failed request is worth sending the shard again
+            report["error"] = str(e)
+            continue
+        finally:
+            encoder.close()
+        try:
+            entries = {entry.get("Name"): entry for entry in axios.parse_add_entries(r)}
+        except ValueError as e:
+            report["error"] = f"Unreadable add response for shard {index}: {e}"
+            return report
+        missing = [name for name, _, _ in shard if name not in entries]
+        if missing:
+            # the node stored the files under other names, resending can't fix that
+            report["error"] = f"Add response for shard {index} has no entry for {', '.join(missing[:5])}" + (
+                f" and {len(missing) - 5} more" if len(missing) > 5 else ""
+            )
+            return report
+        report["entries"] = {
+            name: (entries[name]["Hash"], int(entries[name]["Size"]))
+            for name, _, _ in shard
+        }
+        seconds = time.monotonic() - start
+        report.pop("error", None)
+        report["seconds"] = seconds
+        report["throughput"] = shard_bytes / seconds if seconds else float(shard_bytes)
+        return report
+    return report
+
+
+def put_block(block: Block, token: str, transport: Transport = None):
+    """store a locally built dag-pb block on the upload node"""
+    axios = Axios(
+        Config.lighthouse_node
+        + "/api/v0/block/put?cid-codec=dag-pb&mhtype=sha2-256&pin=true",
+        transport,
+    )
+    encoder = MultipartEncoder([
+        ("file", "block", io.BytesIO(block.data), "application/octet-stream")
+    ])
+    r = axios.post_multipart(encoder, {"Authorization": f"Bearer {token}"})
+    key = r.json().get("Key", "")
+    if cid_multihash(key) != cid_multihash(block.cid):
+        raise Exception(f"Node stored {key} instead of {block.cid}")
+    return block.cid
+
+
+def upload_batch(
+    source: str,
+    token: str,
+    tag: str = "",
+    max_shard_bytes: int = DEFAULT_SHARD_BYTES,
+    max_shard_files: int = DEFAULT_SHARD_FILES,
+    max_workers: int = DEFAULT_WORKERS,
+    retries: int = 2,
+    transport: Transport = None,
+):
+    """
+    Upload a directory as concurrent shards and stitch them into one root CID.
+
+    Each shard is an /api/v0/add of a bounded group of files. Once every
+    shard is stored, the directory nodes linking the files are built
+    locally and put on the node, giving the same single directory CID a
+    plain upload would.
+
+    @params {source}: str, path to a directory
+    @params {token}: str, lighthouse api token
+    @params {max_shard_bytes}: int, maximum total file size per shard
+    @params {max_shard_files}: int, maximum number of files per shard
+    @params {max_workers}: int, shards uploaded at the same time
+    @params {retries}: int, extra attempts for a failing shard
+    """
+    file_list, root = walk_dir_tree(source)
+    files = [
+        (extract_file_name_with_source(path, root), path, os.path.getsize(path))
+        for path in file_list
+    ]
+    if not files:
+        raise Exception(f"No files to upload in {source}")
+    shards = plan_shards(files, max_shard_bytes, max_shard_files)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        reports = list(executor.map(
+            lambda item: upload_shard(item[0], item[1], token, retries, transport),
+            enumerate(shards),
+        ))
+    failed = [report["index"] for report in reports if "error" in report]
+    if failed:
+        raise BatchUploadError(f"Shards {failed} failed to upload", reports)
+
+    stored = {}
+    for report in reports:
+        stored.update(report.pop("entries"))
+    root_block, blocks = build_directory_tree(stored)
+    for block in blocks:
+        put_block(block, token, transport)
+    seconds = time.monotonic() - start
+    total_bytes = sum(size for _, _, size in files)
+
+    if len(tag):
+        _axios = Axios(Config.lighthouse_api + "/api/user/create_tag", transport)
+        _axios.post({
+            "tag": tag,
+            "cid": root_block.cid
+        }, {
+            "Authorization": f"Bearer {token}", })
+    return {
+        "data": {
+            "Name": next(iter(stored)).split("/")[0],
+            "Hash": root_block.cid,
+            "Size": str(root_block.tsize),
+        },
+        "shards": reports,
+        "seconds": seconds,
+        "throughput": total_bytes / seconds if seconds else float(total_bytes),
+    }
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import threading
+
+
+DEFAULT_MAX_FREE = 8
+
+
+class BufferPool:
+    """
+    Free list of bytearrays reused across streamed downloads.
+
+    acquire(size) hands out a released buffer of that size if there is one,
+    else a new one; release() keeps at most max_free buffers of each size,
+    so a steady stream of downloads reads into the same few buffers.
+    """
+
+    def __init__(self, max_free: int = DEFAULT_MAX_FREE):
+        self.max_free = max_free
+        self.lock = threading.Lock()
+        self.free = {}
+        self.allocated = 0
+
+    def acquire(self, size: int) -> bytearray:
+        with self.lock:
+            buffers = self.free.get(size)
+            if buffers:
+                return buffers.pop()
+            self.allocated += 1
+        return bytearray(size)
+
+    def release(self, buffer: bytearray) -> None:
+        with self.lock:
+            buffers = self.free.setdefault(len(buffer), [])
+            if len(buffers) < self.max_free:
+                buffers.append(buffer)
+
+
+_pool = BufferPool()
+
+
+def get_buffer_pool() -> BufferPool:
+    return _pool
+
+
+def readinto_full(fileobj, view: memoryview) -> int:
+    """fill view from fileobj, short only at the end of the stream; :return: bytes read"""
+    filled = 0
+    while filled < len(view):
+        count = fileobj.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
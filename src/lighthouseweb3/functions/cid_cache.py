@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+    import msvcrt
+
+
+DEFAULT_CACHE_BYTES = 1024*1024*1024*10
+# CIDv0 (base58) and CIDv1 (base32/base36) strings are alphanumeric
+_BARE_CID = re.compile(r"[A-Za-z0-9]+")
+
+
+class _FileLock:
+    """exclusive lock shared by every process using the same cache directory"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.thread_lock = threading.Lock()
+        self.file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        self.file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self.file.close()
+            self.thread_lock.release()
+
+
+class _EntryWriter:
+    """writes a cache entry to a temp file, published atomically on commit"""
+
+    def __init__(self, cache: "CidCache", cid: str, content_type: str):
+        self.cache = cache
+        self.cid = cid
+        self.content_type = content_type
+        self.temp = os.path.join(cache.directory, f".tmp-{uuid.uuid4().hex}")
+        self.file = open(self.temp, "wb")
+
+    def write(self, data) -> None:
+        self.file.write(data)
+
+    def commit(self) -> None:
+        self.file.close()
+        with open(f"{self.temp}.meta", "w") as f:
+            json.dump({"content_type": self.content_type}, f)
+        with self.cache.lock:
+            os.replace(f"{self.temp}.meta", self.cache.meta_path(self.cid))
+            os.replace(self.temp, self.cache.path(self.cid))
+            self.cache.evict(keep=self.cid)
+
+    def discard(self) -> None:
+        self.file.close()
+        for path in (self.temp, f"{self.temp}.meta"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+class CidCache:
+    """
+    On-disk cache of downloaded content keyed by CID.
+
+    CIDs are immutable, so entries never go stale; the cache is only bounded
+    by size, evicting the least recently used entries first. Entries are
+    published with an atomic rename and eviction runs under a lock file, so
+    several processes can share one directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_CACHE_BYTES, use_mmap: bool = False):
+        """
+        :param directory: str, cache directory (created if missing)
+        :param max_bytes: int, total size kept on disk
+        :param use_mmap: bool, return hits as read-only mmaps instead of bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.use_mmap = use_mmap
+        os.makedirs(directory, exist_ok=True)
+        self.lock = _FileLock(os.path.join(directory, ".lock"))
+        self.stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def entry_name(cid: str) -> str:
+        """file name of an entry; keys that aren't a bare CID (paths, "..") are hashed so they stay inside the directory"""
+        if _BARE_CID.fullmatch(cid):
+            return cid
+        return "h-" + hashlib.sha256(cid.encode("utf-8")).hexdigest()
+
+    def path(self, cid: str) -> str:
+        return os.path.join(self.directory, self.entry_name(cid))
+
+    def meta_path(self, cid: str) -> str:
+        return os.path.join(self.directory, f"{self.entry_name(cid)}.meta")
+
+    def _lookup(self, cid: str) -> bool:
+        try:
+            # mtime tracks recency for LRU eviction
+            os.utime(self.path(cid))
+        except FileNotFoundError:
+            with self.stats_lock:
+                self.misses += 1
+            return False
+        with self.stats_lock:
+            self.hits += 1
+        return True
+
+    def content_type(self, cid: str) -> str:
+        try:
+            with open(self.meta_path(cid), "r") as f:
+                return json.load(f).get("content_type")
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def get(self, cid: str):
+        """cached content as bytes (or a read-only mmap), None on a miss"""
+        if not self._lookup(cid):
+            return None
+        return self.load(cid)
+
+    def load(self, cid: str):
+        """read an entry without counting it as a hit or miss"""
+        try:
+            with open(self.path(cid), "rb") as f:
+                if self.use_mmap and os.fstat(f.fileno()).st_size:
+                    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                return f.read()
+        except FileNotFoundError:
+            # evicted by another process in between
+            return None
+
+    def open(self, cid: str):
+        """cached content as an open binary file, None on a miss"""
+        if not self._lookup(cid):
+            return None
+        try:
+            return open(self.path(cid), "rb")
+        except FileNotFoundError:
+            return None
+
+    def copy_to(self, cid: str, writable_object, chunk_size: int = 1024*1024) -> bool:
+        """copy cached content into writable_object, False on a miss"""
+        if not self._lookup(cid):
+            return False
+        try:
+            with open(self.path(cid), "rb") as f:
+                shutil.copyfileobj(f, writable_object, chunk_size)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def writer(self, cid: str, content_type: str = None) -> _EntryWriter:
+        """context manager receiving the content of cid, published on success"""
+        return _EntryWriter(self, cid, content_type)
+
+    def evict(self, keep: str = None) -> None:
+        """drop least recently used entries, except keep, until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".") or entry.name.endswith(".meta"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.name))
+            total += stat.st_size
+        entries.sort()
+        keep = self.entry_name(keep) if keep is not None else None
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            path = os.path.join(self.directory, name)
+            for path in (path, f"{path}.meta"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            with self.stats_lock:
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self) -> None:
+        with self.lock:
+            for entry in os.scandir(self.directory):
+                if entry.name != ".lock":
+                    os.remove(entry.path)
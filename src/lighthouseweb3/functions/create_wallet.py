@@ -1,15 +1,17 @@
-import requests as req
 from .config import Config
+from .transport import Transport, get_default_transport
 
-from eth_account import Account
+def create_wallet(password: str, transport: Transport = None):
+  # eth_account and its crypto stack take about a second to import, only pay it here
+  from eth_account import Account
 
-def create_wallet(password: str):
+  transport = transport or get_default_transport()
   wallet = Account.create()
 
   url = f"{Config.lighthouse_api}/api/auth/get_auth_message?publicKey={wallet.address}"
 
   try:
-    response = req.get(url)
+    response = transport.get(url)
   except Exception as e:
     raise Exception("Failed to create wallet")
 
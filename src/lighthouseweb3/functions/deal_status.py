@@ -1,12 +1,30 @@
 import requests
 from .config import Config
+from .fanout import fan_out
+from .transport import Transport, get_default_transport
 
 
-def get_deal_status(cid: str):
+def get_deal_status(cid: str, transport: Transport = None):
+    transport = transport or get_default_transport()
     try:
         url = f"{Config.lighthouse_api}/api/lighthouse/deal_status?cid={cid}"
-        response = requests.get(url)
+        response = transport.get(url)
         response.raise_for_status()
         return response.json()
     except requests.HTTPError as error:
         raise Exception(error.response.text)
+
+
+def get_deal_status_many(cids, max_workers: int = None, transport: Transport = None, lookup=None):
+    """
+    Deal status of many CIDs over one pooled session.
+
+    :param max_workers: int, concurrent lookups (default: the transport pool size)
+    :param lookup: callable, looks up one cid, e.g. through a cache (default: get_deal_status)
+    :return: generator of {"cid", "data"} or {"cid", "error"} in completion order
+    """
+    transport = transport or get_default_transport()
+    return fan_out(
+        lookup or (lambda cid: get_deal_status(cid, transport)), cids,
+        max_workers or transport.pool_maxsize, "cid",
+    )
@@ -1,46 +1,480 @@
 import requests
 import warnings
 import io
+import json
+import mmap
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from .axios import Axios
+from .bandwidth import get_bandwidth_limiter
+from .buffer_pool import BufferPool, get_buffer_pool, readinto_full
+from .cid_cache import CidCache
 from .config import Config
+from .progress import ProgressTracker
+from .transport import Transport, get_default_transport
 
 
 # 10MB chunks by default
-def download_file_into_writable(cid: str, writable_object: io.BufferedWriter, chunk_size=1024*1024*10):
-    url = f"{Config.lighthouse_gateway}/{cid}"
-    with requests.get(url, stream=True) as r:
+def download_file_into_writable(cid: str, writable_object: io.BufferedWriter, chunk_size=1024*1024*10, transport: Transport = None, connections: int = 1, resume: bool = False, cache: CidCache = None, tracker: ProgressTracker = None):
+    transport = transport or get_default_transport()
+    url = transport.gateways.url(cid)
+    if resume:
+        return resume_download(cid, url, writable_object, chunk_size, connections, transport, tracker)
+    if cache is not None:
+        if cache.copy_to(cid, writable_object):
+            return {"data": {"Hash": cid, "Size": writable_object.tell()}}
+        if connections <= 1:
+            return download_through_cache(cid, writable_object, chunk_size, cache, transport, tracker)
+    if connections > 1:
+        size = get_content_length(url, transport)
+        if size is not None:
+            # the preallocated file is as long as the object from the start, so
+            # the completed ranges are recorded for a later resume=True to trust
+            base = writable_object.tell()
+            sidecar = progress_path(writable_object)
+            progress = DownloadProgress(sidecar, cid, size, load=False, base=base) if sidecar else None
+            download_ranges(url, writable_object, size, chunk_size, connections, transport, progress, base, tracker)
+            if progress:
+                progress.remove()
+            return {"data": {"Hash": cid, "Size": writable_object.tell()}}
+    with transport.gateways.get(transport, cid, stream=True) as r:
         r.raise_for_status()
+        _expect(tracker, r)
         for chunk in r.iter_content(chunk_size=chunk_size):
             if chunk:  # filter out keep-alive new chunks
                 writable_object.write(chunk)
+                if tracker is not None:
+                    tracker.update(len(chunk))
     return {"data": {"Hash": cid, "Size": writable_object.tell()}}
 
 
-def get_url_body(url):
-    response = requests.get(url)
+def _expect(tracker: ProgressTracker, r, offset: int = 0) -> None:
+    """take the total size of a tracked download from the response"""
+    if tracker is not None and tracker.total is None and r.headers.get("Content-Length"):
+        tracker.total = offset + int(r.headers["Content-Length"])
+
+
+def get_content_length(url: str, transport: Transport = None):
+    """size of the object if the gateway serves byte ranges for it, else None"""
+    transport = transport or get_default_transport()
+    r = transport.head(url, allow_redirects=True)
+    r.raise_for_status()
+    if r.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    length = r.headers.get("Content-Length")
+    return int(length) if length is not None else None
+
+
+class RangeWriter:
+    """
+    Positional writes into a writable object from several threads.
+
+    Real files are written with os.pwrite on their descriptor, without
+    moving the file position; other seekable writers fall back to
+    seek+write under a lock.
+    """
+
+    def __init__(self, writable_object, base: int):
+        self.writable_object = writable_object
+        self.base = base
+        self.fd = None
+        self.lock = threading.Lock()
+        if hasattr(os, "pwrite"):
+            try:
+                self.fd = writable_object.fileno()
+            except (AttributeError, io.UnsupportedOperation):
+                self.fd = None
+
+    def preallocate(self, size: int) -> None:
+        if self.fd is not None:
+            self.writable_object.flush()
+            if os.fstat(self.fd).st_size < self.base + size:
+                os.ftruncate(self.fd, self.base + size)
+
+    def write_at(self, offset: int, data) -> None:
+        if self.fd is not None:
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(self.fd, view, self.base + offset)
+                view = view[written:]
+                offset += written
+            return
+        with self.lock:
+            self.writable_object.seek(self.base + offset)
+            self.writable_object.write(data)
+
+    def finish(self, size: int) -> None:
+        self.writable_object.seek(self.base + size)
+
+
+def fetch_range(url: str, start: int, end: int, writer: RangeWriter, transport: Transport = None, block_size: int = 1024*1024, tracker: ProgressTracker = None):
+    """fetch bytes start..end (inclusive) and write them in place"""
+    transport = transport or get_default_transport()
+    headers = {"Range": f"bytes={start}-{end}"}
+    with transport.get(url, headers=headers, stream=True) as r:
+        r.raise_for_status()
+        if r.status_code != 206:
+            raise Exception(f"Gateway ignored range request for {url}")
+        offset = start
+        for chunk in r.iter_content(chunk_size=block_size):
+            if chunk:
+                writer.write_at(offset, chunk)
+                offset += len(chunk)
+                if tracker is not None:
+                    tracker.update(len(chunk))
+    if offset != end + 1:
+        raise Exception(f"Range {start}-{end} of {url} ended early at {offset}")
+
+
+def download_ranges(url: str, writable_object, size: int, part_size: int, connections: int, transport: Transport = None, progress: "DownloadProgress" = None, base: int = None, tracker: ProgressTracker = None):
+    """download an object as concurrent byte ranges written in place at base (default: current position)"""
+    writer = RangeWriter(writable_object, writable_object.tell() if base is None else base)
+    if progress:
+        progress.save()
+    writer.preallocate(size)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+    if progress:
+        ranges = progress.missing(ranges)
+    if tracker is not None:
+        tracker.total = size
+        tracker.resume_from(size - sum(end + 1 - start for start, end in ranges))
+
+    def fetch(start: int, end: int):
+        fetch_range(url, start, end, writer, transport, tracker=tracker)
+        if progress:
+            progress.record(start, end)
+
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        futures = [executor.submit(fetch, start, end) for start, end in ranges]
+        try:
+            for future in futures:
+                future.result()
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+    writer.finish(size)
+
+
+class DownloadProgress:
+    """
+    Sidecar file recording which byte ranges of a download are complete.
+
+    It lives next to the destination as `<name>.lhprogress` and is only
+    trusted for the same CID and size. Every ranged download into a named
+    file keeps one, so a preallocated file is never resumed by its length.
+    It also records the offset the object starts at in the file, for
+    downloads appended after other content.
+    """
+
+    def __init__(self, path: str, cid: str, size: int, load: bool = True, base: int = 0):
+        """
+        :param load: bool, pick up the ranges and base of an earlier run (False: start over)
+        :param base: int, offset of the object in the file
+        """
+        self.path = path
+        self.cid = cid
+        self.size = size
+        self.base = base
+        self.ranges = set()
+        self.loaded = False
+        self.lock = threading.Lock()
+        if not load:
+            return
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+            if saved.get("cid") == cid and saved.get("size") == size:
+                self.ranges = {tuple(r) for r in saved.get("ranges", [])}
+                self.base = saved.get("base", 0)
+                self.loaded = True
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def missing(self, ranges):
+        return [r for r in ranges if r not in self.ranges]
+
+    def save(self) -> None:
+        temp = f"{self.path}.tmp"
+        with open(temp, "w") as f:
+            json.dump({"cid": self.cid, "size": self.size, "base": self.base, "ranges": sorted(self.ranges)}, f)
+        os.replace(temp, self.path)
+
+    def record(self, start: int, end: int) -> None:
+        with self.lock:
+            self.ranges.add((start, end))
+            self.save()
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def progress_path(writable_object):
+    name = getattr(writable_object, "name", None)
+    return f"{name}.lhprogress" if isinstance(name, str) else None
+
+
+def resume_download(cid: str, url: str, writable_object, chunk_size: int, connections: int, transport: Transport = None, tracker: ProgressTracker = None):
+    """
+    Continue a partial download into writable_object, which must be opened
+    for update ("r+b") when ranges are fetched in place.
+
+    Ranged downloads resume from their sidecar progress file; a single
+    stream resumes from the current length of the destination. A file with
+    a sidecar is always resumed by its ranges at the offset it records,
+    whatever the connections.
+    """
+    size = get_content_length(url, transport)
+    if size is None:
+        # nothing can be resumed without range support
+        writable_object.seek(0)
+        writable_object.truncate()
+        return download_file_into_writable(cid, writable_object, chunk_size, transport, tracker=tracker)
+
+    sidecar = progress_path(writable_object)
+    progress = DownloadProgress(sidecar, cid, size) if sidecar else None
+    if connections > 1 or (progress and progress.loaded):
+        if "a" in getattr(writable_object, "mode", ""):
+            raise Exception("Open the destination with 'r+b' to resume a ranged download")
+        base = progress.base if progress and progress.loaded else 0
+        download_ranges(url, writable_object, size, chunk_size, connections, transport, progress, base, tracker)
+    else:
+        done = writable_object.seek(0, 2)
+        if done > size:
+            writable_object.seek(0)
+            writable_object.truncate()
+            done = 0
+        if tracker is not None:
+            tracker.total = size
+            tracker.resume_from(done)
+        if done < size:
+            with transport.get(url, headers={"Range": f"bytes={done}-"}, stream=True) as r:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    writable_object.seek(0)
+                    writable_object.truncate()
+                    if tracker is not None:
+                        tracker.resume_from(0)
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        writable_object.write(chunk)
+                        if tracker is not None:
+                            tracker.update(len(chunk))
+    if progress:
+        progress.remove()
+    return {"data": {"Hash": cid, "Size": writable_object.tell()}}
+
+
+def get_url_body(url, transport: Transport = None):
+    transport = transport or get_default_transport()
+    response = transport.get(url)
     response.raise_for_status()  # Raises stored HTTPError, if one occurred.
     return response.content, response.headers
 
 
-def get_file(cid: str) -> (bytes, str):
+def download_through_cache(cid: str, writable_object, chunk_size: int, cache: CidCache, transport: Transport = None, tracker: ProgressTracker = None):
+    """stream cid into writable_object while filling its cache entry"""
+    transport = transport or get_default_transport()
+    with transport.gateways.get(transport, cid, stream=True) as r:
+        r.raise_for_status()
+        _expect(tracker, r)
+        with cache.writer(cid, r.headers.get("Content-Type")) as entry:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    entry.write(chunk)
+                    if writable_object is not None:
+                        writable_object.write(chunk)
+                    if tracker is not None:
+                        tracker.update(len(chunk))
+    if writable_object is None:
+        return None
+    return {"data": {"Hash": cid, "Size": writable_object.tell()}}
+
+
+def iter_download(cid: str, chunk_size: int = 1024*1024, transport: Transport = None, cache: CidCache = None, tracker: ProgressTracker = None, pool: BufferPool = None):
+    """
+    Stream cid as memoryview chunks of chunk_size bytes (the last may be shorter).
+
+    The body is read straight into a buffer taken from the pool and the same
+    buffer is refilled for every chunk, so a chunk is only valid until the
+    next one is requested; copy it with bytes(chunk) to keep it. The buffer
+    goes back to the pool once the iteration ends or is closed.
+    """
+    transport = transport or get_default_transport()
+    pool = pool or get_buffer_pool()
+    buffer = pool.acquire(chunk_size)
+    view = memoryview(buffer)
+    try:
+        cached = cache.open(cid) if cache is not None else None
+        if cached is not None:
+            with cached:
+                if tracker is not None:
+                    tracker.total = os.fstat(cached.fileno()).st_size
+                while True:
+                    count = readinto_full(cached, view)
+                    if not count:
+                        break
+                    if tracker is not None:
+                        tracker.update(count)
+                    yield view[:count]
+        else:
+            with transport.gateways.get(transport, cid, stream=True) as r:
+                r.raise_for_status()
+                _expect(tracker, r)
+                # read through urllib3 so content-encoding is still undone
+                r.raw.decode_content = True
+                limiter = get_bandwidth_limiter()
+                # under a bandwidth limit a chunk is filled in small paced reads,
+                # not received in one burst followed by a long sleep
+                read_size = limiter.download_read_size(chunk_size)
+                entry = cache.writer(cid, r.headers.get("Content-Type")) if cache is not None else None
+                try:
+                    while True:
+                        count = 0
+                        while count < chunk_size:
+                            read = readinto_full(r.raw, view[count:count + read_size])
+                            if not read:
+                                break
+                            limiter.throttle_download(read)
+                            if transport.metrics is not None:
+                                transport.metrics.received(r.url, read)
+                            if tracker is not None:
+                                tracker.update(read)
+                            count += read
+                        if not count:
+                            break
+                        if entry is not None:
+                            entry.write(view[:count])
+                        yield view[:count]
+                except BaseException:
+                    if entry is not None:
+                        entry.discard()
+                    raise
+                if entry is not None:
+                    entry.commit()
+        if tracker is not None:
+            tracker.finish()
+    finally:
+        pool.release(buffer)
+
+
+def preallocate(fileobj, size: int) -> None:
+    """reserve size bytes on disk for fileobj up front"""
+    fileobj.flush()
+    if hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fileobj.fileno(), 0, size)
+            return
+        except OSError:
+            pass  # filesystem without fallocate support
+    os.ftruncate(fileobj.fileno(), size)
+
+
+def download_to_path(cid: str, path: str, chunk_size=1024*1024*10, transport: Transport = None, connections: int = 1, cache: CidCache = None, tracker: ProgressTracker = None):
+    """
+    Stream cid into a preallocated file at path.
+
+    The content is written to `<path>.part` and renamed over path once
+    complete, so path never holds a partial object.
+    """
+    transport = transport or get_default_transport()
+    temp = f"{path}.part"
     try:
-        url = f"{Config.lighthouse_gateway}/{cid}"
+        with open(temp, "wb") as f:
+            if cache is not None or connections > 1:
+                download_file_into_writable(cid, f, chunk_size, transport, connections, cache=cache, tracker=tracker)
+            else:
+                with transport.gateways.get(transport, cid, stream=True) as r:
+                    r.raise_for_status()
+                    if r.headers.get("Content-Length"):
+                        preallocate(f, int(r.headers["Content-Length"]))
+                    _expect(tracker, r)
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        if chunk:
+                            f.write(chunk)
+                            if tracker is not None:
+                                tracker.update(len(chunk))
+                # drop whatever was reserved beyond the received bytes
+                f.truncate()
+            size = f.tell()
+        os.replace(temp, path)
+    except Exception:
+        for leftover in (temp, f"{temp}.lhprogress"):
+            try:
+                os.remove(leftover)
+            except FileNotFoundError:
+                pass
+        raise
+    return {"data": {"Hash": cid, "Size": size, "Path": path}}
+
+
+def download_mmap(cid: str, path: str = None, chunk_size=1024*1024*10, transport: Transport = None, connections: int = 1, cache: CidCache = None):
+    """
+    Download cid to disk and map it read-only into memory.
+
+    Without a path the content goes to a temporary file that is unlinked
+    right away; the mapping keeps it alive until it is closed.
+
+    :return: mmap.mmap, read-only view of the content (b"" when empty)
+    """
+    remove = path is None
+    if remove:
+        fd, path = tempfile.mkstemp(prefix="lighthouse-")
+        os.close(fd)
+    try:
+        download_to_path(cid, path, chunk_size, transport, connections, cache)
+        with open(path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        if remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # windows can't unlink a mapped file
+
+
+def get_file(cid: str, transport: Transport = None, cache: CidCache = None) -> (bytes, str):
+    try:
+        transport = transport or get_default_transport()
+
+        if cache is not None:
+            body = cache.get(cid)
+            if body is None and cache.use_mmap:
+                download_through_cache(cid, None, 1024*1024, cache, transport)
+                body = cache.load(cid)
+            elif body is None:
+                received = io.BytesIO()
+                download_through_cache(cid, received, 1024*1024, cache, transport)
+                body = received.getvalue()
+            # None only when another process evicted the entry before it was mapped
+            if body is not None:
+                return (body, cache.content_type(cid))
 
-        (body, headers) = get_url_body(url)
+        # streamed, so reading the body is paced by the download bandwidth limit
+        response = transport.gateways.get(transport, cid, stream=True)
+        response.raise_for_status()  # Raises stored HTTPError, if one occurred.
+        (body, headers) = (response.content, response.headers)
 
         # show a warning if the file is greater then 2GB
         if (int(headers['Content-Length']) > 1024*1024*1024*2):
             warnings.warn(
-                "This content of the file is grater then 2GB, use `downloadBlob` instead", UserWarning)
+                "This content of the file is grater then 2GB, use `downloadBlob` or `downloadMmap` instead", UserWarning)
         return (body, headers['Content-Type'])
     except requests.HTTPError as error:
         raise Exception(error.response.text)
 
 
-def getTaggedCid(tag: str, token: str):
+def getTaggedCid(tag: str, token: str, transport: Transport = None):
 
     _axios = Axios(
-        f"{Config.lighthouse_api}/api/user/get_tag_details?tag={tag}")
+        f"{Config.lighthouse_api}/api/user/get_tag_details?tag={tag}", transport)
     data = _axios.get({
         "Authorization": f"Bearer {token}"
     })
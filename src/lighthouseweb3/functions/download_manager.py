@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+from .cid_cache import CidCache
+from .download import download_to_path
+from .transport import Transport, get_default_transport
+
+
+DEFAULT_MAX_QUEUED = 10000
+
+
+class _Job:
+    __slots__ = ("cid", "path", "priority", "attempts", "ready_at", "error")
+
+    def __init__(self, cid: str, path: str, priority: int = 0):
+        self.cid = cid
+        self.path = path
+        self.priority = priority
+        self.attempts = 0
+        self.ready_at = 0.0
+        self.error = None
+
+
+class DownloadManager:
+    """
+    Downloads many (cid, path) pairs on a bounded worker pool.
+
+    Items are (cid, path) or (cid, path, priority) and higher priorities
+    start first, ties in the order given. The input is read lazily and at
+    most max_queued items wait in the queue at once, so priorities are
+    honoured within that window and huge inputs don't sit in memory.
+    Each download goes to a `.part` file renamed over its path when done;
+    missing parent directories are created. Every CID is fetched from the
+    client's gateways, best ranked first, so per_host caps the downloads
+    started against that gateway's host; with a single gateway it is just
+    a second bound next to max_workers.
+
+    A failed download goes to the retry queue and runs again after a
+    backoff that doubles per attempt, behind the ready work; after
+    `retries` extra attempts it is reported as failed and kept in
+    `failed`. Iterating the manager runs it and yields
+    {"cid", "path", "data"} or {"cid", "path", "error", "attempts"} as
+    downloads complete; stats() gives the aggregate throughput.
+    """
+
+    def __init__(
+        self,
+        items=(),
+        max_workers: int = None,
+        per_host: int = None,
+        retries: int = 2,
+        backoff: float = 0.5,
+        chunk_size: int = 1024*1024,
+        transport: Transport = None,
+        cache: CidCache = None,
+        max_queued: int = DEFAULT_MAX_QUEUED,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        """
+        :param items: iterable of (cid, path) or (cid, path, priority)
+        :param max_workers: int, downloads running at once (default: the transport pool size)
+        :param per_host: int, downloads running at once against the best ranked gateway host (default: max_workers)
+        :param retries: int, extra attempts of a failed download
+        :param backoff: float, seconds before the first retry of a download
+        :param chunk_size: int, size of the blocks streamed to disk
+        :param max_queued: int, items read ahead from the input
+        """
+        self.transport = transport or get_default_transport()
+        self.max_workers = max_workers or self.transport.pool_maxsize
+        self.per_host = per_host or self.max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.chunk_size = chunk_size
+        self.cache = cache
+        self.max_queued = max_queued
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self._items = iter(items)
+        self._added = []
+        self._queue = []
+        self._retry_queue = []
+        self._order = itertools.count()
+        self.failed = []
+        self._stats = {"completed": 0, "failed": 0, "retried": 0, "bytes": 0}
+        self._started = None
+        self._finished = None
+
+    def add(self, cid: str, path: str, priority: int = 0) -> None:
+        """queue one more download, also while the manager is running"""
+        with self.lock:
+            self._added.append(_Job(cid, path, priority))
+
+    def _push(self, job: _Job) -> None:
+        heapq.heappush(self._queue, (-job.priority, next(self._order), job))
+
+    def _fill(self) -> None:
+        with self.lock:
+            added, self._added = self._added, []
+        for job in added:
+            self._push(job)
+        while self._items is not None and len(self._queue) < self.max_queued:
+            item = next(self._items, None)
+            if item is None:
+                self._items = None
+                break
+            self._push(_Job(*item))
+        now = self.clock()
+        while self._retry_queue and self._retry_queue[0][0] <= now:
+            _, _, job = heapq.heappop(self._retry_queue)
+            self._push(job)
+
+    def _host(self) -> str:
+        """host of the gateway the next downloads are sent to first"""
+        return urlsplit(self.transport.gateways.ranked()[0]).netloc
+
+    def _download(self, job: _Job) -> dict:
+        parent = os.path.dirname(job.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        return download_to_path(job.cid, job.path, self.chunk_size, self.transport, cache=self.cache)
+
+    def _result(self, job: _Job, future) -> dict:
+        try:
+            data = future.result()["data"]
+        except Exception as e:
+            job.error = str(e)
+            if job.attempts <= self.retries:
+                job.ready_at = self.clock() + self.backoff * 2 ** (job.attempts - 1)
+                heapq.heappush(self._retry_queue, (job.ready_at, next(self._order), job))
+                self._stats["retried"] += 1
+                return None
+            self.failed.append(job)
+            self._stats["failed"] += 1
+            return {"cid": job.cid, "path": job.path, "error": job.error, "attempts": job.attempts}
+        self._stats["completed"] += 1
+        self._stats["bytes"] += data.get("Size", 0)
+        return {"cid": job.cid, "path": job.path, "data": data}
+
+    def __iter__(self):
+        self._started = self.clock()
+        self._finished = None
+        running = {}
+        hosts = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while True:
+                    self._fill()
+                    # every CID goes to the same best ranked gateway, so once its
+                    # host is full nothing else in the queue can start either
+                    host = self._host()
+                    while (
+                        self._queue and len(running) < self.max_workers
+                        and hosts.get(host, 0) < self.per_host
+                    ):
+                        job = heapq.heappop(self._queue)[2]
+                        hosts[host] = hosts.get(host, 0) + 1
+                        job.attempts += 1
+                        running[executor.submit(self._download, job)] = (job, host)
+
+                    if not running:
+                        if self._retry_queue:
+                            self.sleep(max(0.0, self._retry_queue[0][0] - self.clock()))
+                            continue
+                        if self._queue or self._items is not None or self._added:
+                            continue
+                        break
+                    timeout = None
+                    if self._retry_queue:
+                        timeout = max(0.0, self._retry_queue[0][0] - self.clock())
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        job, host = running.pop(future)
+                        hosts[host] -= 1
+                        result = self._result(job, future)
+                        if result is not None:
+                            yield result
+            finally:
+                for future in running:
+                    future.cancel()
+                self._finished = self.clock()
+
+    def stats(self) -> dict:
+        """downloads completed, failed and retried, bytes written and the throughput so far"""
+        stats = dict(self._stats)
+        if self._started is None:
+            seconds = 0.0
+        else:
+            seconds = (self._finished if self._finished is not None else self.clock()) - self._started
+        stats["seconds"] = seconds
+        stats["throughput"] = stats["bytes"] / seconds if seconds else 0.0
+        stats["objects_per_second"] = stats["completed"] / seconds if seconds else 0.0
+        stats["queued"] = len(self._queue) + len(self._retry_queue)
+        return stats
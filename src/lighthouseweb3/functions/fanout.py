@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def fan_out(func, keys, max_workers: int, key_name: str = "key"):
+    """
+    Call func(key) for every distinct key on a bounded thread pool.
+
+    Results are yielded as they complete, not in input order, as
+    {key_name: key, "data": result} or {key_name: key, "error": message};
+    a failing key never stops the others. keys is consumed lazily and at
+    most twice max_workers calls are pending at a time, so huge inputs
+    don't queue up in memory.
+    """
+    seen = set()
+    keys = iter(keys)
+    pending = {}
+
+    def submit(executor) -> bool:
+        for key in keys:
+            if key in seen:
+                continue
+            seen.add(key)
+            pending[executor.submit(func, key)] = key
+            return True
+        return False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            while len(pending) < max_workers * 2 and submit(executor):
+                pass
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    try:
+                        yield {key_name: key, "data": future.result()}
+                    except Exception as e:
+                        yield {key_name: key, "error": str(e)}
+                    submit(executor)
+        finally:
+            for future in pending:
+                future.cancel()
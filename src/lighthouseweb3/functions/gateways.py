@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .config import Config
+from .metrics import Histogram
+
+
+# latency histogram bounds in seconds, fine-grained where hedge delays fall
+HEDGE_BUCKETS = (
+    0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10,
+)
+# a response with one of these statuses sends the request on to the next gateway
+FAILOVER_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class _GatewayStats:
+    def __init__(self):
+        self.latency = Histogram(HEDGE_BUCKETS)
+        self.average = None
+        self.failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+
+
+class GatewayPool:
+    """
+    IPFS gateways content is fetched from, ranked by health and latency.
+
+    Every response updates its gateway's latency histogram and moving
+    average (time to the response headers); consecutive failures take a
+    gateway out of rotation for failure_cooldown seconds. Requests go to
+    the best ranked gateway first. If it hasn't answered within its
+    hedge_quantile latency, the same request is also sent to the next
+    gateway and the first answer wins; a gateway that fails or answers
+    with a 429/5xx is failed over immediately.
+
+    Without a gateway list the pool follows Config.lighthouse_gateway, and
+    with a single gateway requests are sent directly, without hedging.
+    """
+
+    def __init__(
+        self,
+        gateways=None,
+        hedge_quantile: float = 0.9,
+        hedge_delay: float = 0.5,
+        min_hedge_delay: float = 0.05,
+        max_hedge_delay: float = 2.0,
+        max_hedges: int = 1,
+        failure_threshold: int = 3,
+        failure_cooldown: float = 30.0,
+        clock=time.monotonic,
+    ):
+        """
+        :param gateways: list of str, gateway urls ending in /ipfs (default: Config.lighthouse_gateway)
+        :param hedge_quantile: float, latency quantile of a gateway after which a hedge is sent
+        :param hedge_delay: float, seconds before a hedge while a gateway has too few samples
+        :param min_hedge_delay: float, lower bound of the hedge delay
+        :param max_hedge_delay: float, upper bound of the hedge delay
+        :param max_hedges: int, extra gateways a slow request is sent to
+        :param failure_threshold: int, consecutive failures that take a gateway out of rotation
+        :param failure_cooldown: float, seconds a failing gateway stays out of rotation
+        """
+        self._gateways = [gateway.rstrip("/") for gateway in gateways] if gateways else None
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay_default = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.max_hedges = max_hedges
+        self.failure_threshold = failure_threshold
+        self.failure_cooldown = failure_cooldown
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._stats = {}
+        self._executor = None
+        self.hedged = 0
+
+    @property
+    def gateways(self) -> list:
+        return self._gateways or [Config.lighthouse_gateway]
+
+    def _gateway_stats(self, gateway: str) -> _GatewayStats:
+        stats = self._stats.get(gateway)
+        if stats is None:
+            stats = self._stats[gateway] = _GatewayStats()
+        return stats
+
+    def ranked(self) -> list:
+        """gateways in rotation by moving-average latency (untried first), then those cooling down"""
+        now = self.clock()
+        with self.lock:
+            def score(gateway):
+                stats = self._gateway_stats(gateway)
+                down = stats.down_until > now
+                return (down, stats.down_until if down else (stats.average or 0.0))
+            return sorted(self.gateways, key=score)
+
+    def url(self, cid: str) -> str:
+        """url of cid on the best gateway, for requests that must stay on one gateway (byte ranges)"""
+        return f"{self.ranked()[0]}/{cid}"
+
+    def hedge_delay(self, gateway: str) -> float:
+        with self.lock:
+            latency = self._gateway_stats(gateway).latency
+            if latency.count < 20:
+                delay = self.hedge_delay_default
+            else:
+                delay = latency.quantile(self.hedge_quantile)
+        return min(self.max_hedge_delay, max(self.min_hedge_delay, delay))
+
+    def record(self, gateway: str, seconds: float = None, error: bool = False) -> None:
+        with self.lock:
+            stats = self._gateway_stats(gateway)
+            stats.requests += 1
+            if error:
+                stats.errors += 1
+                stats.failures += 1
+                if stats.failures >= self.failure_threshold:
+                    stats.down_until = self.clock() + self.failure_cooldown
+                return
+            stats.failures = 0
+            stats.down_until = 0.0
+            stats.latency.observe(seconds)
+            stats.average = seconds if stats.average is None else 0.8 * stats.average + 0.2 * seconds
+
+    def _attempt(self, transport, gateway: str, cid: str, kwargs: dict):
+        start = self.clock()
+        try:
+            # failing over to the next gateway replaces the transport's retries
+            r = transport.get(f"{gateway}/{cid}", retry=False, **kwargs)
+        except Exception:
+            self.record(gateway, error=True)
+            raise
+        if r.status_code in FAILOVER_STATUSES:
+            self.record(gateway, error=True)
+            r.close()
+            raise Exception(f"{gateway} answered {r.status_code}")
+        self.record(gateway, self.clock() - start)
+        return r
+
+    def get(self, transport, cid: str, **kwargs):
+        """
+        GET cid from the gateways, hedging slow answers and failing over errors.
+
+        The gateways are always asked for a streamed response, so hedging and
+        the latency statistics go by the time to the response headers; a
+        non-streamed body is then read from the winner alone.
+
+        :param kwargs: passed to Transport.get, e.g. stream=True or headers
+        :return: requests.Response of the first gateway to answer
+        """
+        order = self.ranked()
+        if len(order) == 1:
+            return transport.get(f"{order[0]}/{cid}", **kwargs)
+        streamed = kwargs.get("stream", False)
+        kwargs = dict(kwargs, stream=True)
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=transport.pool_maxsize * (1 + self.max_hedges))
+        pending = {}
+        launched = []
+        error = None
+
+        def launch():
+            gateway = order[len(launched)]
+            launched.append(gateway)
+            pending[self._executor.submit(self._attempt, transport, gateway, cid, kwargs)] = gateway
+
+        launch()
+        while pending:
+            timeout = None
+            if len(launched) < len(order) and len(launched) <= self.max_hedges:
+                timeout = self.hedge_delay(launched[-1])
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                with self.lock:
+                    self.hedged += 1
+                launch()
+                continue
+            for future in done:
+                gateway = pending.pop(future)
+                try:
+                    r = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                with self.lock:
+                    self._gateway_stats(gateway).wins += 1
+                # answers of the losing gateways are closed as they arrive
+                for other in pending:
+                    other.add_done_callback(_close_response)
+                if not streamed:
+                    r.content  # read the body now, as a non-streamed request would
+                return r
+            if not pending and len(launched) < len(order):
+                launch()
+        raise error
+
+    def stats(self) -> dict:
+        """per gateway: requests, errors, wins, moving-average and p50/p90/p99 latency, and whether it is in rotation"""
+        now = self.clock()
+        with self.lock:
+            return {
+                gateway: dict(
+                    stats.latency.to_dict(),
+                    requests=stats.requests,
+                    errors=stats.errors,
+                    wins=stats.wins,
+                    average=stats.average,
+                    healthy=stats.down_until <= now,
+                )
+                for gateway, stats in ((g, self._gateway_stats(g)) for g in self.gateways)
+            }
+
+
+def _close_response(future) -> None:
+    try:
+        future.result().close()
+    except Exception:
+        pass
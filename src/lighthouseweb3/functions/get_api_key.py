@@ -1,7 +1,8 @@
 from .config import Config
-import requests as req
+from .transport import Transport, get_default_transport
 
-def get_api_key(publicKey: str, signedMessage: str):
+def get_api_key(publicKey: str, signedMessage: str, transport: Transport = None):
+  transport = transport or get_default_transport()
   url = f"{Config.lighthouse_api}/api/auth/create_api_key"
 
   data = {
@@ -10,7 +11,7 @@ def get_api_key(publicKey: str, signedMessage: str):
   }
 
   try:
-    response = req.post(url, data=data)
+    response = transport.post(url, data=data)
   except Exception as e:
     raise Exception("Failed to create api key")
 
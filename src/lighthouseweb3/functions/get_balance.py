@@ -1,14 +1,17 @@
 from .config import Config
-import requests as req
+from .transport import Transport, get_default_transport
 
-def get_balance(token:str):
+def get_balance(token:str, transport: Transport = None):
+  transport = transport or get_default_transport()
   headers = {
         "Authorization": f"Bearer {token}",
     }
   url = f"{Config.lighthouse_api}/api/user/user_data_usage"
   try:
-    response = req.get(url, headers=headers)
+    response = transport.get(url, headers=headers)
   except Exception as e:
     raise Exception("Failed to get account balance")
 
+  if response.status_code >= 400:
+    raise Exception(response.text)
   return response.json()
\ No newline at end of file
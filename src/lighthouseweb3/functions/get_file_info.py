@@ -1,11 +1,30 @@
 from .config import Config
-import requests as req
+from .fanout import fan_out
+from .transport import Transport, get_default_transport
 
-def get_file_info(cid: str):
+def get_file_info(cid: str, transport: Transport = None):
+  transport = transport or get_default_transport()
   url = f"{Config.lighthouse_api}/api/lighthouse/file_info?cid={cid}"
   try:
-    response = req.get(url)
+    response = transport.get(url)
   except Exception as e:
     raise Exception("Failed to get file metadata")
 
-  return response.json()
\ No newline at end of file
+  if response.status_code >= 400:
+    raise Exception(response.text)
+  return response.json()
+
+
+def get_file_info_many(cids, max_workers: int = None, transport: Transport = None, lookup=None):
+  """
+  File info of many CIDs over one pooled session.
+
+  :param max_workers: int, concurrent lookups (default: the transport pool size)
+  :param lookup: callable, looks up one cid, e.g. through a cache (default: get_file_info)
+  :return: generator of {"cid", "data"} or {"cid", "error"} in completion order
+  """
+  transport = transport or get_default_transport()
+  return fan_out(
+    lookup or (lambda cid: get_file_info(cid, transport)), cids,
+    max_workers or transport.pool_maxsize, "cid",
+  )
@@ -1,13 +1,14 @@
 from .config import Config
-import requests as req
+from .transport import Transport, get_default_transport
 
-def get_ipns_records(token: str):
+def get_ipns_records(token: str, transport: Transport = None):
+  transport = transport or get_default_transport()
   headers = {
     "Authorization": f"Bearer {token}",
   }
   url = f"{Config.lighthouse_api}/api/ipns/get_ipns_records"
   try:
-    response = req.get(url, headers=headers)
+    response = transport.get(url, headers=headers)
   except Exception as e:
     raise Exception("Failed to get ipns records")
 
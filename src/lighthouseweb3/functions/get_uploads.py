@@ -1,5 +1,7 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from .config import Config
+from .transport import Transport, get_default_transport
 
 
 def bytes_to_size(bytes_size):
@@ -11,15 +13,47 @@ def bytes_to_size(bytes_size):
     return f"{round(bytes_size, 2)} {units[index]}"
 
 
-def get_uploads(token: str, lastKey: str = None) :
+def get_uploads(token: str, lastKey: str = None, transport: Transport = None) :
+    transport = transport or get_default_transport()
     headers = {
         "Authorization": f"Bearer {token}",
     }
 
     try:
         url = f"{Config.lighthouse_api}/api/user/files_uploaded?lastKey={lastKey}"
-        response = requests.get(url, headers=headers)
+        response = transport.get(url, headers=headers)
         response.raise_for_status()
         return response.json()
     except requests.HTTPError as error:
         raise Exception(error.response.text)
+
+
+def _next_key(page: dict):
+    file_list = page.get("fileList") or []
+    return file_list[-1]["id"] if file_list else None
+
+
+def iter_uploads(token: str, lastKey: str = None, transport: Transport = None):
+    """
+    Yield every upload record, page after page.
+
+    The next page is requested in the background as soon as the current
+    one arrives, so its round trip overlaps with the caller consuming the
+    records. At most two pages are held at a time.
+    """
+    transport = transport or get_default_transport()
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = executor.submit(get_uploads, token, lastKey, transport)
+        seen = 0
+        while future is not None:
+            page = future.result()
+            file_list = page.get("fileList") or []
+            seen += len(file_list)
+            key = _next_key(page)
+            total = page.get("totalFiles")
+            done = key is None or (isinstance(total, int) and seen >= total)
+            future = None if done else executor.submit(get_uploads, token, key, transport)
+            yield from file_list
+    finally:
+        executor.shutdown(wait=False)
@@ -1,13 +1,15 @@
 from .config import Config
-import requests as req
+from .transport import Transport, get_default_transport
 
-def ipns_generate_key(token: str):
+def ipns_generate_key(token: str, transport: Transport = None):
+  transport = transport or get_default_transport()
   headers = {
     "Authorization": f"Bearer {token}",
   }
   url = f"{Config.lighthouse_api}/api/ipns/generate_key"
   try:
-    response = req.get(url, headers=headers)
+    # not retried: a key may have been created even when the answer failed
+    response = transport.get(url, headers=headers, retry=False)
   except Exception as e:
     raise Exception("Failed to ipns generate key")
 
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import threading
+import time
+from .fanout import fan_out
+from .get_ipns_record import get_ipns_records
+from .ipns_generate_key import ipns_generate_key
+from .ipns_publish_record import ipns_publish_record
+from .remove_ipns_record import remove_ipns_record
+from .transport import Transport, get_default_transport
+
+
+class KeyIndex:
+    """
+    Local index of the IPNS keys of an account.
+
+    Maps every ipnsName to the record get_ipns_records would list for it
+    (ipnsName, ipnsId, cid, lastUpdate). It is filled from a full listing
+    by getAllKeys and then kept current by the client's own generate,
+    publish and remove calls, so bulk operations never have to re-list
+    thousands of records. With a path it is kept on disk between runs.
+
+    Keys changed by other clients appear after the next listing: getAllKeys,
+    or the one skip-unchanged publishes make once the index is older than
+    max_age.
+    """
+
+    def __init__(self, path: str = None, max_age: float = 300, clock=time.time):
+        """
+        :param path: str, JSON file the index is loaded from and saved to (default: memory only)
+        :param max_age: float, seconds after which a full listing is fetched again (None: never)
+        """
+        self.path = path
+        self.max_age = max_age
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.records = {}
+        self.refreshed_at = None
+        if path is not None:
+            try:
+                with open(path, "r") as f:
+                    saved = json.load(f)
+                self.records = saved.get("records", {})
+                self.refreshed_at = saved.get("refreshed_at")
+            except (FileNotFoundError, ValueError):
+                pass
+
+    @property
+    def loaded(self) -> bool:
+        """whether the index has been filled from a full listing"""
+        return self.refreshed_at is not None
+
+    @property
+    def stale(self) -> bool:
+        if self.refreshed_at is None:
+            return True
+        return self.max_age is not None and self.clock() - self.refreshed_at > self.max_age
+
+    def __contains__(self, keyName: str) -> bool:
+        return keyName in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, keyName: str) -> dict:
+        return self.records.get(keyName)
+
+    def names(self) -> list:
+        with self.lock:
+            return list(self.records)
+
+    def refresh(self, records) -> None:
+        """replace the index with a full listing, as returned in get_ipns_records' data"""
+        with self.lock:
+            self.records = {record["ipnsName"]: dict(record) for record in records}
+            self.refreshed_at = self.clock()
+
+    def unchanged(self, keyName: str, cid: str) -> bool:
+        """whether the key is known to point at cid already"""
+        record = self.records.get(keyName)
+        return record is not None and bool(cid) and record.get("cid") == cid
+
+    def added(self, keyName: str, ipnsId: str) -> None:
+        with self.lock:
+            self.records[keyName] = {
+                "ipnsName": keyName, "ipnsId": ipnsId, "cid": "", "lastUpdate": int(time.time() * 1000),
+            }
+
+    def published(self, keyName: str, cid: str, ipnsId: str = None) -> None:
+        with self.lock:
+            record = self.records.setdefault(keyName, {"ipnsName": keyName, "ipnsId": ipnsId})
+            if ipnsId:
+                record["ipnsId"] = ipnsId
+            record["cid"] = cid
+            record["lastUpdate"] = int(time.time() * 1000)
+
+    def removed(self, keyName: str) -> None:
+        with self.lock:
+            self.records.pop(keyName, None)
+
+    def forget(self, keyName: str) -> None:
+        """drop what is known about the key's target, after a publish that may or may not have landed"""
+        with self.lock:
+            record = self.records.get(keyName)
+            if record is not None:
+                record["cid"] = None
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self.lock:
+            saved = {"refreshed_at": self.refreshed_at, "records": dict(self.records)}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w") as f:
+            json.dump(saved, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+
+def _data(result: dict):
+    """the data of a single-call result, raising its error instead"""
+    if "data" not in result:
+        raise Exception(result.get("error") or result)
+    return result["data"]
+
+
+def _saving(results, index: KeyIndex):
+    """pass results through, saving the index once they have all been consumed"""
+    try:
+        yield from results
+    finally:
+        if index is not None:
+            index.save()
+
+
+def refresh_if_stale(token: str, index: KeyIndex, transport: Transport = None) -> KeyIndex:
+    """fetch a full listing into index if it has none yet, or it is older than its max_age"""
+    if index.stale:
+        index.refresh(_data(get_ipns_records(token, transport)))
+        index.save()
+    return index
+
+
+def skipped_publish(index: KeyIndex, keyName: str, cid: str) -> dict:
+    """the answer of a publish that didn't need to happen"""
+    record = index.get(keyName) or {}
+    return {"Name": record.get("ipnsId"), "Value": f"/ipfs/{cid}"}
+
+
+def publish_record(token: str, cid: str, keyName: str, transport: Transport = None, index: KeyIndex = None, skip_unchanged: bool = False):
+    """
+    Publish one record, keeping index current.
+
+    With skip_unchanged, a key the index knows already points at cid is
+    not published again; the result then carries "skipped": True.
+    """
+    if skip_unchanged and index is not None:
+        refresh_if_stale(token, index, transport)
+        if index.unchanged(keyName, cid):
+            return {"data": skipped_publish(index, keyName, cid), "skipped": True}
+    try:
+        record = ipns_publish_record(token, cid, keyName, transport)
+    except Exception:
+        if index is not None:
+            index.forget(keyName)
+        raise
+    if index is not None:
+        if "data" in record:
+            index.published(keyName, cid, record["data"].get("Name"))
+        else:
+            index.forget(keyName)
+    return record
+
+
+def generate_keys(token: str, count: int, max_workers: int = None, transport: Transport = None, index: KeyIndex = None):
+    """
+    Create count IPNS keys concurrently.
+
+    :param max_workers: int, concurrent requests (default: the transport pool size)
+    :return: generator of {"index", "data"} or {"index", "error"} in completion order
+    """
+    transport = transport or get_default_transport()
+
+    def generate(_):
+        key = _data(ipns_generate_key(token, transport))
+        if index is not None:
+            index.added(key["ipnsName"], key["ipnsId"])
+        return key
+
+    return _saving(fan_out(generate, range(count), max_workers or transport.pool_maxsize, "index"), index)
+
+
+def publish_records(
+    token: str,
+    records: dict,
+    max_workers: int = None,
+    transport: Transport = None,
+    index: KeyIndex = None,
+    skip_unchanged: bool = False,
+):
+    """
+    Publish many keyName -> CID mappings concurrently.
+
+    With skip_unchanged, mappings the index says are already in place are
+    answered locally with "skipped": True, before any request is queued;
+    the index is listed once first if it is stale.
+
+    :param records: dict, keyName -> cid
+    :param max_workers: int, concurrent requests (default: the transport pool size)
+    :return: generator of {"keyName", "data"} or {"keyName", "error"} in completion order
+    """
+    transport = transport or get_default_transport()
+    if skip_unchanged and index is not None:
+        refresh_if_stale(token, index, transport)
+        changed = {k: cid for k, cid in records.items() if not index.unchanged(k, cid)}
+    else:
+        changed = records
+
+    def publish(keyName):
+        return _data(publish_record(token, changed[keyName], keyName, transport, index))
+
+    def results():
+        for keyName, cid in records.items():
+            if keyName not in changed:
+                yield {"keyName": keyName, "data": skipped_publish(index, keyName, cid), "skipped": True}
+        yield from fan_out(publish, changed, max_workers or transport.pool_maxsize, "keyName")
+
+    return _saving(results(), index)
+
+
+def remove_keys(token: str, keyNames, max_workers: int = None, transport: Transport = None, index: KeyIndex = None):
+    """
+    Remove many IPNS keys concurrently, duplicates removed once.
+
+    :param max_workers: int, concurrent requests (default: the transport pool size)
+    :return: generator of {"keyName", "data"} or {"keyName", "error"} in completion order
+    """
+    transport = transport or get_default_transport()
+
+    def remove(keyName):
+        removed = _data(remove_ipns_record(token, keyName, transport))
+        if index is not None:
+            index.removed(keyName)
+        return removed
+
+    return _saving(fan_out(remove, keyNames, max_workers or transport.pool_maxsize, "keyName"), index)
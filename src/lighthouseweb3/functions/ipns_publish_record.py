@@ -1,13 +1,14 @@
 from .config import Config
-import requests as req
+from .transport import Transport, get_default_transport
 
-def ipns_publish_record(token: str, cid: str, keyName: str):
+def ipns_publish_record(token: str, cid: str, keyName: str, transport: Transport = None):
+  transport = transport or get_default_transport()
   headers = {
     "Authorization": f"Bearer {token}",
   }
   url = f"{Config.lighthouse_api}/api/ipns/publish_record?cid={cid}&keyName={keyName}"
   try:
-    response = req.get(url, headers=headers)
+    response = transport.get(url, headers=headers)
   except Exception as e:
     raise Exception("Failed to ipns generate key")
 
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+from .unixfs import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_LINKS, build_directory_tree, file_dag
+from .utils import is_dir, walk_dir_tree, extract_file_name, extract_file_name_with_source
+
+
+def compute_cid(source: str, chunk_size: int = DEFAULT_CHUNK_SIZE, max_links: int = DEFAULT_MAX_LINKS):
+    """
+    Compute the CID /api/v0/add would return for a file or directory, offline.
+
+    Files are streamed in chunk_size chunks into the same balanced dag-pb
+    layout the upload node builds, so only one chunk is in memory at a time.
+
+    @params {source}: str, path to file or directory
+    @return: dict, the same Name/Hash/Size entry the upload would answer with
+    """
+    if is_dir(source):
+        file_list, root = walk_dir_tree(source)
+        files = {}
+        for path in file_list:
+            with open(path, "rb") as f:
+                cid, tsize, _ = file_dag(f, chunk_size, max_links)
+            files[extract_file_name_with_source(path, root)] = (cid, tsize)
+        if not files:
+            raise Exception(f"No files to upload in {source}")
+        block, _ = build_directory_tree(files)
+        name = next(iter(files)).split("/")[0]
+        return {"Name": name, "Hash": block.cid, "Size": str(block.tsize)}
+    with open(source, "rb") as f:
+        cid, tsize, _ = file_dag(f, chunk_size, max_links)
+    return {"Name": extract_file_name(source), "Hash": cid, "Size": str(tsize)}
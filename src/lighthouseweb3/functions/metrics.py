@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600,
+)
+
+
+def endpoint_of(url: str) -> str:
+    """metric label of a request url: its path, with gateway CIDs folded together"""
+    path = urlsplit(url).path or "/"
+    index = path.find("/ipfs/")
+    if index != -1:
+        return path[:index] + "/ipfs"
+    return path
+
+
+class Histogram:
+    """cumulative-bucket latency histogram in the Prometheus layout"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """estimate by linear interpolation inside the bucket holding q"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else lower
+            if count and seen + count >= rank:
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+            lower = upper
+        return lower
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+def _labels(labels: dict) -> str:
+    inner = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels.items()
+    )
+    return "{" + inner + "}" if inner else ""
+
+
+class Metrics:
+    """
+    In-memory registry of what a client did.
+
+    Keeps latency histograms per request endpoint and per client operation
+    (upload, downloadBlob, ...), bytes sent and received, retries and
+    errors. Cache statistics are pulled from registered collectors when
+    exported. Hooks receive every event as a dict as it happens.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.operations = {}
+        self.counters = {}
+        self.collectors = {}
+        self.hooks = []
+
+    def add_hook(self, hook) -> None:
+        """call hook(event: dict) on every request and operation"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook) -> None:
+        self.hooks.remove(hook)
+
+    def add_collector(self, name: str, collect) -> None:
+        """export the dict returned by collect() as lighthouse_cache_* values labelled cache=name"""
+        self.collectors[name] = collect
+
+    def _emit(self, event: dict) -> None:
+        for hook in list(self.hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                warnings.warn(f"metrics hook failed: {e}", RuntimeWarning)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def _histogram(self, table: dict, key) -> Histogram:
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    def observe_request(self, method: str, url: str, status: int, seconds: float, sent: int = 0, received: int = 0) -> None:
+        endpoint = endpoint_of(url)
+        with self.lock:
+            self._histogram(self.requests, (endpoint, method)).observe(seconds)
+        if sent:
+            self.inc("bytes_sent", sent, endpoint=endpoint)
+        if received:
+            self.inc("bytes_received", received, endpoint=endpoint)
+        if status is None or status >= 400:
+            self.inc("errors", 1, endpoint=endpoint, status=status or "error")
+        if self.hooks:
+            self._emit({
+                "type": "request", "method": method, "endpoint": endpoint,
+                "status": status, "seconds": seconds, "sent": sent, "received": received,
+            })
+
+    def received(self, url: str, count: int) -> None:
+        """bytes of a streamed response body, counted as they are consumed"""
+        self.inc("bytes_received", count, endpoint=endpoint_of(url))
+
+    def observe_operation(self, operation: str, seconds: float, error: Exception = None) -> None:
+        with self.lock:
+            self._histogram(self.operations, operation).observe(seconds)
+        if error is not None:
+            self.inc("operation_errors", 1, operation=operation)
+        if self.hooks:
+            self._emit({"type": "operation", "operation": operation, "seconds": seconds, "error": error})
+
+    @contextmanager
+    def timer(self, operation: str):
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self.observe_operation(operation, time.monotonic() - start, e)
+            raise
+        self.observe_operation(operation, time.monotonic() - start)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            snapshot = {
+                "requests": {
+                    f"{method} {endpoint}": h.to_dict()
+                    for (endpoint, method), h in self.requests.items()
+                },
+                "operations": {name: h.to_dict() for name, h in self.operations.items()},
+                "counters": {},
+            }
+            for (name, labels), value in self.counters.items():
+                total = snapshot["counters"].get(name, 0)
+                snapshot["counters"][name] = total + value
+        snapshot["caches"] = {name: collect() for name, collect in self.collectors.items()}
+        return snapshot
+
+    def prometheus(self, prefix: str = "lighthouse") -> str:
+        """registry in the Prometheus text exposition format"""
+        lines = []
+
+        def histogram(name: str, table: dict, label_of):
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for key, h in table.items():
+                labels = label_of(key)
+                cumulative = 0
+                for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f"{prefix}_{name}_bucket{_labels(dict(labels, le=bound))} {cumulative}")
+                lines.append(f"{prefix}_{name}_sum{_labels(labels)} {h.sum}")
+                lines.append(f"{prefix}_{name}_count{_labels(labels)} {h.count}")
+
+        with self.lock:
+            histogram("request_seconds", self.requests, lambda key: {"endpoint": key[0], "method": key[1]})
+            histogram("operation_seconds", self.operations, lambda key: {"operation": key})
+            names = sorted({name for name, _ in self.counters})
+            for name in names:
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for (counter, labels), value in self.counters.items():
+                    if counter == name:
+                        lines.append(f"{prefix}_{name}_total{_labels(dict(labels))} {value}")
+        for cache, collect in self.collectors.items():
+            for key, value in collect().items():
+                lines.append(f"{prefix}_cache_{key}{_labels({'cache': cache})} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests.clear()
+            self.operations.clear()
+            self.counters.clear()
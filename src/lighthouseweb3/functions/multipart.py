@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+import os
+import uuid
+from .bandwidth import get_bandwidth_limiter
+from .utils import remaining_size
+
+
+DEFAULT_CHUNK_SIZE = 1024*64
+
+
+def _quote(value: str) -> str:
+    return value.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+class MultipartEncoder:
+    """
+    Streaming multipart/form-data body.
+
+    Parts are pulled from their file handles in fixed-size chunks while the
+    request is being sent, so the whole body never sits in memory. A part
+    source may be a path, which is opened only when the encoder reaches it
+    and closed as soon as it has been sent, or an already open file object,
+    which is left open for the caller.
+    """
+
+    def __init__(self, parts, boundary: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE, tracker=None, throttle: bool = True):
+        """
+        :param parts: list of (field, filename, source, content_type)
+        :param boundary: str, multipart boundary (random by default)
+        :param chunk_size: int, size of the blocks read from each source
+        :param tracker: ProgressTracker, credited with the file bytes as they are sent
+        :param throttle: bool, pace file bytes by the upload bandwidth limit (False: the caller paces the body)
+        """
+        self.tracker = tracker
+        self.throttle = throttle
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.parts = list(parts)
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        # requests/urllib3 use `len` for Content-Length, None means chunked
+        self.len = self._total_length()
+        self._segments = self._iter_segments()
+        self._buffer = b""
+        # bytes handed to the connection so far
+        self.sent = 0
+
+    def _part_header(self, field: str, filename: str, content_type: str) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(field)}"; filename="{_quote(filename)}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("utf-8")
+
+    def _total_length(self):
+        total = len(self._closing())
+        for field, filename, source, content_type in self.parts:
+            if isinstance(source, (str, os.PathLike)):
+                size = os.path.getsize(source)
+            else:
+                size = remaining_size(source)
+            if size is None:
+                return None
+            total += len(self._part_header(field, filename, content_type)) + size + 2
+        return total
+
+    def _iter_segments(self):
+        for field, filename, source, content_type in self.parts:
+            yield self._part_header(field, filename, content_type)
+            owned = isinstance(source, (str, os.PathLike))
+            fileobj = open(source, "rb") if owned else source
+            try:
+                while True:
+                    chunk = fileobj.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if self.throttle:
+                        get_bandwidth_limiter().throttle_upload(len(chunk))
+                    if self.tracker is not None:
+                        self.tracker.update(len(chunk))
+                    yield chunk
+            finally:
+                if owned:
+                    fileobj.close()
+            yield b"\r\n"
+        yield self._closing()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data, self._buffer = b"".join([self._buffer, *self._segments]), b""
+            self.sent += len(data)
+            return data
+        while len(self._buffer) < size:
+            segment = next(self._segments, None)
+            if segment is None:
+                break
+            self._buffer = segment if not self._buffer else self._buffer + segment
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        self.sent += len(data)
+        return data
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        """close a path source left open by an interrupted upload"""
+        self._segments.close()
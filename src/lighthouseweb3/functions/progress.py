@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+
+class TransferCancelled(Exception):
+    """raised inside a transfer once its CancelToken is cancelled"""
+
+
+class CancelToken:
+    """cancels the transfers it is passed to, from any thread"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise TransferCancelled("Transfer cancelled")
+
+
+class ProgressTracker:
+    """
+    Counts the bytes of a transfer and reports them to a callback.
+
+    The callback gets a dict with done, total (None if unknown), percent,
+    speed (bytes/s since the previous report), average (bytes/s since the
+    start), eta (seconds, None if unknown) and finished. It is called at
+    most every `interval` seconds, plus once when the transfer finishes.
+    update() is thread-safe so concurrent parts of one transfer can share a
+    tracker, and raises TransferCancelled once the cancel token is set.
+    """
+
+    def __init__(self, total: int = None, callback=None, cancel: CancelToken = None, interval: float = 0.5, clock=time.monotonic):
+        self.total = total
+        self.callback = callback
+        self.cancel = cancel
+        self.interval = interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.done = 0
+        self.offset = 0
+        self.started = clock()
+        self.reported_at = self.started
+        self.reported_done = 0
+
+    def resume_from(self, done: int) -> None:
+        """count bytes already transferred before this run, without crediting them to the speed"""
+        with self.lock:
+            self.done = self.offset = self.reported_done = done
+
+    def _report(self, now: float, finished: bool) -> dict:
+        elapsed = now - self.started
+        since = now - self.reported_at
+        speed = (self.done - self.reported_done) / since if since > 0 else 0.0
+        average = (self.done - self.offset) / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total is not None:
+            remaining = max(0, self.total - self.done)
+            eta = 0.0 if not remaining else (remaining / average if average else None)
+        self.reported_at = now
+        self.reported_done = self.done
+        return {
+            "done": self.done,
+            "total": self.total,
+            "percent": 100.0 * self.done / self.total if self.total else None,
+            "speed": speed,
+            "average": average,
+            "elapsed": elapsed,
+            "eta": eta,
+            "finished": finished,
+        }
+
+    def update(self, count: int) -> None:
+        if self.cancel is not None:
+            self.cancel.raise_if_cancelled()
+        report = None
+        with self.lock:
+            self.done += count
+            if self.callback is not None:
+                now = self.clock()
+                if now - self.reported_at >= self.interval:
+                    report = self._report(now, False)
+        if report is not None:
+            self.callback(report)
+
+    def finish(self) -> None:
+        if self.callback is None:
+            return
+        with self.lock:
+            report = self._report(self.clock(), True)
+        self.callback(report)
+
+
+def tracker_for(total: int = None, on_progress=None, cancel: CancelToken = None, interval: float = 0.5):
+    """a ProgressTracker, or None when there is nothing to report or cancel"""
+    if on_progress is None and cancel is None:
+        return None
+    return ProgressTracker(total, on_progress, cancel, interval)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at rate tokens per second.
+
+    acquire() reserves tokens up front and sleeps until they are covered,
+    so callers are served in arrival order without polling. A rate of
+    None (or 0) disables the limit. The rate can be changed at any time.
+    """
+
+    def __init__(self, rate: float = None, burst: float = None, clock=time.monotonic, sleep=time.sleep):
+        """
+        :param rate: float, tokens added per second
+        :param burst: float, tokens that can accumulate while idle (default: one second worth)
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.paused_until = 0
+        self.updated = clock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: float = None, burst: float = None) -> None:
+        with self.lock:
+            self.rate = rate
+            self.capacity = burst if burst is not None else (rate or 0)
+            self.tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1) -> float:
+        """take amount tokens and return the seconds to wait before using them"""
+        with self.lock:
+            now = self.clock()
+            wait = max(0, self.paused_until - now)
+            if self.rate:
+                self._refill(now)
+                self.tokens -= amount
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def acquire(self, amount: float = 1) -> None:
+        wait = self.reserve(amount)
+        if wait > 0:
+            self.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        """hold every caller back for seconds, e.g. after a 429"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+class HostRateLimiter:
+    """One TokenBucket of requests per second for every host"""
+
+    def __init__(self, rate: float = None, burst: float = None, per_host: dict = None):
+        """
+        :param rate: float, requests per second allowed to each host
+        :param burst: float, requests allowed at once after an idle period
+        :param per_host: dict, host -> requests per second, overriding rate
+        """
+        self.rate = rate
+        self.burst = burst
+        self.per_host = per_host or {}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                rate = self.per_host.get(host, self.rate)
+                bucket = self.buckets[host] = TokenBucket(rate, self.burst)
+            return bucket
+
+    def reserve(self, url: str) -> float:
+        return self.bucket(url).reserve()
+
+    def acquire(self, url: str) -> None:
+        self.bucket(url).acquire()
+
+    def pause(self, url: str, seconds: float) -> None:
+        self.bucket(url).pause(seconds)
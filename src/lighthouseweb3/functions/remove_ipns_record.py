@@ -1,13 +1,14 @@
 from .config import Config
-import requests as req
+from .transport import Transport, get_default_transport
 
-def remove_ipns_record(token: str,  keyName: str):
+def remove_ipns_record(token: str,  keyName: str, transport: Transport = None):
+  transport = transport or get_default_transport()
   headers = {
     "Authorization": f"Bearer {token}",
   }
   url = f"{Config.lighthouse_api}/api/ipns/remove_key?keyName={keyName}"
   try:
-    response = req.delete(url, headers=headers)
+    response = transport.delete(url, headers=headers)
   except Exception as e:
     raise Exception("Failed to remove ipns record")
 
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+
+import hashlib
+import io
+import json
+import os
+from .axios import Axios
+from .batch_upload import put_block
+from .config import Config
+from .multipart import MultipartEncoder
+from .progress import ProgressTracker
+from .transport import Transport
+from .unixfs import file_block
+from .utils import extract_file_name
+
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 1024*1024*64
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".lighthouse", "uploads")
+
+
+class ChunkReader:
+    """reads at most `len` bytes from an underlying file object, hashing them as they pass"""
+
+    def __init__(self, fileobj, length: int):
+        self.fileobj = fileobj
+        self.len = length
+        self.remaining = length
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fileobj.read(size)
+        self.remaining -= len(data)
+        self.sha256.update(data)
+        return data
+
+
+class Journal:
+    """
+    On-disk checkpoint of the chunks of an upload acknowledged by the node.
+
+    The journal is rewritten atomically after every chunk so a crash can
+    never leave it half written.
+    """
+
+    def __init__(self, path: str, identity: dict):
+        self.path = path
+        self.identity = identity
+        self.chunks = {}
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+            if saved.get("identity") == identity:
+                self.chunks = {int(k): v for k, v in saved.get("chunks", {}).items()}
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def record(self, index: int, chunk: dict) -> None:
+        self.chunks[index] = chunk
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w") as f:
+            json.dump({"identity": self.identity, "chunks": self.chunks}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def default_journal_path(key: str) -> str:
+    return os.path.join(JOURNAL_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _changed_chunk(fileobj, length: int, sha256: str):
+    """
+    Check the next length bytes of fileobj against the sha256 journaled for them.
+
+    :return: None if they match and have been consumed, otherwise a readable
+        positioned at the start of the chunk to upload it again from
+    """
+    try:
+        position = fileobj.tell() if fileobj.seekable() else None
+    except Exception:
+        position = None
+    if position is None:
+        data = fileobj.read(length)
+        return None if hashlib.sha256(data).hexdigest() == sha256 else io.BytesIO(data)
+    reader = ChunkReader(fileobj, length)
+    while reader.read(1024*1024):
+        pass
+    if reader.sha256.hexdigest() == sha256:
+        return None
+    fileobj.seek(position)
+    return fileobj
+
+
+def upload_resumable(
+    source,
+    token: str,
+    tag: str = "",
+    filename: str = None,
+    size: int = None,
+    chunk_size: int = DEFAULT_UPLOAD_CHUNK_SIZE,
+    journal_path: str = None,
+    transport: Transport = None,
+    tracker: ProgressTracker = None,
+):
+    """
+    Upload a file chunk by chunk, resuming from a journal after a failure.
+
+    Every chunk is stored with /api/v0/add and its CID and sha256 recorded
+    in the journal; on restart, recorded chunks whose bytes still hash the
+    same are skipped and the others are uploaded again. Once all chunks are
+    stored, a UnixFS file node joining them is put on the node and its CID
+    is the CID of the whole upload.
+
+    @params {source}: str path to a file, or a readable object
+    @params {token}: str, lighthouse api token
+    @params {filename}: str, name of the upload (required for readable objects)
+    @params {size}: int, size of a readable object (default: measured by seeking)
+    @params {chunk_size}: int, size of each independently acknowledged chunk
+    @params {journal_path}: str, checkpoint file (default: under ~/.lighthouse/uploads)
+    @params {tracker}: ProgressTracker, credited with the bytes sent, starting from the journaled ones
+    """
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Encryption": "false",
+        "Mime-Type": "application/octet-stream",
+    }
+    owned = isinstance(source, str)
+    if owned and os.path.isdir(source):
+        raise Exception(f"Resumable uploads take a single file, {source} is a directory; use uploadBatch or sync for directories")
+    if owned:
+        stat = os.stat(source)
+        size = stat.st_size
+        filename = filename or extract_file_name(source)
+        identity = {"source": os.path.abspath(source), "size": size, "mtime": stat.st_mtime}
+        fileobj = open(source, "rb")
+    else:
+        if not filename:
+            raise Exception("filename is required to resume a readable object")
+        if size is None:
+            position = source.tell()
+            size = source.seek(0, 2) - position
+            source.seek(position)
+        identity = {"source": filename, "size": size}
+        fileobj = source
+    identity["chunk_size"] = chunk_size
+
+    journal = Journal(journal_path or default_journal_path(identity["source"]), identity)
+    axios = Axios(Config.lighthouse_node + "/api/v0/add", transport)
+    count = max(1, -(-size // chunk_size))
+    if tracker is not None:
+        tracker.total = size
+        tracker.resume_from(sum(chunk["Length"] for chunk in journal.chunks.values()))
+    try:
+        for index in range(count):
+            length = min(chunk_size, size - index * chunk_size)
+            chunk_source = fileobj
+            if index in journal.chunks:
+                chunk_source = _changed_chunk(fileobj, length, journal.chunks[index].get("Sha256"))
+                if chunk_source is None:
+                    continue
+                # same name and size but other bytes, the journal is stale from here on
+                if tracker is not None:
+                    tracker.resume_from(tracker.done - length)
+            reader = ChunkReader(chunk_source, length)
+            encoder = MultipartEncoder([(
+                "file", filename, reader, "application/octet-stream"
+            )], tracker=tracker)
+            hashData = axios.parse_add_response(axios.post_multipart(encoder, headers))
+            journal.record(index, {
+                "Hash": hashData.get("Hash"),
+                "Size": int(hashData.get("Size")),
+                "Length": length,
+                "Sha256": reader.sha256.hexdigest(),
+            })
+    finally:
+        fileobj.close()
+
+    chunks = [journal.chunks[index] for index in range(count)]
+    if count == 1:
+        hashData = {"Name": filename, "Hash": chunks[0]["Hash"], "Size": str(chunks[0]["Size"])}
+    else:
+        root = file_block([(c["Hash"], c["Size"], c["Length"]) for c in chunks])
+        put_block(root, token, transport)
+        hashData = {"Name": filename, "Hash": root.cid, "Size": str(root.tsize)}
+    journal.remove()
+
+    if len(tag):
+        _axios = Axios(Config.lighthouse_api + "/api/user/create_tag", transport)
+        _axios.post({
+            "tag": tag,
+            "cid": hashData.get("Hash")
+        }, {
+            "Authorization": f"Bearer {token}", })
+    return {"data": hashData}
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+MAX_RETRY_AFTER = 300
+
+
+def parse_retry_after(value) -> float:
+    """seconds to wait from a Retry-After header (delta-seconds or HTTP date), None if absent"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Caps retries to a share of the recent request volume.
+
+    Over the last `window` seconds, retries may add at most `ratio` of the
+    requests made plus `min_per_second` retries per second, so an outage
+    can't multiply the load sent to an already failing service.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 10, window: int = 10, clock=time.monotonic):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        # second -> [requests, retries]
+        self.slots = {}
+
+    def _slot(self):
+        now = int(self.clock())
+        for second in [s for s in self.slots if s <= now - self.window]:
+            del self.slots[second]
+        return self.slots.setdefault(now, [0, 0])
+
+    def deposit(self) -> None:
+        with self.lock:
+            self._slot()[0] += 1
+
+    def withdraw(self) -> bool:
+        """take one retry from the budget, False when it is spent"""
+        with self.lock:
+            slot = self._slot()
+            requests = sum(s[0] for s in self.slots.values())
+            retries = sum(s[1] for s in self.slots.values())
+            if retries >= self.min_per_second * self.window + self.ratio * requests:
+                return False
+            slot[1] += 1
+            return True
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before sending a request again.
+
+    Throttling (429) and server errors on idempotent requests are retried
+    with capped exponential backoff and full jitter, or after Retry-After
+    when the server sends one. Non-idempotent requests are only retried
+    when they were certainly not processed: on 429 or a failed connect.
+    Bodies that can't be replayed (streams, files) are never retried.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30,
+        statuses=RETRY_STATUSES,
+        budget: RetryBudget = None,
+        sleep=time.sleep,
+    ):
+        """
+        :param retries: int, extra attempts per request
+        :param backoff: float, base delay in seconds, doubled on every attempt
+        :param max_backoff: float, upper bound of the backoff delay
+        :param statuses: tuple, response codes worth retrying
+        :param budget: RetryBudget, shared cap on retries (default: 20% of recent requests)
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.statuses = statuses
+        self.budget = budget or RetryBudget()
+        self.sleep = sleep
+        self.retried = 0
+
+    def delay(self, attempt: int, retry_after: float = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, MAX_RETRY_AFTER)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _allowed(self, attempt: int, replayable: bool) -> bool:
+        if attempt >= self.retries or not replayable:
+            return False
+        if not self.budget.withdraw():
+            return False
+        self.retried += 1
+        return True
+
+    def retry_status(self, method: str, status: int, attempt: int, replayable: bool) -> bool:
+        if status not in self.statuses:
+            return False
+        if status != 429 and method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return self._allowed(attempt, replayable)
+
+    def retry_error(self, method: str, attempt: int, replayable: bool, connect_error: bool) -> bool:
+        if not connect_error and method.upper() not in IDEMPOTENT_METHODS:
+            return False
+        return self._allowed(attempt, replayable)
+
+
+def replayable(kwargs: dict) -> bool:
+    """whether the body of a request can be sent again as is"""
+    if kwargs.get("files"):
+        return False
+    data = kwargs.get("data")
+    return data is None or isinstance(data, (bytes, str, dict, list, tuple))
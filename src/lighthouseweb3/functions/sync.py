@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .axios import Axios
+from .batch_upload import (
+    DEFAULT_SHARD_BYTES, DEFAULT_SHARD_FILES, DEFAULT_WORKERS,
+    BatchUploadError, plan_shards, upload_shard, put_block,
+)
+from .config import Config
+from .transport import Transport
+from .unixfs import build_directory_tree, file_dag
+
+
+MANIFEST_DIR = os.path.join(os.path.expanduser("~"), ".lighthouse", "sync")
+
+
+class Manifest:
+    """
+    On-disk record of the last sync of a directory.
+
+    files maps every "root/sub/name" to its size, mtime (ns), local content
+    hash (the CID computed offline) and the CID and cumulative size the node
+    answered with. dirs holds the directory block CIDs already put.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+        self.files = {}
+        self.dirs = set()
+        self.root = None
+        try:
+            with open(path, "r") as f:
+                saved = json.load(f)
+            if saved.get("source") == source:
+                self.files = saved.get("files", {})
+                self.dirs = set(saved.get("dirs", []))
+                self.root = saved.get("root")
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w") as f:
+            json.dump({
+                "source": self.source,
+                "root": self.root,
+                "dirs": sorted(self.dirs),
+                "files": self.files,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+
+def default_manifest_path(source: str) -> str:
+    return os.path.join(MANIFEST_DIR, hashlib.sha256(source.encode("utf-8")).hexdigest() + ".json")
+
+
+def scan_tree(source: str):
+    """
+    :return: list of (name, path, size, mtime_ns) for every file under source;
+    symlinked directories aren't descended into, like os.walk and upload
+    """
+    source = source.rstrip("/") or "/"
+    base = os.path.basename(source)
+    files = []
+    stack = [(source, base)]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                name = f"{prefix}/{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, name))
+                elif entry.is_file(follow_symlinks=True):
+                    stat = entry.stat()
+                    files.append((name, entry.path, stat.st_size, stat.st_mtime_ns))
+    files.sort()
+    return files
+
+
+def _hash_file(path: str) -> tuple:
+    with open(path, "rb") as f:
+        cid, tsize, _ = file_dag(f)
+    return cid, tsize
+
+
+def sync(
+    source: str,
+    token: str,
+    tag: str = "",
+    manifest_path: str = None,
+    max_shard_bytes: int = DEFAULT_SHARD_BYTES,
+    max_shard_files: int = DEFAULT_SHARD_FILES,
+    max_workers: int = DEFAULT_WORKERS,
+    retries: int = 2,
+    transport: Transport = None,
+):
+    """
+    Upload only what changed in a directory since its last sync.
+
+    Files whose size and mtime match the manifest are not read at all.
+    Changed files are hashed locally on a worker pool; those whose content
+    is already known (touched, renamed or duplicated) are not sent either.
+    The rest is uploaded in shards, then the directory nodes are rebuilt and
+    only the ones not put by an earlier sync are stored.
+
+    @params {source}: str, path to a directory
+    @params {token}: str, lighthouse api token
+    @params {manifest_path}: str, manifest file (default: under ~/.lighthouse/sync)
+    @params {max_workers}: int, files hashed and shards uploaded at the same time
+    @return: dict, the root upload result with counts of uploaded, reused and removed files
+    """
+    start = time.monotonic()
+    source = os.path.abspath(source)
+    manifest = Manifest(manifest_path or default_manifest_path(source), source)
+    scanned = scan_tree(source)
+    if not scanned:
+        raise Exception(f"No files to upload in {source}")
+
+    previous = manifest.files
+    known = {entry["hash"]: (entry["cid"], entry["tsize"]) for entry in previous.values()}
+    current = {}
+    changed = []
+    for name, path, size, mtime in scanned:
+        entry = previous.get(name)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            current[name] = entry
+        else:
+            changed.append((name, path, size, mtime))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hashes = list(executor.map(lambda item: _hash_file(item[1]), changed))
+
+        # several new files may share content; send it once, as the first of them
+        first = {}
+        unique = []
+        pending = []
+        for (name, path, size, mtime), (local, tsize) in zip(changed, hashes):
+            entry = {"size": size, "mtime": mtime, "hash": local}
+            current[name] = entry
+            if local in known:
+                entry["cid"], entry["tsize"] = known[local]
+                continue
+            if local not in first:
+                first[local] = name
+                unique.append((name, path, size))
+            pending.append(name)
+
+        shards = plan_shards(unique, max_shard_bytes, max_shard_files)
+        reports = list(executor.map(
+            lambda item: upload_shard(item[0], item[1], token, retries, transport),
+            enumerate(shards),
+        ))
+
+    stored = {}
+    for report in reports:
+        stored.update(report.pop("entries", {}))
+    for name in pending:
+        uploaded = stored.get(first[current[name]["hash"]])
+        if uploaded is None:
+            del current[name]
+        else:
+            current[name]["cid"], current[name]["tsize"] = uploaded
+
+    failed = [report["index"] for report in reports if "error" in report]
+    if failed:
+        # keep what did get stored so the next sync doesn't send it again
+        manifest.files = current
+        manifest.save()
+        raise BatchUploadError(f"Shards {failed} failed to upload", reports)
+
+    root_block, blocks = build_directory_tree({
+        name: (entry["cid"], entry["tsize"]) for name, entry in current.items()
+    })
+    for block in blocks:
+        if block.cid not in manifest.dirs:
+            put_block(block, token, transport)
+    manifest.files = current
+    manifest.dirs = {block.cid for block in blocks}
+    manifest.root = root_block.cid
+    manifest.save()
+
+    if len(tag):
+        _axios = Axios(Config.lighthouse_api + "/api/user/create_tag", transport)
+        _axios.post({
+            "tag": tag,
+            "cid": root_block.cid
+        }, {
+            "Authorization": f"Bearer {token}", })
+    uploaded_bytes = sum(size for _, _, size in unique)
+    return {
+        "data": {
+            "Name": os.path.basename(source),
+            "Hash": root_block.cid,
+            "Size": str(root_block.tsize),
+        },
+        "uploaded": len(pending),
+        "unchanged": len(scanned) - len(changed),
+        "reused": len(changed) - len(pending),
+        "removed": len(set(previous) - set(current)),
+        "bytes": uploaded_bytes,
+        "shards": reports,
+        "seconds": time.monotonic() - start,
+    }
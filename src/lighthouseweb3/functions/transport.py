@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+import requests as req
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from .bandwidth import get_bandwidth_limiter
+from .gateways import GatewayPool
+from .metrics import Metrics, endpoint_of
+from .rate_limit import HostRateLimiter
+from .retry import RetryPolicy, parse_retry_after, replayable
+
+
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (10, 300)
+DEFAULT_POOL_SIZE = 10
+# requests in flight at once on an AsyncTransport
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+def _connect_failed(e: Exception) -> bool:
+    """
+    whether the request never reached the server: the connection timed out,
+    was refused or the host didn't resolve, so even a POST can be sent again
+    """
+    if isinstance(e, req.ConnectTimeout):
+        return True
+    cause = e.args[0] if e.args else None
+    # requests wraps urllib3's MaxRetryError, whose reason is the connect error
+    cause = getattr(cause, "reason", cause)
+    return isinstance(cause, (NewConnectionError, ConnectTimeoutError))
+
+
+class Transport:
+    """
+    Pooled HTTP transport shared by every call made through a Lighthouse client.
+
+    A single requests.Session keeps one keep-alive connection pool per host
+    (api, upload node, gateway), so repeated calls skip the TCP+TLS handshake.
+    Every request is paced by the optional per-host rate limiter and retried
+    according to the retry policy. Content is fetched through the gateway
+    pool.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_SIZE,
+        pool_maxsize: int = DEFAULT_POOL_SIZE,
+        timeout=DEFAULT_TIMEOUT,
+        retry: RetryPolicy = None,
+        rate_limit: HostRateLimiter = None,
+        metrics: Metrics = None,
+        gateways: GatewayPool = None,
+    ):
+        """
+        :param pool_connections: int, number of per-host pools to keep alive
+        :param pool_maxsize: int, maximum connections kept alive per host
+        :param timeout: float or (connect, read) tuple applied to every request
+        :param retry: RetryPolicy, backoff and retry budget (default: 3 retries, False to disable)
+        :param rate_limit: HostRateLimiter, requests per second allowed per host (default: unlimited)
+        :param metrics: Metrics, registry recording latency and bytes of every request (default: disabled)
+        :param gateways: GatewayPool, gateways content is downloaded from (default: Config.lighthouse_gateway)
+        """
+        self.gateways = gateways or GatewayPool()
+        self.timeout = timeout
+        self.retry = RetryPolicy() if retry is None else (retry or None)
+        self.rate_limit = rate_limit
+        self.metrics = metrics
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.session = req.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> req.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        # per-call override of the retry policy, False disables it
+        retry = kwargs.pop("retry", self.retry) or None
+        can_replay = replayable(kwargs)
+        if retry is not None:
+            retry.budget.deposit()
+        attempt = 0
+        while True:
+            if self.rate_limit is not None:
+                self.rate_limit.acquire(url)
+            try:
+                r = self._send(method, url, kwargs)
+            except (req.ConnectionError, req.Timeout) as e:
+                connect_error = _connect_failed(e)
+                if retry is None or not retry.retry_error(method, attempt, can_replay, connect_error):
+                    raise
+                self._retried(url)
+                retry.sleep(retry.delay(attempt))
+                attempt += 1
+                continue
+            if retry is None or not retry.retry_status(method, r.status_code, attempt, can_replay):
+                return r
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            delay = retry.delay(attempt, retry_after)
+            if r.status_code == 429 and self.rate_limit is not None:
+                # back off every caller of the host, not just this one
+                self.rate_limit.pause(url, delay)
+            r.close()
+            self._retried(url)
+            retry.sleep(delay)
+            attempt += 1
+
+    def _send(self, method: str, url: str, kwargs: dict) -> req.Response:
+        metrics = self.metrics
+        streamed = kwargs.get("stream", False)
+        if metrics is None:
+            r = self.session.request(method, url, **kwargs)
+        else:
+            start = time.monotonic()
+            try:
+                r = self.session.request(method, url, **kwargs)
+            except Exception:
+                metrics.observe_request(method, url, None, time.monotonic() - start)
+                raise
+            # a non-streamed body is already read here, a streamed one is counted as it is consumed
+            metrics.observe_request(
+                method, url, r.status_code, time.monotonic() - start,
+                body_size(r.request.body), 0 if streamed else len(r.content),
+            )
+        if streamed:
+            self._meter(r, url)
+        return r
+
+    def _meter(self, r: req.Response, url: str) -> None:
+        """count and throttle a streamed body as the caller consumes it"""
+        metrics = self.metrics
+        iter_content = r.iter_content
+
+        def metered(chunk_size=1, decode_unicode=False):
+            limiter = get_bandwidth_limiter()
+            size = limiter.download_read_size(chunk_size) if chunk_size else chunk_size
+            for chunk in iter_content(size, decode_unicode):
+                limiter.throttle_download(len(chunk))
+                if metrics is not None:
+                    metrics.received(url, len(chunk))
+                yield chunk
+        r.iter_content = metered
+
+    def _retried(self, url: str) -> None:
+        if self.metrics is not None:
+            self.metrics.inc("retries", 1, endpoint=endpoint_of(url))
+
+    def get(self, url: str, **kwargs) -> req.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> req.Response:
+        return self.request("POST", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> req.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> req.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def body_size(body) -> int:
+    """bytes of a request body sent so far"""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    sent = getattr(body, "sent", None)
+    return sent if sent is not None else (getattr(body, "len", None) or 0)
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """Transport used by calls that are not bound to a Lighthouse instance"""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+    return _default_transport
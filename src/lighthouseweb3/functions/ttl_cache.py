@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+# seconds a response stays fresh, per endpoint; 0 disables caching
+DEFAULT_TTLS = {
+    "file_info": 300,
+    "deal_status": 60,
+    "balance": 10,
+    "ipns_records": 30,
+    "tagged": 60,
+}
+DEFAULT_MAX_ENTRIES = 10000
+
+
+class _Flight:
+    """a load in progress that concurrent callers of the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    In-process cache of metadata responses with per-endpoint TTLs.
+
+    Entries are evicted least recently used first once max_entries is
+    reached. Concurrent misses on the same key are coalesced: one caller
+    runs the request and the others wait for its result (or its error,
+    which is not cached). Every caller gets its own copy of the response,
+    so changing it doesn't change the cache.
+
+    Any object with the same get_or_load/invalidate methods can be given
+    to a Lighthouse client instead.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttls: dict = None, clock=time.monotonic):
+        """
+        :param max_entries: int, responses kept in memory
+        :param ttls: dict, endpoint -> seconds, merged over DEFAULT_TTLS
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.flights = {}
+        # bumped by invalidate, a load that saw an older generation is not stored
+        self.generations = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get_or_load(self, endpoint: str, key, loader):
+        """cached response for (endpoint, key), calling loader() on a miss"""
+        ttl = self.ttls.get(endpoint)
+        if not ttl:
+            return loader()
+        full_key = (endpoint, key)
+        with self.lock:
+            entry = self.entries.get(full_key)
+            if entry is not None and entry[1] > self.clock():
+                self.entries.move_to_end(full_key)
+                self.hits += 1
+                return copy.deepcopy(entry[0])
+            flight = self.flights.get(full_key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[full_key] = _Flight()
+                generation = self._generation(full_key)
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.value)
+
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        else:
+            with self.lock:
+                if self._generation(full_key) == generation:
+                    self.entries[full_key] = (flight.value, self.clock() + ttl)
+                    self.entries.move_to_end(full_key)
+                    while len(self.entries) > self.max_entries:
+                        self.entries.popitem(last=False)
+            return copy.deepcopy(flight.value)
+        finally:
+            with self.lock:
+                if self.flights.get(full_key) is flight:
+                    del self.flights[full_key]
+            flight.done.set()
+
+    def _generation(self, full_key) -> tuple:
+        return self.generations.get(full_key, 0), self.generations.get(full_key[0], 0)
+
+    def invalidate(self, endpoint: str, key=None) -> None:
+        """drop one key of an endpoint, or all of them, including loads still in progress"""
+        with self.lock:
+            # callers arriving after this start a new load instead of joining one in progress
+            if key is not None:
+                self.generations[(endpoint, key)] = self.generations.get((endpoint, key), 0) + 1
+                self.entries.pop((endpoint, key), None)
+                self.flights.pop((endpoint, key), None)
+                return
+            self.generations[endpoint] = self.generations.get(endpoint, 0) + 1
+            for table in (self.entries, self.flights):
+                for full_key in [k for k in table if k[0] == endpoint]:
+                    del table[full_key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "size": len(self.entries)}
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+
+import base64
+import hashlib
+
+
+# largest block an IPFS node accepts through block/put
+MAX_BLOCK_SIZE = 1024*1024
+# /api/v0/add defaults: size-262144 chunker, balanced layout
+DEFAULT_CHUNK_SIZE = 1024*256
+DEFAULT_MAX_LINKS = 174
+
+UNIXFS_DIRECTORY = 1
+UNIXFS_FILE = 2
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_SHA2_256 = 0x12
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data: bytes, offset: int = 0):
+    """return (value, offset after the varint)"""
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def b58encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    out = ""
+    while number:
+        number, rem = divmod(number, 58)
+        out = _B58_ALPHABET[rem] + out
+    pad = len(data) - len(data.lstrip(b"\0"))
+    return "1" * pad + out
+
+
+def b58decode(text: str) -> bytes:
+    number = 0
+    for char in text:
+        number = number * 58 + _B58_ALPHABET.index(char)
+    body = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    pad = len(text) - len(text.lstrip("1"))
+    return b"\0" * pad + body
+
+
+def cid_to_bytes(cid: str) -> bytes:
+    """binary form of a CID as stored in a dag-pb link"""
+    if cid.startswith("Qm"):
+        return b58decode(cid)
+    if cid.startswith("b"):
+        text = cid[1:].upper()
+        return base64.b32decode(text + "=" * (-len(text) % 8))
+    if cid.startswith("z"):
+        return b58decode(cid[1:])
+    raise ValueError(f"Unsupported CID encoding: {cid}")
+
+
+def cid_multihash(cid: str) -> bytes:
+    """multihash of a CID, identical for the v0 and v1 forms of a block"""
+    raw = cid_to_bytes(cid)
+    if cid.startswith("Qm"):
+        return raw
+    _, offset = decode_varint(raw)      # version
+    _, offset = decode_varint(raw, offset)  # codec
+    return raw[offset:]
+
+
+def cid_v0(block: bytes) -> str:
+    digest = hashlib.sha256(block).digest()
+    return b58encode(bytes([_SHA2_256, len(digest)]) + digest)
+
+
+def _field(number: int, value: bytes) -> bytes:
+    # length-delimited protobuf field
+    return encode_varint(number << 3 | 2) + encode_varint(len(value)) + value
+
+
+def _varint_field(number: int, value: int) -> bytes:
+    return encode_varint(number << 3) + encode_varint(value)
+
+
+def encode_unixfs(kind: int, data: bytes = None, filesize: int = None, blocksizes=()) -> bytes:
+    out = _varint_field(1, kind)
+    if data is not None:
+        out += _field(2, data)
+    if filesize is not None:
+        out += _varint_field(3, filesize)
+    for size in blocksizes:
+        out += _varint_field(4, size)
+    return out
+
+
+def encode_pb_node(links, data: bytes) -> bytes:
+    """
+    dag-pb node in canonical form, links before data.
+
+    :param links: list of (cid, name, tsize)
+    """
+    out = b""
+    for cid, name, tsize in links:
+        link = _field(1, cid_to_bytes(cid)) + _field(2, name.encode("utf-8")) + _varint_field(3, tsize)
+        out += _field(2, link)
+    return out + _field(1, data)
+
+
+class Block:
+    """an encoded dag-pb block and the cumulative size of the DAG under it"""
+
+    def __init__(self, data: bytes, tsize: int):
+        self.data = data
+        self.cid = cid_v0(data)
+        self.tsize = tsize
+
+
+def directory_block(entries) -> Block:
+    """
+    UnixFS directory node.
+
+    :param entries: list of (name, cid, tsize)
+    """
+    links = sorted(
+        ((cid, name, tsize) for name, cid, tsize in entries),
+        key=lambda link: link[1].encode("utf-8"),
+    )
+    data = encode_pb_node(links, encode_unixfs(UNIXFS_DIRECTORY))
+    if len(data) > MAX_BLOCK_SIZE:
+        raise Exception(
+            "Directory has too many entries to build without HAMT sharding"
+        )
+    return Block(data, len(data) + sum(link[2] for link in links))
+
+
+def file_block(chunks) -> Block:
+    """
+    UnixFS file node joining already stored chunks in order.
+
+    :param chunks: list of (cid, tsize, filesize) for every chunk
+    """
+    links = [(cid, "", tsize) for cid, tsize, _ in chunks]
+    sizes = [filesize for _, _, filesize in chunks]
+    data = encode_pb_node(links, encode_unixfs(UNIXFS_FILE, filesize=sum(sizes), blocksizes=sizes))
+    if len(data) > MAX_BLOCK_SIZE:
+        raise Exception("Too many chunks to join in one node, use a larger chunk size")
+    return Block(data, len(data) + sum(tsize for _, tsize, _ in chunks))
+
+
+def build_directory_tree(files: dict):
+    """
+    Build the directory nodes linking already stored files.
+
+    :param files: dict, "root/sub/name" -> (cid, tsize) for every file
+    :return: (root Block, list of every directory Block, children before parents)
+    """
+    tree = {}
+    for path, (cid, tsize) in files.items():
+        parts = [part for part in path.split("/") if part]
+        node = tree
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if not isinstance(node, dict):
+                raise Exception(f"{path} is both a file and a directory")
+        node[parts[-1]] = (cid, tsize)
+    if len(tree) != 1 or not isinstance(next(iter(tree.values())), dict):
+        raise Exception("Files must share a single root directory")
+
+    blocks = []
+
+    def build(node: dict) -> Block:
+        entries = []
+        for name, child in node.items():
+            if isinstance(child, dict):
+                child_block = build(child)
+                entries.append((name, child_block.cid, child_block.tsize))
+            else:
+                entries.append((name, child[0], child[1]))
+        block = directory_block(entries)
+        blocks.append(block)
+        return block
+
+    root = build(next(iter(tree.values())))
+    return root, blocks
+
+
+class FileDagBuilder:
+    """
+    Builds the balanced UnixFS DAG of a file chunk by chunk.
+
+    Chunks are fed in order; only the links not yet grouped under a parent
+    are kept, at most max_links per tree level, so memory stays bounded
+    whatever the file size. Every encoded block is passed to on_block.
+    """
+
+    def __init__(self, max_links: int = DEFAULT_MAX_LINKS, on_block=None):
+        self.max_links = max_links
+        self.on_block = on_block
+        # levels[0] holds leaves, levels[n] nodes of height n; (cid, tsize, filesize)
+        self.levels = [[]]
+
+    def _emit(self, block: Block) -> None:
+        if self.on_block is not None:
+            self.on_block(block)
+
+    def _parent(self, children) -> tuple:
+        sizes = [filesize for _, _, filesize in children]
+        block = Block(
+            encode_pb_node(
+                [(cid, "", tsize) for cid, tsize, _ in children],
+                encode_unixfs(UNIXFS_FILE, filesize=sum(sizes), blocksizes=sizes),
+            ),
+            0,
+        )
+        block.tsize = len(block.data) + sum(tsize for _, tsize, _ in children)
+        self._emit(block)
+        return (block.cid, block.tsize, sum(sizes))
+
+    def _push(self, level: int, entry: tuple) -> None:
+        if level == len(self.levels):
+            self.levels.append([])
+        self.levels[level].append(entry)
+        if len(self.levels[level]) == self.max_links:
+            children, self.levels[level] = self.levels[level], []
+            self._push(level + 1, self._parent(children))
+
+    def add_chunk(self, chunk: bytes) -> None:
+        data = encode_pb_node([], encode_unixfs(UNIXFS_FILE, data=chunk or None, filesize=len(chunk)))
+        block = Block(data, len(data))
+        self._emit(block)
+        self._push(0, (block.cid, block.tsize, len(chunk)))
+
+    def finish(self) -> tuple:
+        """:return: (cid, tsize, filesize) of the root"""
+        if not any(self.levels):
+            self.add_chunk(b"")
+        level = 0
+        while True:
+            entries = self.levels[level]
+            higher = any(self.levels[level + 1:])
+            if not higher and len(entries) == 1:
+                return entries[0]
+            self.levels[level] = []
+            if entries:
+                self._push(level + 1, self._parent(entries))
+            level += 1
+
+
+def read_chunks(fileobj, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """yield full chunk_size chunks like the node's chunker, only the last may be short"""
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        while len(chunk) < chunk_size:
+            more = fileobj.read(chunk_size - len(chunk))
+            if not more:
+                break
+            chunk += more
+        yield chunk
+
+
+def file_dag(fileobj, chunk_size: int = DEFAULT_CHUNK_SIZE, max_links: int = DEFAULT_MAX_LINKS, on_block=None) -> tuple:
+    """:return: (cid, tsize, filesize) of the file read from fileobj"""
+    builder = FileDagBuilder(max_links, on_block)
+    for chunk in read_chunks(fileobj, chunk_size):
+        builder.add_chunk(chunk)
+    return builder.finish()
@@ -5,13 +5,30 @@ from typing import Dict, List, Tuple
 from .axios import Axios
 from .utils import is_dir, walk_dir_tree, extract_file_name, NamedBufferedReader
 from .config import Config
+from .get_uploads import iter_uploads
+from .local_cid import compute_cid
+from .progress import ProgressTracker
+from .transport import Transport
 
 
-def upload(source, token: str, tag: str = ""):
+def is_stored(cid: str, token: str, transport: Transport = None) -> bool:
+    """
+    whether cid is among the uploads of the account behind token; content
+    other accounts stored doesn't count, it wouldn't show up in our uploads
+    """
+    try:
+        return any(record.get("cid") == cid for record in iter_uploads(token, transport=transport))
+    except Exception:
+        return False
+
+
+def upload(source, token: str, tag: str = "", transport: Transport = None, skip_existing: bool = False, tracker: ProgressTracker = None):
     """
     Deploy a file or directory to the lighthouse network
     @params {source}: str, path to file or directory
     @params {token}: str, lighthouse api token
+    @params {skip_existing}: bool, compute the CID locally and skip sending content lighthouse already has
+    @params {tracker}: ProgressTracker, credited with the bytes of every file sent
     """
     # create headers
     headers = {
@@ -22,10 +39,16 @@ def upload(source, token: str, tag: str = ""):
     }
     try:
         # create http object
-        axios = Axios(Config.lighthouse_node + "/api/v0/add")
+        axios = Axios(Config.lighthouse_node + "/api/v0/add", transport)
         # create list of files to upload
 
-        if (isinstance(source, str)):
+        hashData = None
+        if isinstance(source, str) and skip_existing:
+            local = compute_cid(source)
+            if is_stored(local.get("Hash"), token, transport):
+                hashData = local
+
+        if hashData is None and isinstance(source, str):
             file_dict = {}
 
             # check if source is a directory
@@ -39,12 +62,12 @@ def upload(source, token: str, tag: str = ""):
                 file_dict["files"] = [source]
                 file_dict["is_dir"] = False
                 file_dict["path"] = source
-            hashData = axios.post_files(file_dict, headers)
-        else:
-            hashData = axios.post_blob(source, source.name, headers)
+            hashData = axios.post_files(file_dict, headers, tracker)
+        elif hashData is None:
+            hashData = axios.post_blob(source, source.name, headers, tracker)
 
         if len(tag):
-            _axios = Axios(Config.lighthouse_api + "/api/user/create_tag")
+            _axios = Axios(Config.lighthouse_api + "/api/user/create_tag", transport)
             data = _axios.post({
                 "tag": tag,
                 "cid": hashData.get("Hash")
@@ -56,7 +79,7 @@ def upload(source, token: str, tag: str = ""):
         raise e
 
 
-def uploadBlob(source:  BufferedReader, filename: str, token: str, tag: str = ""):
+def uploadBlob(source:  BufferedReader, filename: str, token: str, tag: str = "", transport: Transport = None, tracker: ProgressTracker = None):
     """
     Upload a Buffer or readable Object
     @params {source}: str, path to file or directory
@@ -71,12 +94,12 @@ def uploadBlob(source:  BufferedReader, filename: str, token: str, tag: str = ""
     }
     try:
         # create http object
-        axios = Axios(Config.lighthouse_node + "/api/v0/add")
+        axios = Axios(Config.lighthouse_node + "/api/v0/add", transport)
         # create list of files to upload
 
-        hashData = axios.post_blob(source, filename, headers)
+        hashData = axios.post_blob(source, filename, headers, tracker)
         if len(tag):
-            _axios = Axios(Config.lighthouse_api + "/api/user/create_tag")
+            _axios = Axios(Config.lighthouse_api + "/api/user/create_tag", transport)
             data = _axios.post({
                 "tag": tag,
                 "cid": hashData.get("Hash")
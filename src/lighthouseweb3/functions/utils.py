@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 from io import BufferedReader, BytesIO
+import functools
+import importlib
 import os
 
 
@@ -14,6 +16,43 @@ class NamedBufferedReader:
 
     def close(self):
         self.reader.close()
+
+
+class hybridmethod:
+    """
+    Method callable on the class or on an instance; the first argument is
+    the instance, or None when called on the class.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        functools.update_wrapper(self, func)
+
+    def __get__(self, obj, objtype=None):
+        @functools.wraps(self.func)
+        def bound(*args, **kwargs):
+            return self.func(obj, *args, **kwargs)
+        return bound
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access,
+    so its own imports aren't paid by code paths that never use it.
+    """
+
+    def __init__(self, name: str, package: str = None):
+        self._name = name
+        self._package = package
+
+    def _load(self):
+        # import_module holds the import lock and caches in sys.modules, so concurrent first uses are safe
+        return importlib.import_module(self._name, self._package)
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+
 # walk path and return list of file paths
 
 
@@ -73,8 +112,41 @@ def read_files_for_upload(
     return file_list
 
 
+def parts_for_upload(
+    files
+):
+    """multipart parts for MultipartEncoder; files are opened lazily while sending"""
+    part_list = []
+    for file in files["files"]:
+        if files["is_dir"]:
+            name = extract_file_name_with_source(file, files["path"])
+        else:
+            name = extract_file_name(file)
+        part_list.append(("file", name, file, "application/octet-stream"))
+    return part_list
+
+
 def close_files_after_upload(
     files
 ) -> None:
     for file in files:
         file[1][1].close()
+
+
+def remaining_size(fileobj):
+    """bytes left to read from fileobj, or None if it can't be known upfront"""
+    if getattr(fileobj, "len", None) is not None:
+        return fileobj.len
+    try:
+        return os.fstat(fileobj.fileno()).st_size - fileobj.tell()
+    except Exception:
+        pass
+    try:
+        if fileobj.seekable():
+            position = fileobj.tell()
+            end = fileobj.seek(0, 2)
+            fileobj.seek(position)
+            return end - position
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Lighthouse upload node, API and gateway.
+
+Serves the endpoints the SDK calls with realistic answers (CIDs are the
+ones /api/v0/add would compute), plus configurable latency, bandwidth and
+error injection. Used by the offline tests and the benchmarks:
+
+    with MockLighthouse(latency=0.02).start() as mock:
+        Lighthouse("token").upload("file")
+        print(mock.stats())
+
+start(process=True) runs the server in a child process so it doesn't
+share memory or the GIL with the code being measured.
+"""
+
+import http.server
+import io
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, parse_qs
+from urllib.request import Request, urlopen
+from src.lighthouseweb3.functions.config import Config
+from src.lighthouseweb3.functions.unixfs import build_directory_tree, cid_v0, file_dag
+
+
+DEFAULT_OPTIONS = {
+    # seconds added before every answer
+    "latency": 0.0,
+    # bytes per second for request and response bodies, None for unlimited
+    "bandwidth": None,
+    # share of requests failing with error_status
+    "error_rate": 0.0,
+    "error_status": 503,
+    # run the route before answering with an injected error, like a server failing after doing the work
+    "error_after_route": False,
+    # Retry-After sent with injected errors, None for none
+    "retry_after": None,
+    # records per files_uploaded page
+    "page_size": 100,
+    "seed": None,
+}
+_IO_BLOCK = 1024*64
+
+
+class _State:
+    def __init__(self, options: dict):
+        self.options = dict(DEFAULT_OPTIONS, **options)
+        self.random = random.Random(self.options["seed"])
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.blocks = {}
+        self.uploads = []
+        self.tags = {}
+        self.keys = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.connections = 0
+        self.requests = {}
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "connections": self.connections,
+                "requests": dict(self.requests),
+                "errors": self.errors,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "objects": len(self.blobs),
+            }
+
+
+def _parse_multipart(content_type: str, body: bytes):
+    """list of (filename, data) of a multipart/form-data body"""
+    boundary = re.search(r"boundary=\"?([^\";]+)", content_type).group(1).encode()
+    parts = []
+    for chunk in body.split(b"--" + boundary)[1:]:
+        if chunk.startswith(b"--"):
+            break
+        head, _, data = chunk.partition(b"\r\n\r\n")
+        match = re.search(rb'filename="([^"]*)"', head)
+        parts.append((match.group(1).decode() if match else "", data[:-2]))
+    return parts
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out as separate writes; don't let delayed ACKs stall them
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def state(self) -> _State:
+        return self.server.state
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def _pace(self, count: int):
+        bandwidth = self.state.options["bandwidth"]
+        if bandwidth:
+            time.sleep(count / bandwidth)
+
+    def _read_body(self) -> bytes:
+        out = io.BytesIO()
+        length = self.headers.get("Content-Length")
+        if length is not None:
+            remaining = int(length)
+            while remaining:
+                data = self.rfile.read(min(remaining, _IO_BLOCK))
+                if not data:
+                    break
+                out.write(data)
+                remaining -= len(data)
+                self._pace(len(data))
+        elif self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().strip().split(b";")[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                out.write(self.rfile.read(size))
+                self.rfile.readline()
+                self._pace(size)
+        with self.state.lock:
+            self.state.bytes_in += out.tell()
+        return out.getvalue()
+
+    def _send(self, status: int, body=b"", content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        elif isinstance(body, str):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        view = memoryview(body)
+        for start in range(0, len(view), _IO_BLOCK):
+            piece = view[start:start + _IO_BLOCK]
+            self.wfile.write(piece)
+            self._pace(len(piece))
+        with self.state.lock:
+            self.state.bytes_out += len(body)
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        body = self._read_body() if self.command in ("POST", "PUT") else b""
+        if url.path.startswith("/__mock/"):
+            return self._control(url.path, body)
+
+        endpoint = "/ipfs" if url.path.startswith("/ipfs/") else url.path
+        options = self.state.options
+        with self.state.lock:
+            self.state.requests[endpoint] = self.state.requests.get(endpoint, 0) + 1
+            failing = options["error_rate"] and self.state.random.random() < options["error_rate"]
+            if failing:
+                self.state.errors += 1
+        if options["latency"]:
+            time.sleep(options["latency"])
+        route = _ROUTES.get(url.path)
+        if route is None and url.path.startswith("/ipfs/"):
+            route = _Handler._gateway
+        if failing:
+            if options["error_after_route"] and route is not None:
+                # the route does its work but its answer is dropped
+                self._send = lambda *args, **kwargs: None
+                route(self, url.path, query, body)
+                del self._send
+            headers = {}
+            if options["retry_after"] is not None:
+                headers["Retry-After"] = str(options["retry_after"])
+            return self._send(options["error_status"], {"error": "injected"}, headers=headers)
+
+        if route is None:
+            return self._send(404, {"error": f"no route {url.path}"})
+        route(self, url.path, query, body)
+
+    do_GET = do_POST = do_DELETE = do_HEAD = _handle
+
+    def _control(self, path: str, body: bytes):
+        # control calls come from urllib on a connection of their own, keep it out of the stats
+        with self.state.lock:
+            self.state.connections -= 1
+        if path == "/__mock/stats":
+            return self._send(200, self.state.stats())
+        if path == "/__mock/config":
+            with self.state.lock:
+                self.state.options.update(json.loads(body or b"{}"))
+            return self._send(200, self.state.options)
+        if path == "/__mock/put":
+            cid = file_dag(io.BytesIO(body))[0]
+            with self.state.lock:
+                self.state.blobs[cid] = body
+            return self._send(200, {"cid": cid})
+        if path == "/__mock/reset":
+            with self.state.lock:
+                self.state.reset_stats()
+            return self._send(200, {})
+        return self._send(404, {"error": f"no control route {path}"})
+
+    # upload node
+
+    def _add(self, path, query, body):
+        parts = _parse_multipart(self.headers["Content-Type"], body)
+        lines, files = [], {}
+        for name, data in parts:
+            cid, tsize, _ = file_dag(io.BytesIO(data))
+            with self.state.lock:
+                self.state.blobs[cid] = data
+                self.state.uploads.append({"cid": cid, "fileName": name, "fileSizeInBytes": str(len(data))})
+            lines.append({"Name": name, "Hash": cid, "Size": str(tsize)})
+            files[name] = (cid, tsize)
+        if len(files) > 1 or any("/" in name for name in files):
+            root, blocks = build_directory_tree(files)
+            prefix = next(iter(files)).split("/")[0]
+            for block in blocks:
+                with self.state.lock:
+                    self.state.blocks[block.cid] = block.data
+            lines.append({"Name": prefix, "Hash": root.cid, "Size": str(root.tsize)})
+        self._send(200, "".join(json.dumps(line) + "\n" for line in lines), "text/plain")
+
+    def _block_put(self, path, query, body):
+        data = _parse_multipart(self.headers["Content-Type"], body)[0][1]
+        cid = cid_v0(data)
+        with self.state.lock:
+            self.state.blocks[cid] = data
+        self._send(200, {"Key": cid, "Size": len(data)})
+
+    # gateway
+
+    def _gateway(self, path, query, body):
+        cid = path[len("/ipfs/"):]
+        data = self.state.blobs.get(cid)
+        if data is None:
+            return self._send(404, "not found", "text/plain")
+        headers = {"Accept-Ranges": "bytes"}
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(data) - 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(data)}"
+            return self._send(206, data[start:end + 1], "application/octet-stream", headers)
+        self._send(200, data, "application/octet-stream", headers)
+
+    # api
+
+    def _file_info(self, path, query, body):
+        cid = query.get("cid")
+        data = self.state.blobs.get(cid)
+        if data is None:
+            return self._send(404, {"error": "Not Found"})
+        self._send(200, {
+            "cid": cid,
+            "fileSizeInBytes": str(len(data)),
+            "mimeType": "application/octet-stream",
+            "encryption": False,
+        })
+
+    def _deal_status(self, path, query, body):
+        self._send(200, [{"DealID": 1, "chainDealID": 1, "storageProvider": "f01", "dealStatus": "Active"}])
+
+    def _files_uploaded(self, path, query, body):
+        uploads = [dict(u, id=str(i)) for i, u in enumerate(self.state.uploads)]
+        last = query.get("lastKey")
+        start = int(last) + 1 if last not in (None, "None") else 0
+        page = uploads[start:start + self.state.options["page_size"]]
+        self._send(200, {"fileList": page, "totalFiles": len(uploads)})
+
+    def _balance(self, path, query, body):
+        used = sum(len(data) for data in self.state.blobs.values())
+        self._send(200, {"dataLimit": 1024**4, "dataUsed": used})
+
+    def _create_tag(self, path, query, body):
+        fields = {k: v[0] for k, v in parse_qs(body.decode()).items()}
+        self.state.tags[fields.get("tag")] = fields.get("cid")
+        self._send(200, {"data": "success"})
+
+    def _tag_details(self, path, query, body):
+        self._send(200, {"data": {"tag": query.get("tag"), "cid": self.state.tags.get(query.get("tag"))}})
+
+    def _generate_key(self, path, query, body):
+        name = uuid.uuid4().hex
+        key = {"ipnsName": name, "ipnsId": "k51" + name, "publicKey": "0x" + name, "cid": "", "lastUpdate": int(time.time() * 1000)}
+        with self.state.lock:
+            self.state.keys[name] = key
+        self._send(200, {"ipnsName": name, "ipnsId": key["ipnsId"]})
+
+    def _publish(self, path, query, body):
+        key = self.state.keys.get(query.get("keyName"))
+        if key is None:
+            return self._send(400, {"error": [{"message": "Something went wrong."}]})
+        key["cid"] = query.get("cid")
+        key["lastUpdate"] = int(time.time() * 1000)
+        self._send(200, {"Name": key["ipnsId"], "Value": f"/ipfs/{key['cid']}"})
+
+    def _records(self, path, query, body):
+        self._send(200, list(self.state.keys.values()))
+
+    def _remove_key(self, path, query, body):
+        key = self.state.keys.pop(query.get("keyName"), None)
+        if key is None:
+            return self._send(400, {"error": [{"message": "Something went wrong."}]})
+        self._send(200, {"Keys": [{"Name": key["ipnsName"], "Id": key["ipnsId"]}]})
+
+    def _api_key(self, path, query, body):
+        self._send(200, uuid.uuid4().hex)
+
+
+_ROUTES = {
+    "/api/v0/add": _Handler._add,
+    "/api/v0/block/put": _Handler._block_put,
+    "/api/lighthouse/file_info": _Handler._file_info,
+    "/api/lighthouse/deal_status": _Handler._deal_status,
+    "/api/user/files_uploaded": _Handler._files_uploaded,
+    "/api/user/user_data_usage": _Handler._balance,
+    "/api/user/create_tag": _Handler._create_tag,
+    "/api/user/get_tag_details": _Handler._tag_details,
+    "/api/ipns/generate_key": _Handler._generate_key,
+    "/api/ipns/publish_record": _Handler._publish,
+    "/api/ipns/get_ipns_records": _Handler._records,
+    "/api/ipns/remove_key": _Handler._remove_key,
+    "/api/auth/create_api_key": _Handler._api_key,
+}
+
+
+def _make_server(options: dict) -> http.server.ThreadingHTTPServer:
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.state = _State(options)
+    return server
+
+
+def _serve(options: dict, conn):
+    server = _make_server(options)
+    conn.send(server.server_port)
+    server.serve_forever()
+
+
+class MockLighthouse:
+    """the mock server, in a thread of this process or in a child process"""
+
+    def __init__(self, **options):
+        """:param options: see DEFAULT_OPTIONS"""
+        self.options = options
+        self.server = None
+        self.process = None
+        self.port = None
+        self._saved = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, process: bool = False, patch_config: bool = True) -> "MockLighthouse":
+        if process:
+            parent, child = multiprocessing.Pipe()
+            self.process = multiprocessing.Process(target=_serve, args=(self.options, child), daemon=True)
+            self.process.start()
+            self.port = parent.recv()
+        else:
+            self.server = _make_server(self.options)
+            self.port = self.server.server_port
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        if not patch_config:
+            return self
+        self._saved = (Config.lighthouse_api, Config.lighthouse_node, Config.lighthouse_gateway)
+        Config.lighthouse_api = Config.lighthouse_node = self.url
+        Config.lighthouse_gateway = f"{self.url}/ipfs"
+        return self
+
+    def stop(self) -> None:
+        if self._saved is not None:
+            Config.lighthouse_api, Config.lighthouse_node, Config.lighthouse_gateway = self._saved
+            self._saved = None
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def _call(self, path: str, payload=None) -> dict:
+        data = payload if isinstance(payload, bytes) else None if payload is None else json.dumps(payload).encode()
+        # a payload is always POSTed, also when it is empty content for put()
+        request = Request(self.url + path, data=data, method="GET" if payload is None else "POST")
+        try:
+            with urlopen(request) as r:
+                return json.loads(r.read())
+        except HTTPError as e:
+            raise Exception(f"mock control call {path} failed: {e.read().decode()}")
+
+    def stats(self) -> dict:
+        """connections opened, requests per endpoint, injected errors and bytes moved"""
+        return self._call("/__mock/stats")
+
+    def put(self, data: bytes) -> str:
+        """store content on the mock gateway directly, returning its CID"""
+        return self._call("/__mock/put", data)["cid"]
+
+    def reset_stats(self) -> None:
+        self._call("/__mock/reset")
+
+    def configure(self, **options) -> dict:
+        """change latency, bandwidth or error injection while running"""
+        return self._call("/__mock/config", options)
+
+    @contextmanager
+    def configured(self, **options):
+        previous = {key: value for key, value in self._call("/__mock/config", {}).items() if key in options}
+        self.configure(**options)
+        try:
+            yield self
+        finally:
+            self.configure(**previous)
+
+    def __enter__(self):
+        if self.port is None:
+            self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
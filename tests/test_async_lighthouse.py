@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import os
+import io
+import asyncio
+import resource
+import tempfile
+import unittest
+from src.lighthouseweb3 import AsyncLighthouse, HostRateLimiter, RetryPolicy
+from .setup import parse_env
+from .mock_server import MockLighthouse
+
+
+class TestAsyncLighthouse(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        """setup test environment"""
+        parse_env()
+
+    async def test_deal_status(self):
+        """test async getDealStatus function"""
+        async with AsyncLighthouse(os.environ.get("LIGHTHOUSE_TOKEN")) as l:
+            res = await l.getDealStatus(
+                "QmT9shXpKcn4HRbJhXJ1ZywzwjEo2QWbxAx4SVgW4eYKjG")
+            self.assertIsInstance(res, list, "data is a list")
+            self.assertIsInstance(res[0].get(
+                "DealID"), int, "DealID is Int")
+
+    async def test_concurrent_file_info(self):
+        """test concurrent getFileInfo calls share one client"""
+        async with AsyncLighthouse(os.environ.get("LIGHTHOUSE_TOKEN"), max_concurrency=2) as l:
+            res = await asyncio.gather(*[
+                l.getFileInfo("Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW")
+                for _ in range(4)
+            ])
+            for info in res:
+                self.assertEqual(info.get("cid"), "Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW", "cid is matching")
+
+    async def test_upload_and_download_blob(self):
+        """test async uploadBlob then downloadBlob round trip"""
+        async with AsyncLighthouse(os.environ.get("LIGHTHOUSE_TOKEN")) as l:
+            res = await l.uploadBlob(io.BytesIO(b"tests/testdir/"), "async.txt")
+            self.assertIsInstance(res.get("data").get("Hash"), str, "Hash is a str")
+            dist = io.BytesIO()
+            downloaded = await l.downloadBlob(dist, res.get("data").get("Hash"))
+            self.assertEqual(downloaded.get("data").get("Size"), len(b"tests/testdir/"))
+            self.assertEqual(dist.getvalue(), b"tests/testdir/")
+
+
+class TestAsyncLighthouseMock(unittest.TestCase):
+
+    def test_client_reused_across_event_loops(self):
+        """test one AsyncLighthouse serves requests from successive asyncio.run calls"""
+        with MockLighthouse() as mock:
+            l = AsyncLighthouse("token")
+            for _ in range(2):
+                self.assertIn("dataLimit", asyncio.run(l.getBalance()))
+            asyncio.run(l.close())
+            self.assertEqual(mock.stats().get("requests").get("/api/user/user_data_usage"), 2)
+
+    def test_upload_directory_opens_files_lazily(self):
+        """test a directory with more files than descriptors allowed uploads, one file open at a time"""
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        with MockLighthouse(), tempfile.TemporaryDirectory() as tmp:
+            for i in range(300):
+                with open(os.path.join(tmp, f"{i}.txt"), "w") as f:
+                    f.write(str(i))
+
+            async def upload():
+                async with AsyncLighthouse("token") as l:
+                    return await l.upload(tmp)
+
+            resource.setrlimit(resource.RLIMIT_NOFILE, (128, hard))
+            try:
+                res = asyncio.run(upload())
+            finally:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        self.assertIsInstance(res.get("data").get("Hash"), str)
+
+    def test_download_retried_and_rate_limited(self):
+        """test streamed downloads go through the rate limiter and retry failed responses"""
+        with MockLighthouse() as mock:
+            cid = mock.put(b"content")
+            rate_limit = HostRateLimiter(1000)
+
+            async def download():
+                async with AsyncLighthouse(
+                    "token", retry=RetryPolicy(retries=2, backoff=0), rate_limit=rate_limit,
+                ) as l:
+                    dist = io.BytesIO()
+                    await l.downloadBlob(dist, cid)
+                    return dist.getvalue()
+
+            with mock.configured(error_rate=1.0, error_status=503):
+                with self.assertRaises(Exception):
+                    asyncio.run(download())
+            self.assertEqual(mock.stats().get("errors"), 3)
+            self.assertEqual(asyncio.run(download()), b"content")
+            self.assertEqual(len(rate_limit.buckets), 1)
+
+    def test_generate_key_not_retried(self):
+        """test a failed async generate_key answer is not retried"""
+        with MockLighthouse() as mock:
+            async def call(method):
+                async with AsyncLighthouse("token") as l:
+                    return await getattr(l, method)()
+
+            with mock.configured(error_rate=1.0, error_status=503, error_after_route=True):
+                self.assertNotIn("data", asyncio.run(call("generateKey")))
+            self.assertEqual(mock.stats().get("requests").get("/api/ipns/generate_key"), 1)
+            self.assertEqual(len(asyncio.run(call("getAllKeys")).get("data")), 1, "one key created")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import asyncio
+import io
+import time
+import unittest
+from src.lighthouseweb3 import AsyncLighthouse, Lighthouse, get_bandwidth_limiter
+from src.lighthouseweb3.functions.bandwidth import BandwidthLimiter
+from src.lighthouseweb3.functions.multipart import MultipartEncoder
+from .mock_server import MockLighthouse
+
+
+class TestBandwidth(unittest.TestCase):
+
+    def tearDown(self):
+        Lighthouse.setBandwidthLimit()
+
+    def test_limits(self):
+        """test limits can be changed and lifted at runtime"""
+        limiter = BandwidthLimiter(upload=100)
+        self.assertEqual(limiter.limits, {"upload": 100, "download": None})
+        self.assertEqual(limiter.download_read_size(1024*1024), 1024*1024, "unthrottled reads keep their size")
+        limiter.set_limits(download=1000)
+        self.assertEqual(limiter.limits, {"upload": None, "download": 1000})
+        self.assertEqual(limiter.download_read_size(1024*1024), 1024*64)
+
+    def test_upload_is_throttled(self):
+        """test upload bodies are paced by the process wide limit"""
+        Lighthouse.setBandwidthLimit(upload=1024*1024, burst=1024*64)
+        self.assertEqual(get_bandwidth_limiter().limits["upload"], 1024*1024)
+        encoder = MultipartEncoder([("file", "a", io.BytesIO(b"x" * 1024*256), "application/octet-stream")])
+        start = time.monotonic()
+        while encoder.read(1024*64):
+            pass
+        self.assertGreaterEqual(time.monotonic() - start, 0.15, "256KB at 1MB/s")
+
+    def test_downloads_are_throttled(self):
+        """test whole-body downloads, sync and async, are paced by the download limit"""
+        with MockLighthouse() as mock:
+            data = b"x" * 1024*256
+            cid = mock.put(data)
+            Lighthouse.setBandwidthLimit(download=1024*1024, burst=1024*64)
+
+            start = time.monotonic()
+            self.assertEqual(Lighthouse("token").download(cid)[0], data)
+            self.assertGreaterEqual(time.monotonic() - start, 0.15, "256KB at 1MB/s")
+
+            async def download():
+                async with AsyncLighthouse("token") as l:
+                    return await l.download(cid)
+            Lighthouse.setBandwidthLimit()
+            asyncio.run(download())  # unthrottled first, so client start up isn't timed
+            Lighthouse.setBandwidthLimit(download=1024*1024, burst=1024*64)
+            start = time.monotonic()
+            self.assertEqual(asyncio.run(download())[0], data)
+            self.assertGreaterEqual(time.monotonic() - start, 0.15, "256KB at 1MB/s")
+
+    def test_async_upload_is_throttled(self):
+        """test AsyncLighthouse upload bodies are paced by the upload limit"""
+        with MockLighthouse():
+            async def upload():
+                async with AsyncLighthouse("token") as l:
+                    return await l.uploadBlob(io.BytesIO(b"x" * 1024*256), "blob.bin")
+            asyncio.run(upload())  # unthrottled first, so client start up isn't timed
+
+            Lighthouse.setBandwidthLimit(upload=1024*1024, burst=1024*64)
+            start = time.monotonic()
+            res = asyncio.run(upload())
+            self.assertGreaterEqual(time.monotonic() - start, 0.15, "256KB at 1MB/s")
+        self.assertIsInstance(res.get("data").get("Hash"), str)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import http.server
+import json
+import os
+import tempfile
+import threading
+import unittest
+from src.lighthouseweb3 import Lighthouse, Transport
+from src.lighthouseweb3.functions.batch_upload import plan_shards, upload_shard
+from src.lighthouseweb3.functions.config import Config
+from src.lighthouseweb3.functions.unixfs import build_directory_tree, directory_block
+from .setup import parse_env
+
+
+class _AddNode(http.server.BaseHTTPRequestHandler):
+    """/api/v0/add answering with the given status, or with the files renamed"""
+    protocol_version = "HTTP/1.1"
+    status = 200
+    calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        type(self).calls += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"Name": "renamed", "Hash": "QmUNLLsPACCz1vLxQVkXqqLX5R1X345qqfHbsf67hvA3Nn", "Size": "4"}).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestBatchUpload(unittest.TestCase):
+
+    def test_plan_shards(self):
+        """test shards are bounded by size and file count"""
+        files = [(f"root/{i}", f"/tmp/{i}", 10) for i in range(7)]
+        files.append(("root/big", "/tmp/big", 500))
+        shards = plan_shards(files, max_shard_bytes=35, max_shard_files=2)
+        self.assertEqual([len(shard) for shard in shards], [2, 2, 2, 1, 1])
+        self.assertEqual(shards[-1][0][0], "root/big", "oversized file gets its own shard")
+
+    def test_build_directory_tree(self):
+        """test stitched directory nodes link every file"""
+        empty = directory_block([])
+        self.assertEqual(empty.cid, "QmUNLLsPACCz1vLxQVkXqqLX5R1X345qqfHbsf67hvA3Nn", "empty directory cid")
+        root, blocks = build_directory_tree({
+            "root/a": (empty.cid, 4),
+            "root/sub/b": (empty.cid, 4),
+        })
+        self.assertEqual(len(blocks), 2, "one block per directory")
+        self.assertIs(blocks[-1], root, "root is built last")
+        self.assertEqual(root.tsize, len(root.data) + 4 + blocks[0].tsize, "cumulative size")
+
+    def test_upload_shard_failures(self):
+        """test a shard is resent after a failed request but fails at once on a mismatched answer"""
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _AddNode)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        saved = Config.lighthouse_node
+        Config.lighthouse_node = f"http://127.0.0.1:{server.server_port}"
+        try:
+            with tempfile.NamedTemporaryFile() as f:
+                shard = [("root/a", f.name, 0)]
+                transport = Transport(retry=False)
+                _AddNode.status, _AddNode.calls = 503, 0
+                report = upload_shard(0, shard, "token", retries=2, transport=transport)
+                self.assertEqual((report.get("attempts"), _AddNode.calls), (3, 3))
+                _AddNode.status, _AddNode.calls = 200, 0
+                report = upload_shard(0, shard, "token", retries=2, transport=transport)
+                self.assertEqual((report.get("attempts"), _AddNode.calls), (1, 1))
+                self.assertIn("no entry for root/a", report.get("error"))
+                transport.close()
+        finally:
+            Config.lighthouse_node = saved
+            server.shutdown()
+
+    def test_upload_batch(self):
+        """test uploadBatch function"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        res = l.uploadBatch("tests/", max_shard_files=4, max_workers=2)
+        self.assertIsInstance(res.get("data").get("Hash"), str, "Hash is a str")
+        self.assertGreater(len(res.get("shards")), 1, "upload is sharded")
+        for shard in res.get("shards"):
+            self.assertGreater(shard.get("throughput"), 0, "throughput reported")
+
+
+if __name__ == "__main__":
+    unittest.main()
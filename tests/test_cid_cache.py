@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+import os
+import io
+import time
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from src.lighthouseweb3 import Lighthouse, CidCache
+from .mock_server import MockLighthouse
+from .setup import parse_env
+
+
+class _EvictedCache(CidCache):
+    """cache whose entries are evicted by another process as soon as they are written"""
+
+    def load(self, cid):
+        return None
+
+
+class TestCidCache(unittest.TestCase):
+
+    def test_hit_and_miss(self):
+        """test entries are published on success and counted"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CidCache(tmp)
+            self.assertIsNone(cache.get("cid"), "empty cache misses")
+            with cache.writer("cid", "text/plain") as entry:
+                entry.write(b"data")
+            self.assertEqual(cache.get("cid"), b"data")
+            self.assertEqual(cache.content_type("cid"), "text/plain")
+            out = io.BytesIO()
+            self.assertTrue(cache.copy_to("cid", out))
+            self.assertEqual(out.getvalue(), b"data")
+            self.assertEqual(cache.stats(), {"hits": 2, "misses": 1, "evictions": 0})
+
+    def test_failed_write_is_discarded(self):
+        """test a failing download never becomes an entry"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CidCache(tmp)
+            with self.assertRaises(ValueError):
+                with cache.writer("cid") as entry:
+                    entry.write(b"partial")
+                    raise ValueError()
+            self.assertIsNone(cache.get("cid"))
+            self.assertEqual([n for n in os.listdir(tmp) if n.startswith(".tmp")], [], "no temp file left")
+
+    def test_lru_eviction(self):
+        """test least recently used entries are evicted first"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CidCache(tmp, max_bytes=10, use_mmap=True)
+            for cid in ("a", "b"):
+                with cache.writer(cid) as entry:
+                    entry.write(b"12345")
+                os.utime(cache.path(cid), (time.time() - 10, time.time() - 10))
+            cache.get("a")
+            with cache.writer("c") as entry:
+                entry.write(b"12345")
+            self.assertIsNone(cache.load("b"), "b was least recently used")
+            self.assertEqual(cache.load("a")[:], b"12345")
+
+    def test_keys_stay_inside_directory(self):
+        """test keys with path separators or dots are stored and evicted inside the cache directory"""
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = os.path.join(tmp, "cache")
+            cache = CidCache(directory, max_bytes=10)
+            for key in ("../escape", "Qmdir/file.txt", ".."):
+                with cache.writer(key) as entry:
+                    entry.write(b"12345")
+                self.assertEqual(os.path.dirname(cache.path(key)), directory)
+            self.assertEqual(os.listdir(tmp), ["cache"], "nothing written outside")
+            self.assertEqual(cache.load(".."), b"12345")
+            self.assertIsNone(cache.load("../escape"), "evicted by its hashed name")
+            self.assertEqual(cache.path("bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"),
+                             os.path.join(directory, "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"))
+
+    def test_download_entry_evicted_in_between(self):
+        """test download returns the content when the fresh entry is evicted before it is read"""
+        data = os.urandom(300000)
+        with MockLighthouse() as mock, tempfile.TemporaryDirectory() as tmp:
+            cid = mock.put(data)
+            for use_mmap in (False, True):
+                l = Lighthouse("token", cache=_EvictedCache(os.path.join(tmp, str(use_mmap)), use_mmap=use_mmap))
+                body, _ = l.download(cid)
+                self.assertEqual(bytes(body), data)
+
+    def test_concurrent_stats(self):
+        """test hits and misses counted from many threads add up"""
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CidCache(tmp)
+            with cache.writer("cid") as entry:
+                entry.write(b"data")
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda i: cache.get("cid" if i % 2 else "missing"), range(2000)))
+            self.assertEqual(cache.stats(), {"hits": 1000, "misses": 1000, "evictions": 0})
+
+    def test_download_cached(self):
+        """test repeat download is served from the cache"""
+        parse_env()
+        with tempfile.TemporaryDirectory() as tmp:
+            l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"), cache=CidCache(tmp))
+            first, _ = l.download("Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW")
+            second, _ = l.download("Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW")
+            self.assertEqual(first, second)
+            self.assertEqual(l.cache.stats().get("hits"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ import io
 import unittest
 from src.lighthouseweb3 import Lighthouse
 from src.lighthouseweb3.functions.utils import NamedBufferedReader
+from src.lighthouseweb3.functions.fanout import fan_out
 from .setup import parse_env
 
 
@@ -26,3 +27,22 @@ class TestDealStatus(unittest.TestCase):
         self.assertIsInstance(res, list, "data is a list")
         self.assertIsInstance(res[0].get(
             "DealID"), int, "DealID is Int")
+
+    def test_deal_status_many(self):
+        """test getDealStatusMany deduplicates and reports per cid"""
+        cid = "QmT9shXpKcn4HRbJhXJ1ZywzwjEo2QWbxAx4SVgW4eYKjG"
+        res = list(Lighthouse.getDealStatusMany([cid, cid]))
+        self.assertEqual(len(res), 1, "duplicates are looked up once")
+        self.assertEqual(res[0].get("cid"), cid)
+        self.assertIsInstance(res[0].get("data"), list, "data is a list")
+
+    def test_fan_out_errors(self):
+        """test a failing key doesn't stop the batch"""
+        def lookup(key):
+            if key == 3:
+                raise Exception("boom")
+            return key * 2
+        res = {r["key"]: r for r in fan_out(lookup, range(10), max_workers=3)}
+        self.assertEqual(len(res), 10)
+        self.assertEqual(res[3].get("error"), "boom")
+        self.assertEqual(res[4].get("data"), 8)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import threading
+import time
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.download_manager import DownloadManager
+from .mock_server import MockLighthouse
+
+
+class RecordingManager(DownloadManager):
+    """downloads nothing, records the order and concurrency of the calls"""
+
+    def __init__(self, *args, fail=(), **kwargs):
+        super().__init__(*args, sleep=lambda s: None, backoff=0, **kwargs)
+        self.fail = dict.fromkeys(fail, 1)
+        self.order = []
+        self.running = 0
+        self.peak = 0
+        self.count_lock = threading.Lock()
+
+    def _download(self, job):
+        with self.count_lock:
+            self.order.append(job.cid)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.01)
+        with self.count_lock:
+            self.running -= 1
+        if self.fail.get(job.cid):
+            self.fail[job.cid] -= 1
+            raise Exception("gateway timeout")
+        return {"data": {"Hash": job.cid, "Size": 10, "Path": job.path}}
+
+
+class TestDownloadManager(unittest.TestCase):
+
+    def test_download_many(self):
+        """test downloadMany writes every CID to its path against the mock"""
+        with MockLighthouse().start(), tempfile.TemporaryDirectory() as tmp:
+            l = Lighthouse("token")
+            blobs = {}
+            for i in range(12):
+                path = os.path.join(tmp, f"source{i}")
+                with open(path, "wb") as f:
+                    f.write(os.urandom(5000 + i))
+                blobs[l.upload(path).get("data").get("Hash")] = path
+            items = [(cid, os.path.join(tmp, "out", f"{i}.bin")) for i, cid in enumerate(blobs)]
+            manager = l.downloadMany(items, max_workers=4)
+            results = list(manager)
+            self.assertEqual(len(results), 12)
+            for (cid, path) in items:
+                with open(path, "rb") as f, open(blobs[cid], "rb") as g:
+                    self.assertEqual(f.read(), g.read())
+            stats = manager.stats()
+            self.assertEqual(stats.get("completed"), 12)
+            self.assertEqual(stats.get("bytes"), sum(os.path.getsize(p) for p in blobs.values()))
+            self.assertGreater(stats.get("throughput"), 0)
+
+    def test_priority_order(self):
+        """test higher priorities start first, ties in input order"""
+        manager = RecordingManager([("a", "a", 0), ("b", "b", 5), ("c", "c", 1), ("d", "d", 5)], max_workers=1)
+        list(manager)
+        self.assertEqual(manager.order, ["b", "d", "c", "a"])
+
+    def test_per_host_limit(self):
+        """test per_host caps the downloads running against the gateway"""
+        manager = RecordingManager([(str(i), str(i)) for i in range(20)], max_workers=8, per_host=3)
+        self.assertEqual(len(list(manager)), 20)
+        self.assertEqual(manager.peak, 3)
+
+    def test_per_host_limit_large_queue(self):
+        """test a saturated host doesn't make every scheduling pass walk the whole queue"""
+
+        class NoopManager(DownloadManager):
+            def _download(self, job):
+                return {"data": {"Hash": job.cid, "Size": 0, "Path": job.path}}
+
+        manager = NoopManager([(str(i), str(i)) for i in range(20000)], max_workers=8, per_host=2)
+        start = time.monotonic()
+        self.assertEqual(sum(1 for _ in manager), 20000)
+        self.assertLess(time.monotonic() - start, 30)
+
+    def test_retry_queue(self):
+        """test failures are retried from the retry queue, then reported"""
+        manager = RecordingManager([("flaky", "x"), ("broken", "y"), ("fine", "z")], max_workers=2, retries=2, fail=["flaky"])
+        manager.fail["broken"] = 10
+        results = {res.get("cid"): res for res in manager}
+        self.assertIn("data", results.get("flaky"))
+        self.assertEqual(results.get("broken").get("attempts"), 3)
+        self.assertEqual([job.cid for job in manager.failed], ["broken"])
+        self.assertEqual(manager.stats().get("retried"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
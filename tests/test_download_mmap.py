@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from .setup import parse_env
+
+
+class TestDownloadMmap(unittest.TestCase):
+    def setUp(self) -> None:
+        """setup test environment"""
+        parse_env()
+
+    def test_download_to_path(self):
+        """test downloadToPath function"""
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "image.png")
+            res = l.downloadToPath("QmPT11PFFQQD3mT6BdwfSHQGHRdF8ngmRmcvxtSBiddWEa", path)
+            self.assertEqual(res.get("data").get("Size"), 123939, "File Size dont match")
+            self.assertEqual(os.path.getsize(path), 123939, "File Size dont match")
+            self.assertFalse(os.path.exists(f"{path}.part"), "temp file renamed")
+
+    def test_download_mmap(self):
+        """test downloadMmap function"""
+        view = Lighthouse.downloadMmap("Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW")
+        self.assertEqual(memoryview(view).tobytes(), b'tests/testdir/', "data doesn't match")
+        view.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
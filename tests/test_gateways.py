@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import time
+import unittest
+from src.lighthouseweb3 import Lighthouse, GatewayPool
+from .mock_server import MockLighthouse
+
+
+class TestGateways(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data = os.urandom(50000)
+        self.slow = MockLighthouse().start(patch_config=False)
+        self.fast = MockLighthouse().start(patch_config=False)
+        self.cid = self.slow.put(self.data)
+        self.fast.put(self.data)
+        self.gateways = [f"{self.slow.url}/ipfs", f"{self.fast.url}/ipfs"]
+
+    def tearDown(self):
+        self.fast.stop()
+        self.slow.stop()
+        self.dir.cleanup()
+
+    def test_hedged_download(self):
+        """test a slow gateway is hedged and the faster answer wins"""
+        self.slow.configure(latency=1.0)
+        pool = GatewayPool(self.gateways, hedge_delay=0.05)
+        l = Lighthouse("token", gateways=pool)
+        self.assertEqual(pool.ranked()[0], self.gateways[0], "untried gateways keep their order")
+        start = time.monotonic()
+        body, _ = l.download(self.cid)
+        self.assertEqual(body, self.data)
+        self.assertLess(time.monotonic() - start, 0.8)
+        self.assertEqual(pool.hedged, 1)
+        self.assertEqual(pool.stats().get(self.gateways[1]).get("wins"), 1)
+        # the slow gateway's late answer still counts, and steers the next request
+        time.sleep(1.1)
+        self.assertEqual(pool.ranked()[0], self.gateways[1])
+
+    def test_slow_body_not_hedged(self):
+        """test a gateway with a slow body but quick headers is neither hedged nor ranked by body time"""
+        data = os.urandom(400000)
+        self.slow.put(data)
+        cid = self.fast.put(data)
+        self.slow.configure(bandwidth=1000000)
+        pool = GatewayPool(self.gateways, hedge_delay=0.1)
+        body, _ = Lighthouse("token", gateways=pool).download(cid)
+        self.assertEqual(body, data)
+        self.assertEqual(pool.hedged, 0)
+        self.assertLess(pool.stats().get(self.gateways[0]).get("average"), 0.1)
+        self.assertEqual(self.fast.stats().get("requests").get("/ipfs"), None)
+
+    def test_failover(self):
+        """test a failing gateway is failed over at once and taken out of rotation"""
+        self.slow.configure(error_rate=1.0, error_status=503)
+        pool = GatewayPool(self.gateways, hedge_delay=5, failure_threshold=2)
+        l = Lighthouse("token", gateways=pool)
+        target = os.path.join(self.dir.name, "out.bin")
+        for _ in range(3):
+            l.downloadToPath(self.cid, target)
+            with open(target, "rb") as f:
+                self.assertEqual(f.read(), self.data)
+        stats = pool.stats()
+        self.assertFalse(stats.get(self.gateways[0]).get("healthy"))
+        self.assertEqual(stats.get(self.gateways[0]).get("errors"), 2)
+        self.assertEqual(self.slow.stats().get("errors"), 2, "no transport retries on a failing gateway")
+        self.assertEqual(stats.get(self.gateways[1]).get("wins"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
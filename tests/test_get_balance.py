@@ -20,7 +20,7 @@ class TestGetBalance(unittest.TestCase):
         """test get_balance function with invalid token"""
         parse_env()
         l = Lighthouse('invalid_token')
-        res = l.getBalance()
-        self.assertIsInstance(res, dict, "res is a dict")
-        self.assertIn("authentication failed", str(res).lower())
+        with self.assertRaises(Exception) as context:
+            l.getBalance()
+        self.assertIn("authentication failed", str(context.exception).lower())
 
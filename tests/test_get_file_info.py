@@ -15,6 +15,15 @@ class TestGetFileInfo(unittest.TestCase):
         self.assertIsInstance(res, dict, "data is a dict")
         self.assertEqual(res.get("cid"),"Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW", "cid is matching")
     
+    def test_get_file_info_many(self):
+        """test getFileInfoMany returns a result per distinct cid"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        cid = "Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW"
+        res = list(l.getFileInfoMany([cid, cid], max_workers=2))
+        self.assertEqual(len(res), 1, "duplicates are looked up once")
+        self.assertEqual(res[0].get("data").get("cid"), cid, "cid is matching")
+
     def test_get_file_info_invalid_token(self):
         """test get_upload with invalid token"""
         with self.assertRaises(Exception) as context:
@@ -25,7 +34,6 @@ class TestGetFileInfo(unittest.TestCase):
     def test_get_file_info_invalid_cid(self):
         parse_env()
         l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
-        res = l.getFileInfo("invalid_cid")
-        self.assertIsInstance(res, dict, "res is dict")
-        self.assertIsInstance(res.get('error'), dict, "error is dict")
-        self.assertEqual(res.get("error").get('message'), 'Not Found', 'cid not found')
\ No newline at end of file
+        with self.assertRaises(Exception) as context:
+            l.getFileInfo("invalid_cid")
+        self.assertIn("not found", str(context.exception).lower(), "cid not found")
\ No newline at end of file
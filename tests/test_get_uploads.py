@@ -25,6 +25,15 @@ class TestGetUploads(unittest.TestCase):
         self.assertIsInstance(res.get("fileList"), list, "data is a list")
         self.assertIsInstance(res.get('totalFiles'), int, "totalFiles is an int")
     
+    def test_iter_uploads(self):
+        """test iterUploads walks past the first page"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        first = l.getUploads()
+        ids = [upload.get("id") for upload in l.iterUploads()]
+        self.assertEqual(len(ids), len(set(ids)), "no upload is repeated")
+        self.assertEqual(len(ids), first.get("totalFiles"), "every upload is listed")
+
     def test_get_upload_with_invalid_token(self):
         """test get_upload function with invalid token"""
         parse_env()
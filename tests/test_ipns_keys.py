@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse, KeyIndex
+from .mock_server import MockLighthouse
+
+
+class TestIpnsKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockLighthouse().start()
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "keys.json")
+
+    def tearDown(self):
+        self.mock.stop()
+        self.dir.cleanup()
+
+    def test_bulk_keys(self):
+        """test generateKeys, publishRecords and removeKeys with per-item results"""
+        l = Lighthouse("token", key_index=KeyIndex(self.path))
+        keys = [res.get("data").get("ipnsName") for res in l.generateKeys(12, max_workers=4)]
+        self.assertEqual(len(set(keys)), 12)
+        self.assertEqual(sorted(l.key_index.names()), sorted(keys))
+
+        records = {key: "QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh" for key in keys}
+        records["unknown"] = "QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh"
+        results = {res.get("keyName"): res for res in l.publishRecords(records)}
+        self.assertIn("error", results.get("unknown"))
+        self.assertEqual(results.get(keys[0]).get("data").get("Value"), "/ipfs/QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh")
+        self.assertEqual(l.key_index.get(keys[0]).get("cid"), "QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh")
+
+        removed = list(l.removeKeys(keys[:5] + keys[:2]))
+        self.assertEqual(len(removed), 5)
+        self.assertEqual(len(l.key_index), 7)
+        self.assertEqual(self.mock.stats().get("requests").get("/api/ipns/get_ipns_records"), None)
+
+        saved = KeyIndex(self.path)
+        self.assertEqual(sorted(saved.names()), sorted(keys[5:]))
+
+    def test_generate_key_not_retried(self):
+        """test a failed generate_key answer is not retried, so no duplicate keys are created"""
+        l = Lighthouse("token")
+        with self.mock.configured(error_rate=1.0, error_status=503, error_after_route=True):
+            self.assertNotIn("data", l.generateKey())
+            results = list(l.generateKeys(3))
+        self.assertTrue(all("error" in res for res in results))
+        self.assertEqual(self.mock.stats().get("requests").get("/api/ipns/generate_key"), 4)
+        self.assertEqual(len(Lighthouse("token").getAllKeys().get("data")), 4, "one key per call")
+
+    def test_get_all_keys_refreshes_index(self):
+        """test getAllKeys replaces the index with the listing"""
+        l = Lighthouse("token")
+        l.generateKey()
+        other = Lighthouse("token")
+        self.assertEqual(len(other.key_index), 0)
+        other.getAllKeys()
+        self.assertEqual(len(other.key_index), 1)
+        self.assertTrue(other.key_index.loaded)
+
+    def test_skip_unchanged_publish(self):
+        """test skip_unchanged publishes only keys whose target changed, listing once"""
+        l = Lighthouse("token")
+        keys = [res.get("data").get("ipnsName") for res in Lighthouse("token").generateKeys(6)]
+        old, new = "QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh", "QmSjPx5sWJmT21iYVP59A6kGLk8AjuuNDKkQLP5wENpHA5"
+        list(Lighthouse("token").publishRecords({key: old for key in keys}))
+
+        records = {key: (new if i < 2 else old) for i, key in enumerate(keys)}
+        results = {res.get("keyName"): res for res in l.publishRecords(records, skip_unchanged=True)}
+        self.assertEqual(sum(1 for res in results.values() if res.get("skipped")), 4)
+        self.assertEqual(results.get(keys[5]).get("data").get("Value"), f"/ipfs/{old}")
+        requests = self.mock.stats().get("requests")
+        self.assertEqual(requests.get("/api/ipns/get_ipns_records"), 1)
+        self.assertEqual(requests.get("/api/ipns/publish_record"), 6 + 2)
+
+        self.assertTrue(l.publishRecord(new, keys[0], skip_unchanged=True).get("skipped"))
+        self.assertNotIn("skipped", l.publishRecord(old, keys[0], skip_unchanged=True))
+        self.assertTrue(l.publishRecord(old, keys[0], skip_unchanged=True).get("skipped"))
+        self.assertEqual(self.mock.stats().get("requests").get("/api/ipns/get_ipns_records"), 1)
+
+    def test_stale_index_is_listed_again(self):
+        """test an index older than max_age is refreshed before a skip-unchanged publish"""
+        now = [1000.0]
+        l = Lighthouse("token", key_index=KeyIndex(max_age=60, clock=lambda: now[0]))
+        key = l.generateKey().get("data").get("ipnsName")
+        l.publishRecord("QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh", key, skip_unchanged=True)
+        now[0] += 61
+        l.publishRecord("QmeMsykMDyD76zpAbinCy1cjb1KL6CVNBfB44am15U1XHh", key, skip_unchanged=True)
+        self.assertEqual(self.mock.stats().get("requests").get("/api/ipns/get_ipns_records"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
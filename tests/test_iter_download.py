@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+import hashlib
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import AsyncLighthouse, Lighthouse, CidCache, get_bandwidth_limiter
+from src.lighthouseweb3.functions.buffer_pool import BufferPool
+from src.lighthouseweb3.functions.download import iter_download
+from .mock_server import MockLighthouse
+
+
+class TestIterDownload(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.mock = MockLighthouse().start()
+        self.data = os.urandom(2500000)
+        self.cid = self.mock.put(self.data)
+
+    def tearDown(self):
+        self.mock.stop()
+
+    def test_iter_download(self):
+        """test iterDownload yields fixed-size memoryviews of one reused buffer"""
+        l = Lighthouse("token")
+        digest = hashlib.sha256()
+        sizes, buffers = [], set()
+        for chunk in l.iterDownload(self.cid, chunk_size=1024*1024):
+            self.assertIsInstance(chunk, memoryview)
+            digest.update(chunk)
+            sizes.append(len(chunk))
+            buffers.add(id(chunk.obj))
+        self.assertEqual(digest.digest(), hashlib.sha256(self.data).digest())
+        self.assertEqual(sizes, [1048576, 1048576, 402848])
+        self.assertEqual(len(buffers), 1)
+
+    def test_iter_download_throttled_reads(self):
+        """test a download limit paces the body in small reads, not one burst per chunk"""
+        Lighthouse.setBandwidthLimit(download=64*1024*1024)
+        limiter = get_bandwidth_limiter()
+        reads = []
+        limiter.throttle_download = lambda count: reads.append(count)
+        try:
+            chunks = [bytes(chunk) for chunk in Lighthouse("token").iterDownload(self.cid, chunk_size=1024*1024)]
+        finally:
+            del limiter.throttle_download
+            Lighthouse.setBandwidthLimit()
+        self.assertEqual(b"".join(chunks), self.data)
+        self.assertEqual([len(chunk) for chunk in chunks], [1048576, 1048576, 402848])
+        self.assertEqual(max(reads), 1024*64)
+        self.assertEqual(sum(reads), len(self.data))
+
+    def test_buffer_returned_to_pool(self):
+        """test the buffer goes back to the pool, also when iteration stops early"""
+        pool = BufferPool()
+        for _ in range(3):
+            chunks = iter_download(self.cid, 65536, pool=pool)
+            next(chunks)
+            chunks.close()
+        self.assertEqual(pool.allocated, 1)
+        self.assertEqual(len(pool.free.get(65536)), 1)
+
+    def test_iter_download_cached(self):
+        """test iterDownload fills the CID cache and reads later runs from it"""
+        with tempfile.TemporaryDirectory() as directory:
+            l = Lighthouse("token", cache=CidCache(directory))
+            for _ in range(2):
+                self.assertEqual(b"".join(bytes(chunk) for chunk in l.iterDownload(self.cid, 300000)), self.data)
+            self.assertEqual(self.mock.stats().get("requests").get("/ipfs"), 1)
+
+    async def test_async_iter_download(self):
+        """test async iterDownload yields the content in fixed-size chunks"""
+        async with AsyncLighthouse("token") as l:
+            chunks = [bytes(chunk) async for chunk in l.iterDownload(self.cid, 1024*1024)]
+        self.assertEqual(b"".join(chunks), self.data)
+        self.assertEqual([len(chunk) for chunk in chunks], [1048576, 1048576, 402848])
+
+
+if __name__ == "__main__":
+    unittest.main()
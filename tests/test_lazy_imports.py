@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+import subprocess
+import sys
+import unittest
+from src.lighthouseweb3.functions.utils import LazyModule
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_import_skips_heavy_dependencies(self):
+        """test importing the package and creating a client loads neither eth_account nor asyncio"""
+        probe = (
+            "import sys\n"
+            "from src.lighthouseweb3 import Lighthouse\n"
+            "Lighthouse('token')\n"
+            "print(','.join(m for m in ('eth_account', 'asyncio', 'aiohttp') if m in sys.modules))\n"
+        )
+        out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "")
+
+    def test_lazy_module(self):
+        """test LazyModule imports its module on first attribute access"""
+        module = LazyModule(".functions.async_transport", "src.lighthouseweb3")
+        self.assertEqual(module.DEFAULT_MAX_CONCURRENCY, 100)
+        self.assertIn("src.lighthouseweb3.functions.async_transport", sys.modules)
+        with self.assertRaises(AttributeError):
+            module.missing
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+import io
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.unixfs import file_dag
+
+
+class TestLocalCid(unittest.TestCase):
+
+    def test_single_chunk(self):
+        """test cids match ipfs add for single chunk files"""
+        self.assertEqual(file_dag(io.BytesIO(b""))[0], "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH")
+        self.assertEqual(file_dag(io.BytesIO(b"hello world"))[0], "Qmf412jQZiuVUtdgnB36FXFX7xg5V6KEbSJ4dpQuhkLyfD")
+        self.assertEqual(file_dag(io.BytesIO(b"hello world\n"))[0], "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o")
+
+    def test_balanced_layout(self):
+        """test leaves are grouped into a balanced tree"""
+        blocks = []
+        cid, tsize, filesize = file_dag(io.BytesIO(b"x" * 10), chunk_size=1, max_links=3, on_block=blocks.append)
+        self.assertEqual(filesize, 10)
+        # 10 leaves, 4 + 2 + 1 parents for a height 3 tree
+        self.assertEqual(len(blocks), 17)
+        self.assertEqual(blocks[-1].cid, cid, "root is emitted last")
+        self.assertEqual(tsize, sum(len(block.data) for block in blocks))
+
+    def test_compute_cid(self):
+        """test computeCid for a file and a directory"""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "root", "sub"))
+            with open(os.path.join(tmp, "root", "sub", "a.txt"), "wb") as f:
+                f.write(b"hello world")
+            res = Lighthouse.computeCid(os.path.join(tmp, "root", "sub", "a.txt"))
+            self.assertEqual(res, {"Name": "a.txt", "Hash": "Qmf412jQZiuVUtdgnB36FXFX7xg5V6KEbSJ4dpQuhkLyfD", "Size": "19"})
+            res = Lighthouse.computeCid(os.path.join(tmp, "root"))
+            self.assertEqual(res.get("Name"), "root")
+            self.assertTrue(res.get("Hash").startswith("Qm"), "directory cid")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+import os
+import unittest
+from src.lighthouseweb3 import Lighthouse, Metrics
+from src.lighthouseweb3.functions.metrics import Histogram, endpoint_of
+from .setup import parse_env
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        """test quantiles are estimated from the buckets"""
+        h = Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 0.5, 1.5, 3):
+            h.observe(value)
+        self.assertEqual(h.count, 4)
+        self.assertEqual(h.quantile(0.5), 1)
+        self.assertEqual(h.quantile(1), 4)
+        self.assertEqual(h.counts, [2, 1, 1, 0])
+
+    def test_endpoint_labels(self):
+        """test gateway cids don't become separate endpoints"""
+        self.assertEqual(endpoint_of("https://gateway.lighthouse.storage/ipfs/Qm123?x=1"), "/ipfs")
+        self.assertEqual(endpoint_of("https://api.lighthouse.storage/api/lighthouse/file_info?cid=Qm"), "/api/lighthouse/file_info")
+
+    def test_registry(self):
+        """test requests, operations and hooks are recorded and exported"""
+        metrics = Metrics()
+        events = []
+        metrics.add_hook(events.append)
+        metrics.observe_request("GET", "https://x/ipfs/Qm1", 200, 0.2, received=10)
+        metrics.observe_request("GET", "https://x/ipfs/Qm2", 503, 0.3)
+        with self.assertRaises(ValueError):
+            with metrics.timer("download"):
+                raise ValueError()
+        metrics.add_collector("cid", lambda: {"hits": 3})
+        snapshot = metrics.to_dict()
+        self.assertEqual(snapshot["requests"]["GET /ipfs"]["count"], 2)
+        self.assertEqual(snapshot["counters"]["bytes_received"], 10)
+        self.assertEqual(snapshot["counters"]["operation_errors"], 1)
+        self.assertEqual(len(events), 3)
+        text = metrics.prometheus()
+        self.assertIn('lighthouse_request_seconds_count{endpoint="/ipfs",method="GET"} 2', text)
+        self.assertIn('lighthouse_errors_total{endpoint="/ipfs",status="503"} 1', text)
+        self.assertIn('lighthouse_cache_hits{cache="cid"} 3', text)
+
+    def test_client_metrics(self):
+        """test client calls are timed"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        l.getFileInfo("Qmd5MBBScDUV3Ly8qahXtZFqyRRfYSmUwEcxpYcV4hzKfW")
+        snapshot = l.metrics.to_dict()
+        self.assertEqual(snapshot["operations"]["getFileInfo"]["count"], 1)
+        self.assertEqual(snapshot["requests"]["GET /api/lighthouse/file_info"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+import io
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse, TTLCache
+from src.lighthouseweb3.functions.retry import RetryPolicy
+from src.lighthouseweb3.functions.unixfs import file_dag
+from .mock_server import MockLighthouse
+
+
+class TestMockServer(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockLighthouse().start()
+        self.dir = tempfile.TemporaryDirectory()
+        self.data = os.urandom(600000)
+        self.path = os.path.join(self.dir.name, "payload.bin")
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.mock.stop()
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        """test upload, file info and download against the mock"""
+        l = Lighthouse("token")
+        res = l.upload(self.path)
+        cid = res.get("data").get("Hash")
+        self.assertEqual(cid, file_dag(io.BytesIO(self.data))[0], "mock computes the real CID")
+        self.assertEqual(l.getFileInfo(cid).get("fileSizeInBytes"), str(len(self.data)))
+        target = os.path.join(self.dir.name, "out.bin")
+        l.downloadToPath(cid, target, chunk_size=100000, connections=3)
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+
+    def test_connection_reuse(self):
+        """test sequential calls share one keep-alive connection"""
+        l = Lighthouse("token")
+        for _ in range(20):
+            l.getBalance()
+        stats = self.mock.stats()
+        self.assertEqual(stats.get("requests").get("/api/user/user_data_usage"), 20)
+        self.assertEqual(stats.get("connections"), 1)
+
+    def test_injected_errors(self):
+        """test injected errors are retried by the client"""
+        l = Lighthouse("token", retry=RetryPolicy(retries=3, backoff=0.01, sleep=lambda s: None))
+        with self.mock.configured(error_rate=1.0, error_status=503):
+            with self.assertRaises(Exception) as context:
+                l.getBalance()
+        self.assertIn("injected", str(context.exception))
+        self.assertEqual(self.mock.stats().get("errors"), 4)
+        self.assertIsInstance(l.getBalance().get("dataUsed"), int)
+
+    def test_put(self):
+        """test content put on the mock, empty content included, is served by its CID"""
+        l = Lighthouse("token")
+        for data in (self.data, b""):
+            cid = self.mock.put(data)
+            self.assertEqual(cid, file_dag(io.BytesIO(data))[0])
+            self.assertEqual(l.download(cid)[0], data)
+        with self.assertRaises(Exception) as context:
+            self.mock._call("/__mock/missing")
+        self.assertIn("no control route", str(context.exception))
+
+    def test_error_responses_not_returned_as_data(self):
+        """test error responses raise, are reported as errors and are not cached"""
+        l = Lighthouse("token", retry=False, metadata_cache=TTLCache())
+        cid = self.mock.put(b"content")
+        with self.mock.configured(error_rate=1.0, error_status=500):
+            with self.assertRaises(Exception):
+                l.getFileInfo(cid)
+            res = list(l.getFileInfoMany([cid]))
+        self.assertIn("error", res[0])
+        self.assertNotIn("data", res[0])
+        self.assertEqual(l.getFileInfo(cid).get("cid"), cid)
+
+    def test_many_calls_share_cache(self):
+        """test batch and single metadata lookups share cache entries"""
+        l = Lighthouse("token", metadata_cache=TTLCache())
+        cids = [self.mock.put(data) for data in (b"a", b"b")]
+        l.getFileInfo(cids[0])
+        l.getDealStatus(cids[1])
+        self.mock.reset_stats()
+        self.assertEqual(len(list(l.getFileInfoMany(cids))), 2)
+        self.assertEqual(len(list(l.getDealStatusMany(cids))), 2)
+        l.getFileInfo(cids[1])
+        l.getDealStatus(cids[0])
+        requests = self.mock.stats()["requests"]
+        self.assertEqual(requests.get("/api/lighthouse/file_info"), 1)
+        self.assertEqual(requests.get("/api/lighthouse/deal_status"), 1)
+
+    def test_upload_file_object_with_progress(self):
+        """test upload of an open file reports progress against the bytes left in it"""
+        reports = []
+        with open(self.path, "rb") as f:
+            f.seek(100000)
+            res = Lighthouse("token").upload(f, on_progress=reports.append)
+        self.assertEqual(res.get("data").get("Hash"), file_dag(io.BytesIO(self.data[100000:]))[0])
+        self.assertEqual(reports[-1]["total"], len(self.data) - 100000)
+        self.assertEqual(reports[-1]["done"], reports[-1]["total"])
+
+    def test_file_info_unknown_cid(self):
+        """test file info of a CID the mock doesn't have is a 404"""
+        with self.assertRaises(Exception) as context:
+            Lighthouse("token").getFileInfo("QmUnknown")
+        self.assertIn("Not Found", str(context.exception))
+
+    def test_skip_existing(self):
+        """test skip_existing only skips content among the account's own uploads"""
+        l = Lighthouse("token")
+        cid = l.upload(self.path).get("data").get("Hash")
+        self.mock.reset_stats()
+        res = l.upload(self.path, tag="again", skip_existing=True)
+        self.assertEqual(res.get("data").get("Hash"), cid)
+        self.assertEqual(self.mock.stats()["requests"].get("/api/v0/add", 0), 0, "own upload not resent")
+
+        other = os.path.join(self.dir.name, "other.bin")
+        with open(other, "wb") as f:
+            f.write(b"stored by another account")
+        foreign = self.mock.put(b"stored by another account")
+        res = l.upload(other, tag="mine", skip_existing=True)
+        self.assertEqual(res.get("data").get("Hash"), foreign)
+        self.assertEqual(self.mock.stats()["requests"].get("/api/v0/add"), 1, "foreign content sent")
+        self.assertIn(foreign, [u["cid"] for u in l.getUploads().get("fileList")])
+        self.assertEqual(l.getTagged("mine").get("data").get("cid"), foreign)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import io
+import email
+import unittest
+from src.lighthouseweb3.functions.multipart import MultipartEncoder
+
+
+def parse_body(encoder: MultipartEncoder, body: bytes):
+    return email.message_from_bytes(
+        f"Content-Type: {encoder.content_type}\r\n\r\n".encode() + body
+    ).get_payload()
+
+
+class TestMultipartEncoder(unittest.TestCase):
+
+    def test_encode_parts(self):
+        """test streamed body parses back to the original parts"""
+        encoder = MultipartEncoder([
+            ("file", "testdir/a.txt", io.BytesIO(b"a" * 100000), "application/octet-stream"),
+            ("file", "testdir/b.txt", "tests/setup.py", "application/octet-stream"),
+        ], chunk_size=4096)
+        body = b"".join(iter(lambda: encoder.read(1000), b""))
+        self.assertEqual(len(body), encoder.len, "Content-Length matches body")
+        parts = parse_body(encoder, body)
+        self.assertEqual(parts[0].get_filename(), "testdir/a.txt")
+        self.assertEqual(parts[0].get_payload(decode=True), b"a" * 100000)
+        with open("tests/setup.py", "rb") as f:
+            self.assertEqual(parts[1].get_payload(decode=True), f.read())
+
+    def test_unknown_length(self):
+        """test non seekable sources are sent without a length"""
+        class Reader:
+            def __init__(self):
+                self.buffer = io.BytesIO(b"data")
+
+            def read(self, *args):
+                return self.buffer.read(*args)
+
+        encoder = MultipartEncoder([("file", "x", Reader(), "application/octet-stream")])
+        self.assertIsNone(encoder.len, "length is unknown")
+        parts = parse_body(encoder, b"".join(encoder))
+        self.assertEqual(parts[0].get_payload(decode=True), b"data")
+
+
+if __name__ == "__main__":
+    unittest.main()
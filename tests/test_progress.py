@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import io
+import unittest
+from src.lighthouseweb3 import CancelToken, ProgressTracker, TransferCancelled
+from src.lighthouseweb3.functions.multipart import MultipartEncoder
+
+
+class TestProgress(unittest.TestCase):
+
+    def test_reports(self):
+        """test throughput and eta are reported at most every interval"""
+        now = [0.0]
+        reports = []
+        tracker = ProgressTracker(1000, reports.append, interval=1, clock=lambda: now[0])
+        now[0] = 0.5
+        tracker.update(100)
+        self.assertEqual(reports, [], "too early to report")
+        now[0] = 2
+        tracker.update(300)
+        self.assertEqual(reports[-1]["done"], 400)
+        self.assertEqual(reports[-1]["speed"], 200.0)
+        self.assertEqual(reports[-1]["eta"], 3.0)
+        now[0] = 3
+        tracker.update(600)
+        tracker.finish()
+        self.assertEqual(reports[-1]["percent"], 100.0)
+        self.assertTrue(reports[-1]["finished"])
+
+    def test_resume_from(self):
+        """test resumed bytes count as done but not towards the speed"""
+        now = [0.0]
+        reports = []
+        tracker = ProgressTracker(100, reports.append, interval=0, clock=lambda: now[0])
+        tracker.resume_from(50)
+        now[0] = 1
+        tracker.update(10)
+        self.assertEqual(reports[-1]["done"], 60)
+        self.assertEqual(reports[-1]["average"], 10.0)
+
+    def test_cancel(self):
+        """test a cancelled token stops the upload body"""
+        token = CancelToken()
+        tracker = ProgressTracker(cancel=token)
+        encoder = MultipartEncoder([("file", "a", io.BytesIO(b"x" * 10), "text/plain")], chunk_size=4, tracker=tracker)
+        encoder.read()
+        self.assertEqual(tracker.done, 10, "file bytes are credited")
+        token.cancel()
+        encoder = MultipartEncoder([("file", "a", io.BytesIO(b"x" * 10), "text/plain")], tracker=tracker)
+        with self.assertRaises(TransferCancelled):
+            encoder.read()
+
+
+if __name__ == "__main__":
+    unittest.main()
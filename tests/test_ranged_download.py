@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+import os
+import io
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.download import RangeWriter
+from .setup import parse_env
+
+
+class TestRangedDownload(unittest.TestCase):
+
+    def test_range_writer_file(self):
+        """test out of order ranges land in place in a preallocated file"""
+        with tempfile.TemporaryFile() as f:
+            writer = RangeWriter(f, 0)
+            writer.preallocate(10)
+            writer.write_at(5, b"56789")
+            writer.write_at(0, b"01234")
+            writer.finish(10)
+            self.assertEqual(f.tell(), 10, "position is at the end")
+            f.seek(0)
+            self.assertEqual(f.read(), b"0123456789")
+
+    def test_range_writer_buffer(self):
+        """test seekable writers without a descriptor"""
+        buffer = io.BytesIO(b"ab")
+        buffer.seek(2)
+        writer = RangeWriter(buffer, buffer.tell())
+        writer.write_at(2, b"cd")
+        writer.write_at(0, b"xy")
+        writer.finish(4)
+        self.assertEqual(buffer.getvalue(), b"abxycd")
+        self.assertEqual(buffer.tell(), 6)
+
+    def test_download_blob_connections(self):
+        """test downloadBlob over several connections"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        with tempfile.TemporaryFile() as file:
+            res = l.downloadBlob(
+                file, "QmPT11PFFQQD3mT6BdwfSHQGHRdF8ngmRmcvxtSBiddWEa", chunk_size=1024*16, connections=4)
+            self.assertEqual(res.get("data").get("Size"),
+                             123939, "File Size dont match")
+
+
+if __name__ == "__main__":
+    unittest.main()
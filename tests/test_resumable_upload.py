@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import os
+import io
+import hashlib
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.resumable_upload import ChunkReader, Journal
+from .mock_server import MockLighthouse
+from .setup import parse_env
+
+
+class TestResumableUpload(unittest.TestCase):
+
+    def test_journal_resume(self):
+        """test recorded chunks are reloaded only for the same source"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.json")
+            identity = {"source": "a", "size": 10, "chunk_size": 5}
+            Journal(path, identity).record(0, {"Hash": "Qm", "Size": 13, "Length": 5})
+            self.assertEqual(Journal(path, identity).chunks, {0: {"Hash": "Qm", "Size": 13, "Length": 5}})
+            self.assertEqual(Journal(path, dict(identity, size=11)).chunks, {}, "changed source starts over")
+
+    def test_chunk_reader(self):
+        """test chunk reader stops at the chunk boundary"""
+        source = io.BytesIO(b"0123456789")
+        reader = ChunkReader(source, 4)
+        self.assertEqual(reader.read(3), b"012")
+        self.assertEqual(reader.read(), b"3")
+        self.assertEqual(reader.read(), b"")
+        self.assertEqual(source.read(), b"456789", "next chunk is untouched")
+
+    def test_stale_journal_not_trusted(self):
+        """test journaled chunks are re-uploaded when a blob of the same name and size has other bytes"""
+        old, new = os.urandom(300000), os.urandom(300000)
+        with MockLighthouse() as mock, tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.json")
+            identity = {"source": "same.bin", "size": 300000, "chunk_size": 100000}
+            expected = Lighthouse("token").uploadBlob(
+                io.BytesIO(new), "same.bin", resumable=True, chunk_size=100000, journal_path=path,
+            )["data"]["Hash"]
+            mock.reset_stats()
+            for index in range(2):
+                chunk = old[index * 100000:(index + 1) * 100000]
+                Journal(path, identity).record(index, {
+                    "Hash": mock.put(chunk), "Size": 100000, "Length": 100000,
+                    "Sha256": hashlib.sha256(chunk).hexdigest(),
+                })
+            res = Lighthouse("token").uploadBlob(
+                io.BytesIO(new), "same.bin", resumable=True, chunk_size=100000, journal_path=path,
+            )
+            self.assertEqual(res["data"]["Hash"], expected)
+            self.assertEqual(mock.stats().get("requests").get("/api/v0/add"), 3)
+
+    def test_matching_journal_skips_chunks(self):
+        """test journaled chunks whose bytes still match are not sent again"""
+        data = os.urandom(300000)
+        with MockLighthouse() as mock, tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "journal.json")
+            expected = Lighthouse("token").uploadBlob(
+                io.BytesIO(data), "blob.bin", resumable=True, chunk_size=100000, journal_path=path,
+            )["data"]["Hash"]
+            identity = {"source": "blob.bin", "size": 300000, "chunk_size": 100000}
+            chunk = data[:100000]
+            added = Lighthouse("token").uploadBlob(io.BytesIO(chunk), "blob.bin")["data"]
+            Journal(path, identity).record(0, {
+                "Hash": added["Hash"], "Size": int(added["Size"]), "Length": 100000,
+                "Sha256": hashlib.sha256(chunk).hexdigest(),
+            })
+            mock.reset_stats()
+            res = Lighthouse("token").uploadBlob(
+                io.BytesIO(data), "blob.bin", resumable=True, chunk_size=100000, journal_path=path,
+            )
+            self.assertEqual(res["data"]["Hash"], expected)
+            self.assertEqual(mock.stats().get("requests").get("/api/v0/add"), 2)
+
+    def test_resumable_directory_rejected(self):
+        """test a directory is refused with a clear error instead of failing to open"""
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(Exception) as context:
+                Lighthouse("token").upload(tmp, resumable=True)
+            self.assertIn("single file", str(context.exception))
+            self.assertNotIsInstance(context.exception, IsADirectoryError)
+
+    def test_upload_resumable(self):
+        """test resumable uploadBlob function"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        res = l.uploadBlob(io.BytesIO(os.urandom(300000)), "resumable.bin", resumable=True, chunk_size=100000)
+        self.assertIsInstance(res.get("data").get("Hash"), str, "Hash is a str")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.download import DownloadProgress, download_file_into_writable, progress_path
+from src.lighthouseweb3.functions.progress import CancelToken, ProgressTracker
+from .mock_server import MockLighthouse
+from .setup import parse_env
+
+
+class TestResumeDownload(unittest.TestCase):
+
+    def test_download_progress(self):
+        """test completed ranges survive a restart for the same object only"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "file.lhprogress")
+            progress = DownloadProgress(path, "cid", 30)
+            progress.record(10, 19)
+            ranges = [(0, 9), (10, 19), (20, 29)]
+            self.assertEqual(DownloadProgress(path, "cid", 30).missing(ranges), [(0, 9), (20, 29)])
+            self.assertFalse(DownloadProgress(path, "other", 30).loaded, "other cid is ignored")
+            progress.remove()
+            self.assertFalse(os.path.exists(path), "sidecar removed")
+
+    def test_progress_path(self):
+        """test sidecar sits next to the destination file"""
+        with tempfile.NamedTemporaryFile() as f:
+            self.assertEqual(progress_path(f), f"{f.name}.lhprogress")
+
+    def test_resume_interrupted_ranged_download(self):
+        """test a ranged download stopped midway resumes by its sidecar, at its offset, also over one connection"""
+        data = os.urandom(1000000)
+        with MockLighthouse() as mock, tempfile.TemporaryDirectory() as tmp:
+            cid = mock.put(data)
+            path = os.path.join(tmp, "file.bin")
+
+            def stop(report):
+                if report["done"] >= 300000:
+                    cancel.cancel()
+
+            for prefix in (b"", b"header before the object"):
+                cancel = CancelToken()
+                with open(path, "wb") as file:
+                    file.write(prefix)
+                    with self.assertRaises(Exception):
+                        download_file_into_writable(
+                            cid, file, 100000, connections=2,
+                            tracker=ProgressTracker(callback=stop, cancel=cancel, interval=0),
+                        )
+                self.assertEqual(os.path.getsize(path), len(prefix) + len(data), "file is preallocated")
+                self.assertTrue(os.path.exists(f"{path}.lhprogress"))
+                with open(path, "r+b") as file:
+                    res = Lighthouse("token").downloadBlob(file, cid, chunk_size=100000, resume=True)
+                self.assertEqual(res["data"]["Size"], len(prefix) + len(data))
+                with open(path, "rb") as file:
+                    self.assertEqual(file.read(), prefix + data)
+                self.assertFalse(os.path.exists(f"{path}.lhprogress"))
+
+    def test_resume_download_blob(self):
+        """test downloadBlob resumes a partial file"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "image.png")
+            with open(path, "wb") as file:
+                l.downloadBlob(file, "QmPT11PFFQQD3mT6BdwfSHQGHRdF8ngmRmcvxtSBiddWEa")
+            with open(path, "r+b") as file:
+                file.truncate(50000)
+            with open(path, "r+b") as file:
+                res = l.downloadBlob(file, "QmPT11PFFQQD3mT6BdwfSHQGHRdF8ngmRmcvxtSBiddWEa", resume=True)
+            self.assertEqual(res.get("data").get("Size"), 123939, "File Size dont match")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import http.server
+import socket
+import threading
+import unittest
+from src.lighthouseweb3 import Transport, RetryPolicy, RetryBudget, TokenBucket
+from src.lighthouseweb3.functions.retry import parse_retry_after
+
+
+class _Throttling(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        type(self).calls += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = 429 if type(self).calls < 3 else 200
+        self.send_response(status)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_POST = do_GET
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_parse_retry_after(self):
+        """test Retry-After in seconds and as an HTTP date"""
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after(None))
+
+    def test_policy(self):
+        """test only safe requests are retried"""
+        policy = RetryPolicy(retries=2)
+        self.assertTrue(policy.retry_status("GET", 503, 0, True))
+        self.assertFalse(policy.retry_status("POST", 503, 0, True), "post may have been processed")
+        self.assertTrue(policy.retry_status("POST", 429, 0, True))
+        self.assertFalse(policy.retry_status("GET", 429, 0, False), "streamed body can't be replayed")
+        self.assertFalse(policy.retry_status("GET", 503, 2, True), "attempts exhausted")
+        self.assertFalse(policy.retry_status("GET", 404, 0, True))
+        self.assertLessEqual(policy.delay(10), policy.max_backoff)
+
+    def test_budget(self):
+        """test retries are capped by the budget"""
+        budget = RetryBudget(ratio=0.5, min_per_second=0, clock=lambda: 0)
+        for _ in range(4):
+            budget.deposit()
+        self.assertEqual([budget.withdraw() for _ in range(3)], [True, True, False])
+
+    def test_token_bucket(self):
+        """test callers wait for tokens at the configured rate"""
+        now = [0.0]
+        slept = []
+        bucket = TokenBucket(10, burst=1, clock=lambda: now[0], sleep=slept.append)
+        bucket.acquire()
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(slept, [0.1, 0.2])
+        bucket.set_rate(None)
+        bucket.acquire()
+        self.assertEqual(len(slept), 2, "unlimited")
+
+    def test_transport_retries_429(self):
+        """test transport retries throttled requests"""
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Throttling)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            transport = Transport(retry=RetryPolicy(backoff=0))
+            r = transport.post(f"http://127.0.0.1:{server.server_port}/", data=b"body")
+            self.assertEqual(r.status_code, 200)
+            self.assertEqual(transport.retry.retried, 2)
+            transport.close()
+        finally:
+            server.shutdown()
+
+    def test_transport_retries_refused_post(self):
+        """test a POST whose connection is refused is retried, it never reached the server"""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        transport = Transport(retry=RetryPolicy(retries=2, backoff=0))
+        with self.assertRaises(Exception):
+            transport.post(f"http://127.0.0.1:{port}/", data=b"body")
+        self.assertEqual(transport.retry.retried, 2)
+        transport.close()
+
+    def test_transport_retries_unresolved_host(self):
+        """test a POST to a host that doesn't resolve is retried"""
+        transport = Transport(retry=RetryPolicy(retries=1, backoff=0))
+        with self.assertRaises(Exception):
+            transport.post("http://lighthouse-sdk-test.invalid/", data=b"body")
+        self.assertEqual(transport.retry.retried, 1)
+        transport.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
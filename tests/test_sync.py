@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.sync import Manifest, scan_tree
+from .mock_server import MockLighthouse
+from .setup import parse_env
+
+
+class TestSync(unittest.TestCase):
+
+    def test_scan_tree(self):
+        """test files are listed with their names relative to the root"""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "root", "sub"))
+            for name in ("root/a", "root/sub/b"):
+                with open(os.path.join(tmp, name), "w") as f:
+                    f.write(name)
+            files = scan_tree(os.path.join(tmp, "root") + "/")
+            self.assertEqual([name for name, _, _, _ in files], ["root/a", "root/sub/b"])
+            self.assertEqual(files[1][2], len("root/sub/b"), "size")
+
+    def test_scan_tree_symlinked_directories(self):
+        """test symlinked directories, loops or outside the tree, are not descended into"""
+        with tempfile.TemporaryDirectory() as tmp:
+            os.makedirs(os.path.join(tmp, "root", "sub"))
+            os.makedirs(os.path.join(tmp, "outside"))
+            for name in ("root/sub/a", "outside/secret"):
+                with open(os.path.join(tmp, name), "w") as f:
+                    f.write(name)
+            os.symlink(os.path.join(tmp, "root"), os.path.join(tmp, "root", "sub", "loop"))
+            os.symlink(os.path.join(tmp, "outside"), os.path.join(tmp, "root", "out"))
+            files = scan_tree(os.path.join(tmp, "root"))
+            self.assertEqual([name for name, _, _, _ in files], ["root/sub/a"])
+
+    def test_manifest(self):
+        """test manifest is only trusted for the same source"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "manifest.json")
+            manifest = Manifest(path, "/data")
+            manifest.files = {"data/a": {"size": 1, "mtime": 2, "hash": "h", "cid": "c", "tsize": 9}}
+            manifest.root = "root"
+            manifest.save()
+            self.assertEqual(Manifest(path, "/data").files, manifest.files)
+            self.assertEqual(Manifest(path, "/other").files, {})
+
+    def test_sync_duplicate_files(self):
+        """test new files sharing content, empty ones included, are sent once and all get its CID"""
+        with MockLighthouse() as mock, tempfile.TemporaryDirectory() as tmp:
+            root = os.path.join(tmp, "root")
+            os.makedirs(os.path.join(root, "sub"))
+            for name, content in (
+                ("a", b"same"), ("b", b"same"), ("sub/c", b"same"),
+                ("empty1", b""), ("sub/empty2", b""), ("other", b"other"),
+            ):
+                with open(os.path.join(root, name), "wb") as f:
+                    f.write(content)
+            manifest = os.path.join(tmp, "manifest.json")
+            res = Lighthouse("token").sync(root, manifest_path=manifest)
+            self.assertEqual(res.get("uploaded"), 6)
+            self.assertEqual(res.get("bytes"), len(b"same") + len(b"other"))
+            files = Manifest(manifest, root).files
+            self.assertEqual(files["root/a"]["cid"], files["root/b"]["cid"])
+            self.assertEqual(files["root/a"]["cid"], files["root/sub/c"]["cid"])
+            self.assertEqual(files["root/empty1"]["cid"], files["root/sub/empty2"]["cid"])
+            self.assertNotEqual(files["root/a"]["cid"], files["root/other"]["cid"])
+            again = Lighthouse("token").sync(root, manifest_path=manifest)
+            self.assertEqual(again.get("uploaded"), 0)
+            self.assertEqual(again.get("data").get("Hash"), res.get("data").get("Hash"))
+            self.assertEqual(mock.stats().get("requests").get("/api/v0/add"), 1)
+
+    def test_sync(self):
+        """test second sync of an unchanged directory uploads nothing"""
+        parse_env()
+        l = Lighthouse(os.environ.get("LIGHTHOUSE_TOKEN"))
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, "manifest.json")
+            first = l.sync("tests/", manifest_path=manifest)
+            self.assertIsInstance(first.get("data").get("Hash"), str, "Hash is a str")
+            second = l.sync("tests/", manifest_path=manifest)
+            self.assertEqual(second.get("uploaded"), 0)
+            self.assertEqual(second.get("data").get("Hash"), first.get("data").get("Hash"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+import unittest
+from src.lighthouseweb3 import Lighthouse
+from src.lighthouseweb3.functions.transport import Transport, get_default_transport
+
+
+class TestTransport(unittest.TestCase):
+
+    def test_pool_size(self):
+        """test pool size and timeout are applied to the session adapters"""
+        transport = Transport(pool_connections=3, pool_maxsize=7, timeout=5)
+        adapter = transport.session.get_adapter("https://api.lighthouse.storage")
+        self.assertEqual(adapter._pool_connections, 3, "pool connections match")
+        self.assertEqual(adapter._pool_maxsize, 7, "pool maxsize match")
+        self.assertEqual(transport.timeout, 5, "timeout match")
+        transport.close()
+
+    def test_default_transport_is_shared(self):
+        """test calls without a client reuse one default transport"""
+        self.assertIs(get_default_transport(), get_default_transport())
+
+    def test_client_transport(self):
+        """test each client owns a transport and can share one"""
+        l = Lighthouse("token", pool_size=4)
+        self.assertIsInstance(l.transport, Transport, "transport is a Transport")
+        self.assertEqual(l.transport.pool_maxsize, 4, "pool size match")
+        shared = Lighthouse("token", transport=l.transport)
+        self.assertIs(shared.transport, l.transport, "transport is shared")
+        l.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
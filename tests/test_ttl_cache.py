@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+import threading
+import time
+import unittest
+from src.lighthouseweb3 import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_ttl(self):
+        """test entries expire after their endpoint ttl"""
+        now = [0]
+        cache = TTLCache(ttls={"file_info": 10, "balance": 0}, clock=lambda: now[0])
+        calls = []
+        load = lambda: calls.append(1) or len(calls)
+        self.assertEqual(cache.get_or_load("file_info", "cid", load), 1)
+        now[0] = 9
+        self.assertEqual(cache.get_or_load("file_info", "cid", load), 1)
+        now[0] = 11
+        self.assertEqual(cache.get_or_load("file_info", "cid", load), 2)
+        cache.get_or_load("balance", "token", load)
+        cache.get_or_load("balance", "token", load)
+        self.assertEqual(len(calls), 4, "ttl 0 is not cached")
+
+    def test_lru(self):
+        """test least recently used entries are evicted first"""
+        cache = TTLCache(max_entries=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_load("file_info", key, lambda: key)
+        self.assertEqual(sorted(k for _, k in cache.entries), ["a", "c"])
+
+    def test_coalescing(self):
+        """test concurrent misses share one load and errors are not cached"""
+        cache = TTLCache()
+        calls = []
+
+        def load():
+            calls.append(1)
+            time.sleep(0.2)
+            return "info"
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("file_info", "cid", load)))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1, "one request for every caller")
+        self.assertEqual(results, ["info"] * 10)
+
+        def fail():
+            raise Exception("down")
+        with self.assertRaises(Exception):
+            cache.get_or_load("deal_status", "cid", fail)
+        self.assertEqual(cache.get_or_load("deal_status", "cid", lambda: "ok"), "ok")
+
+
+    def test_invalidate_during_load(self):
+        """test a load that started before invalidate doesn't store its stale value"""
+        cache = TTLCache()
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait()
+            return "stale"
+        thread = threading.Thread(target=lambda: cache.get_or_load("balance", "token", slow))
+        thread.start()
+        started.wait()
+        cache.invalidate("balance", "token")
+        self.assertEqual(cache.get_or_load("balance", "token", lambda: "fresh"), "fresh", "not joined to the stale load")
+        release.set()
+        thread.join()
+        self.assertEqual(cache.get_or_load("balance", "token", lambda: "reloaded"), "fresh")
+
+        started.clear()
+        release.clear()
+        thread = threading.Thread(target=lambda: cache.get_or_load("tagged", "a", slow))
+        thread.start()
+        started.wait()
+        cache.invalidate("tagged")
+        release.set()
+        thread.join()
+        self.assertEqual(cache.get_or_load("tagged", "a", lambda: "fresh"), "fresh", "endpoint-wide invalidate")
+
+    def test_returns_copies(self):
+        """test changing a returned response doesn't change the cached one"""
+        cache = TTLCache()
+        first = cache.get_or_load("file_info", "cid", lambda: {"cid": "cid", "tags": []})
+        first["tags"].append("changed")
+        self.assertEqual(cache.get_or_load("file_info", "cid", lambda: None), {"cid": "cid", "tags": []})
+
+
+if __name__ == "__main__":
+    unittest.main()